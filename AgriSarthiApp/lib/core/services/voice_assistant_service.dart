@@ -100,6 +100,17 @@ class VoiceAssistantService {
       debugPrint(
           'VoiceAssistantService: Response status: ${streamedResponse.statusCode}');
 
+      // Backend time per stage (auth, stt, intent, db, tts, ...)
+      final serverTiming = streamedResponse.headers['server-timing'];
+      if (serverTiming != null) {
+        debugPrint('VoiceAssistantService: Server-Timing: $serverTiming');
+      }
+      // Set when the backend answered a retried clip from its replay cache
+      final replay = streamedResponse.headers['x-voice-replay'];
+      if (replay != null) {
+        debugPrint('VoiceAssistantService: Replayed response ($replay)');
+      }
+
       // Handle 401 — try token refresh
       if (streamedResponse.statusCode == 401) {
         debugPrint('VoiceAssistantService: 401 — attempting token refresh');
@@ -13,3 +13,6 @@ python manage.py migrate
 
 # Collect static files
 python manage.py collectstatic --no-input
+
+# Pre-render the fixed voice responses (needs SARVAM_API_KEY; optional)
+python manage.py build_voice_bank || echo "Voice bank not built; responses will be synthesized on demand"
@@ -5,10 +5,12 @@ and generate alerts for farmers.
 """
 
 import logging
-import requests
+import httpx
 from django.conf import settings
 from decimal import Decimal
 
+from core.http_client import http_client
+
 logger = logging.getLogger(__name__)
 
 # WeatherAPI.com configuration
@@ -79,10 +81,10 @@ class WeatherService:
                 'q': location_query,
                 'aqi': 'no',
             }
-            response = requests.get(url, params=params, timeout=10)
+            response = http_client('weather').get(url, params=params, timeout=10)
             response.raise_for_status()
             return response.json()
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"Weather API request failed: {e}")
             return None
 
@@ -112,10 +114,10 @@ class WeatherService:
                 'alerts': 'yes',
                 'aqi': 'no',
             }
-            response = requests.get(url, params=params, timeout=10)
+            response = http_client('weather').get(url, params=params, timeout=10)
             response.raise_for_status()
             return response.json()
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"Weather Forecast API request failed: {e}")
             return None
 
@@ -1,5 +1,9 @@
 """
 ASGI config for AIISMS project.
+
+Serves the async voice pipeline (voice.async_views) without tying up a
+thread per session; sync DRF views keep running in Django's thread pool.
+Run with: gunicorn core.asgi:application -k uvicorn_worker.UvicornWorker
 """
 
 import os
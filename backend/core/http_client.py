@@ -0,0 +1,499 @@
+"""
+Core - HTTP Client
+Pooled outbound HTTP with retries, circuit breakers and bulkheads.
+
+Calls to the external providers (Sarvam, Groq, WeatherAPI) used to open a
+new connection each, and a slow or failing provider could hold every worker
+thread for its full timeout. Each provider ("upstream") now has one
+process-wide httpx.Client, and one httpx.AsyncClient per event loop, whose
+transport applies to every request:
+
+  pool      keep-alive connections per host (HTTP_POOL_CONNECTIONS): the TCP
+            and TLS handshakes are paid per connection, not per call
+  bulkhead  at most <NAME>_MAX_CONCURRENCY requests in flight to the
+            upstream (per process for threads, per event loop for async);
+            beyond that a request waits up to HTTP_BULKHEAD_WAIT_SECONDS,
+            then fails with BulkheadFull
+  breaker   after HTTP_BREAKER_FAILURES consecutive failures (connection
+            errors, timeouts, 5xx) requests fail at once with CircuitOpen
+            for HTTP_BREAKER_RESET_SECONDS; then a single trial request
+            closes it again, or reopens it
+  retries   connection failures, 429 and 502/503/504 are tried again, up to
+            HTTP_RETRY_ATTEMPTS tries in all, after a jittered exponential
+            backoff, as long as the upstream's retry budget allows (retries
+            in the last RETRY_BUDGET_WINDOW seconds: one per second plus
+            HTTP_RETRY_BUDGET_RATIO of the requests). Read timeouts are not
+            retried.
+
+BulkheadFull and CircuitOpen are httpx.TransportError subclasses, so
+callers handle them like a connection failure. Usage:
+
+    response = http_client('sarvam').post(url, json=payload, timeout=30)
+    response = await async_http_client('sarvam').post(url, json=payload, timeout=30)
+
+upstream_stats() reports the state of every upstream (/api/voice/metrics/).
+"""
+
+import asyncio
+import logging
+import random
+import threading
+import time
+import weakref
+from collections import deque
+from typing import Any, Dict, Optional
+
+import httpx
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Answers worth another try (the request was not processed, or throttled)
+RETRY_STATUSES = {429, 502, 503, 504}
+
+# Transport errors raised before the upstream could process the request
+RETRY_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.RemoteProtocolError)
+
+# Backoff before retry n (from 0): uniform in [0, min(MAX, BASE * 2**n)]
+BACKOFF_BASE_SECONDS = 0.1
+BACKOFF_MAX_SECONDS = 2.0
+
+RETRY_BUDGET_WINDOW = 10.0
+RETRY_BUDGET_MIN_PER_SECOND = 1.0
+
+
+class UpstreamUnavailable(httpx.TransportError):
+    """The request was not sent: the upstream is failing or saturated."""
+
+
+class CircuitOpen(UpstreamUnavailable):
+    pass
+
+
+class BulkheadFull(UpstreamUnavailable):
+    pass
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker: closed -> open -> half-open (one trial) -> closed."""
+
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half-open'
+
+    def __init__(self, name: str, failures: int, reset_seconds: float):
+        self.name = name
+        self.threshold = failures
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial = False
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.rejected = 0
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now (in half-open: the trial only)."""
+        if self.threshold <= 0:
+            return True
+        with self._lock:
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_seconds:
+                self.state = self.HALF_OPEN
+                self._trial = False
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.HALF_OPEN and not self._trial:
+                self._trial = True
+                return True
+            self.rejected += 1
+            return False
+
+    def success(self):
+        with self._lock:
+            self._failures = 0
+            self._trial = False
+            if self.state != self.CLOSED:
+                logger.info(f"HTTP: {self.name} circuit closed")
+                self.state = self.CLOSED
+
+    def failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial = False
+            if self.state == self.HALF_OPEN or (self.state == self.CLOSED and 0 < self.threshold <= self._failures):
+                logger.warning(
+                    f"HTTP: {self.name} circuit open for {self.reset_seconds:.0f}s "
+                    f"after {self._failures} consecutive failures"
+                )
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+                self.opened += 1
+
+    def cancel(self):
+        """A request ended without an outcome (cancelled, local pool timeout)."""
+        with self._lock:
+            self._trial = False
+
+
+class RetryBudget:
+    """Retries allowed as a share of the recent requests, plus a floor per second."""
+
+    def __init__(self, ratio: float, window: float = RETRY_BUDGET_WINDOW,
+                 min_per_second: float = RETRY_BUDGET_MIN_PER_SECOND):
+        self.ratio = ratio
+        self.window = window
+        self.min_per_second = min_per_second
+        self._requests = deque()
+        self._retries = deque()
+        self._lock = threading.Lock()
+
+    def _prune(self, now):
+        for times in (self._requests, self._retries):
+            while times and times[0] <= now - self.window:
+                times.popleft()
+
+    def request(self):
+        now = time.monotonic()
+        with self._lock:
+            self._prune(now)
+            self._requests.append(now)
+
+    def withdraw(self) -> bool:
+        """Take one retry from the budget if there is one left."""
+        now = time.monotonic()
+        with self._lock:
+            self._prune(now)
+            if len(self._retries) >= self.min_per_second * self.window + self.ratio * len(self._requests):
+                return False
+            self._retries.append(now)
+            return True
+
+
+class Upstream:
+    """Connection pool, bulkhead, breaker and retry policy of one provider."""
+
+    def __init__(self, name: str, max_concurrency: int, pool_connections: int, attempts: int,
+                 breaker: CircuitBreaker, budget: RetryBudget, bulkhead_wait: float):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.pool_connections = pool_connections
+        self.attempts = max(1, attempts)
+        self.breaker = breaker
+        self.budget = budget
+        self.bulkhead_wait = bulkhead_wait
+        self._slots = threading.BoundedSemaphore(max_concurrency) if max_concurrency > 0 else None
+        self._async_slots = weakref.WeakKeyDictionary()  # loop -> asyncio.Semaphore
+        self._client = None
+        self._async_clients = weakref.WeakKeyDictionary()  # loop -> httpx.AsyncClient
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+        self.budget_exhausted = 0
+        self.bulkhead_rejected = 0
+
+    def _limits(self):
+        return httpx.Limits(max_connections=None, max_keepalive_connections=self.pool_connections)
+
+    def client(self) -> httpx.Client:
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = httpx.Client(transport=UpstreamTransport(self), follow_redirects=True)
+        return self._client
+
+    def async_client(self) -> httpx.AsyncClient:
+        """Client for the running event loop (clients cannot be shared across loops)."""
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            client = self._async_clients[loop] = httpx.AsyncClient(
+                transport=AsyncUpstreamTransport(self), follow_redirects=True
+            )
+        return client
+
+    # ------------------------------------------------------------
+    # Policies (used by the transports)
+    # ------------------------------------------------------------
+
+    def _count(self, field, delta=1):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + delta)
+
+    def enter(self):
+        self._count('in_flight')
+        self._count('requests')
+        self.budget.request()
+
+    def leave(self):
+        self._count('in_flight', -1)
+
+    def full(self, request):
+        self._count('bulkhead_rejected')
+        return BulkheadFull(f"{self.name}: {self.max_concurrency} requests already in flight", request=request)
+
+    def check_breaker(self, request):
+        if not self.breaker.allow():
+            raise CircuitOpen(f"{self.name}: circuit open", request=request)
+
+    def outcome(self, attempt: int, status: Optional[int] = None, error: Optional[Exception] = None) -> bool:
+        """Record a try with the breaker; whether to try again."""
+        if isinstance(error, httpx.PoolTimeout):
+            self.breaker.cancel()
+            return False
+        if error is not None or status >= 500:
+            self._count('failures')
+            self.breaker.failure()
+        else:
+            self.breaker.success()
+
+        if not (isinstance(error, RETRY_ERRORS) or status in RETRY_STATUSES) or attempt + 1 >= self.attempts:
+            return False
+        if not self.budget.withdraw():
+            self._count('budget_exhausted')
+            logger.warning(f"HTTP: {self.name} retry budget exhausted")
+            return False
+        self._count('retries')
+        logger.info(f"HTTP: Retrying {self.name} request ({error or status})")
+        return True
+
+    @staticmethod
+    def backoff(attempt: int) -> float:
+        return random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'circuit': self.breaker.state,
+            'circuit_opened': self.breaker.opened,
+            'circuit_rejected': self.breaker.rejected,
+            'in_flight': self.in_flight,
+            'max_concurrency': self.max_concurrency,
+            'bulkhead_rejected': self.bulkhead_rejected,
+            'requests': self.requests,
+            'failures': self.failures,
+            'retries': self.retries,
+            'budget_exhausted': self.budget_exhausted,
+        }
+
+    def close(self):
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+
+# ============================================================
+# Transports
+# ============================================================
+
+class _SlotStream(httpx.SyncByteStream):
+    """Response body that frees the bulkhead slot once closed."""
+
+    def __init__(self, stream, release):
+        self._stream = stream
+        self._release = release
+
+    def __iter__(self):
+        yield from self._stream
+
+    def close(self):
+        try:
+            self._stream.close()
+        finally:
+            if self._release is not None:
+                self._release()
+                self._release = None
+
+
+class _AsyncSlotStream(httpx.AsyncByteStream):
+    def __init__(self, stream, release):
+        self._stream = stream
+        self._release = release
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self):
+        try:
+            await self._stream.aclose()
+        finally:
+            if self._release is not None:
+                self._release()
+                self._release = None
+
+
+class UpstreamTransport(httpx.BaseTransport):
+    """Pooled HTTP transport applying the upstream's policies (module docstring)."""
+
+    def __init__(self, upstream: Upstream):
+        self.upstream = upstream
+        self._transport = httpx.HTTPTransport(limits=upstream._limits())
+
+    def handle_request(self, request):
+        upstream = self.upstream
+        slots = upstream._slots
+        if slots is not None and not slots.acquire(timeout=upstream.bulkhead_wait):
+            raise upstream.full(request)
+        upstream.enter()
+
+        def release():
+            upstream.leave()
+            if slots is not None:
+                slots.release()
+
+        try:
+            response = self._send(request)
+        except BaseException:
+            release()
+            raise
+        return httpx.Response(
+            status_code=response.status_code, headers=response.headers,
+            stream=_SlotStream(response.stream, release), extensions=response.extensions,
+        )
+
+    def _send(self, request):
+        upstream = self.upstream
+        request.read()  # the body may be sent more than once
+        attempt = 0
+        while True:
+            upstream.check_breaker(request)
+            try:
+                response = self._transport.handle_request(request)
+            except httpx.TransportError as e:
+                if not upstream.outcome(attempt, error=e):
+                    raise
+            except BaseException:
+                upstream.breaker.cancel()
+                raise
+            else:
+                if not upstream.outcome(attempt, status=response.status_code):
+                    return response
+                response.close()
+            time.sleep(upstream.backoff(attempt))
+            attempt += 1
+
+    def close(self):
+        self._transport.close()
+
+
+class AsyncUpstreamTransport(httpx.AsyncBaseTransport):
+    """UpstreamTransport for an event loop."""
+
+    def __init__(self, upstream: Upstream):
+        self.upstream = upstream
+        self._transport = httpx.AsyncHTTPTransport(limits=upstream._limits())
+
+    def _slots(self):
+        upstream = self.upstream
+        if upstream.max_concurrency <= 0:
+            return None
+        loop = asyncio.get_running_loop()
+        slots = upstream._async_slots.get(loop)
+        if slots is None:
+            slots = upstream._async_slots[loop] = asyncio.Semaphore(upstream.max_concurrency)
+        return slots
+
+    async def handle_async_request(self, request):
+        upstream = self.upstream
+        slots = self._slots()
+        if slots is not None:
+            try:
+                await asyncio.wait_for(slots.acquire(), upstream.bulkhead_wait)
+            except asyncio.TimeoutError:
+                raise upstream.full(request) from None
+        upstream.enter()
+
+        def release():
+            upstream.leave()
+            if slots is not None:
+                slots.release()
+
+        try:
+            response = await self._send(request)
+        except BaseException:
+            release()
+            raise
+        return httpx.Response(
+            status_code=response.status_code, headers=response.headers,
+            stream=_AsyncSlotStream(response.stream, release), extensions=response.extensions,
+        )
+
+    async def _send(self, request):
+        upstream = self.upstream
+        await request.aread()
+        attempt = 0
+        while True:
+            upstream.check_breaker(request)
+            try:
+                response = await self._transport.handle_async_request(request)
+            except httpx.TransportError as e:
+                if not upstream.outcome(attempt, error=e):
+                    raise
+            except BaseException:
+                upstream.breaker.cancel()
+                raise
+            else:
+                if not upstream.outcome(attempt, status=response.status_code):
+                    return response
+                await response.aclose()
+            await asyncio.sleep(upstream.backoff(attempt))
+            attempt += 1
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+
+# ============================================================
+# Registry
+# ============================================================
+
+_upstreams: Dict[str, Upstream] = {}
+_upstreams_lock = threading.Lock()
+
+
+def upstream(name: str) -> Upstream:
+    """Process-wide upstream configured from settings (<NAME>_MAX_CONCURRENCY, HTTP_*)."""
+    current = _upstreams.get(name)
+    if current is None:
+        with _upstreams_lock:
+            current = _upstreams.get(name)
+            if current is None:
+                current = _upstreams[name] = Upstream(
+                    name,
+                    max_concurrency=int(getattr(
+                        settings, f'{name.upper()}_MAX_CONCURRENCY', getattr(settings, 'HTTP_MAX_CONCURRENCY', 16)
+                    )),
+                    pool_connections=int(getattr(settings, 'HTTP_POOL_CONNECTIONS', 20)),
+                    attempts=int(getattr(settings, 'HTTP_RETRY_ATTEMPTS', 3)),
+                    breaker=CircuitBreaker(
+                        name,
+                        failures=int(getattr(settings, 'HTTP_BREAKER_FAILURES', 5)),
+                        reset_seconds=float(getattr(settings, 'HTTP_BREAKER_RESET_SECONDS', 30)),
+                    ),
+                    budget=RetryBudget(float(getattr(settings, 'HTTP_RETRY_BUDGET_RATIO', 0.2))),
+                    bulkhead_wait=float(getattr(settings, 'HTTP_BULKHEAD_WAIT_SECONDS', 2)),
+                )
+    return current
+
+
+def http_client(name: str) -> httpx.Client:
+    """Pooled client of an upstream (blocking)."""
+    return upstream(name).client()
+
+
+def async_http_client(name: str) -> httpx.AsyncClient:
+    """Pooled client of an upstream for the running event loop."""
+    return upstream(name).async_client()
+
+
+def upstream_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: current.stats() for name, current in sorted(_upstreams.items())}
+
+
+def reset_upstreams():
+    """Recreate the upstreams from settings on next use (closes the blocking clients)."""
+    with _upstreams_lock:
+        for current in _upstreams.values():
+            current.close()
+        _upstreams.clear()
@@ -4,6 +4,7 @@ Django Settings Configuration
 """
 
 import os
+import tempfile
 from pathlib import Path
 from datetime import timedelta
 
@@ -125,6 +126,10 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Uploads up to this size stay in memory (voice clips go to STT without
+# touching disk); larger ones spill to a temp file removed after the request
+FILE_UPLOAD_MAX_MEMORY_SIZE = int(config('FILE_UPLOAD_MAX_MEMORY_SIZE', default=2621440))
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # REST Framework Configuration
@@ -181,9 +186,76 @@ GROQ_API_KEY = config('GROQ_API_KEY', default='')
 OPENAI_API_KEY = config('OPENAI_API_KEY', default='')
 SARVAM_API_KEY = config('SARVAM_API_KEY', default='')
 
+# Outbound HTTP (core/http_client.py): keep-alive connections per provider,
+# retries within a budget, circuit breakers and concurrency caps (bulkheads)
+HTTP_POOL_CONNECTIONS = int(config('HTTP_POOL_CONNECTIONS', default=20))
+HTTP_RETRY_ATTEMPTS = int(config('HTTP_RETRY_ATTEMPTS', default=3))
+HTTP_RETRY_BUDGET_RATIO = float(config('HTTP_RETRY_BUDGET_RATIO', default=0.2))
+HTTP_BREAKER_FAILURES = int(config('HTTP_BREAKER_FAILURES', default=5))
+HTTP_BREAKER_RESET_SECONDS = float(config('HTTP_BREAKER_RESET_SECONDS', default=30))
+HTTP_BULKHEAD_WAIT_SECONDS = float(config('HTTP_BULKHEAD_WAIT_SECONDS', default=2))
+SARVAM_MAX_CONCURRENCY = int(config('SARVAM_MAX_CONCURRENCY', default=32))
+GROQ_MAX_CONCURRENCY = int(config('GROQ_MAX_CONCURRENCY', default=16))
+WEATHER_MAX_CONCURRENCY = int(config('WEATHER_MAX_CONCURRENCY', default=4))
+
+# Voice intents: regex results at or above this confidence (0.9 = matched in
+# the farmer's language) are used without asking the LLM; above 1 always asks
+INTENT_REGEX_MIN_CONFIDENCE = float(config('INTENT_REGEX_MIN_CONFIDENCE', default=0.9))
+# LLM intent answers memoized per process by normalized transcript
+INTENT_CACHE_TTL_SECONDS = float(config('INTENT_CACHE_TTL_SECONDS', default=6 * 3600))
+INTENT_CACHE_MAX_ENTRIES = int(config('INTENT_CACHE_MAX_ENTRIES', default=5000))
+# LLM gateway for intents (voice/services/llm_gateway.py): backend 'groq', or
+# 'stub' (answers in-process from the regex parser, for tests and benchmarks)
+INTENT_LLM_BACKEND = config('INTENT_LLM_BACKEND', default='groq')
+INTENT_LLM_MODEL = config('INTENT_LLM_MODEL', default='llama-3.3-70b-versatile')
+INTENT_LLM_MAX_TOKENS = int(config('INTENT_LLM_MAX_TOKENS', default=96))
+INTENT_LLM_TIMEOUT_SECONDS = float(config('INTENT_LLM_TIMEOUT_SECONDS', default=15))
+
 # Weather API (weatherapi.com)
 WEATHER_API_KEY = config('WEATHER_API_KEY', default='')
 
 # OTP Settings
 OTP_EXPIRY_MINUTES = 5
 OTP_LENGTH = 6
+
+# Scheme catalogue: seconds between DB probes for scheme/rule edits made by
+# other workers (edits made in this worker apply immediately)
+SCHEME_CATALOGUE_POLL_SECONDS = float(config('SCHEME_CATALOGUE_POLL_SECONDS', default=5))
+
+# WAV clips are silence-trimmed, downmixed and resampled to STT_SAMPLE_RATE
+# before STT (voice/services/audio_preprocess.py)
+STT_PREPROCESS = config('STT_PREPROCESS', default=True, cast=bool)
+STT_SAMPLE_RATE = int(config('STT_SAMPLE_RATE', default=16000))
+
+# TTS audio cache (voice/services/tts_cache.py); an empty TTS_CACHE_DIR
+# keeps the cache in memory only
+TTS_CACHE_DIR = config('TTS_CACHE_DIR', default=os.path.join(tempfile.gettempdir(), 'agrisarthi-tts-cache'))
+TTS_CACHE_MEMORY_MB = float(config('TTS_CACHE_MEMORY_MB', default=32))
+TTS_CACHE_DISK_MB = float(config('TTS_CACHE_DISK_MB', default=512))
+# Transcoded renditions of TTS audio (voice/services/audio_formats.py)
+AUDIO_FORMAT_CACHE_MB = float(config('AUDIO_FORMAT_CACHE_MB', default=16))
+# Threads per worker synthesizing sentences of streamed TTS responses
+TTS_STREAM_WORKERS = int(config('TTS_STREAM_WORKERS', default=8))
+
+# Voice request tracing (voice/services/tracing.py): requests slower than this
+# are logged with their stage timings (0 disables); GET /api/voice/metrics/
+# needs X-Metrics-Token: VOICE_METRICS_TOKEN (without one, only with DEBUG)
+VOICE_TRACE_SLOW_SECONDS = float(config('VOICE_TRACE_SLOW_SECONDS', default=5))
+VOICE_METRICS_TOKEN = config('VOICE_METRICS_TOKEN', default='')
+
+# Per-farmer memory of the last voice turn (voice/services/voice_session.py):
+# eligible schemes, form previews and what a follow-up can refer to
+VOICE_SESSION_TTL_SECONDS = float(config('VOICE_SESSION_TTL_SECONDS', default=300))
+VOICE_SESSION_MAX_ENTRIES = int(config('VOICE_SESSION_MAX_ENTRIES', default=10000))
+
+# Responses to voice clips kept for retries of the same clip, and how long a
+# duplicate waits for the identical request in flight (voice/services/voice_replay.py)
+VOICE_REPLAY_TTL_SECONDS = float(config('VOICE_REPLAY_TTL_SECONDS', default=120))
+VOICE_REPLAY_CACHE_MB = float(config('VOICE_REPLAY_CACHE_MB', default=32))
+VOICE_REPLAY_WAIT_SECONDS = float(config('VOICE_REPLAY_WAIT_SECONDS', default=60))
+
+# Pre-rendered ResponseGenerator audio (manage.py build_voice_bank). With
+# VOICE_BANK_COMPOSE, templated responses are spliced from banked fragments
+# and only their variable parts are synthesized.
+VOICE_BANK_DIR = config('VOICE_BANK_DIR', default=os.path.join(BASE_DIR, 'voice_bank'))
+VOICE_BANK_COMPOSE = config('VOICE_BANK_COMPOSE', default=True, cast=bool)
@@ -36,6 +36,13 @@ class FarmerUpdateSerializer(serializers.ModelSerializer):
         if value and len(value) < 2:
             raise serializers.ValidationError("Name must be at least 2 characters.")
         return value
+    
+    def update(self, instance, validated_data):
+        farmer = super().update(instance, validated_data)
+        # Profile fields feed scheme rules; recompute this farmer's eligibility rows
+        from schemes.services.eligibility_store import schedule_farmer_refresh
+        schedule_farmer_refresh(farmer)
+        return farmer
 
 
 class FarmerMinimalSerializer(serializers.ModelSerializer):
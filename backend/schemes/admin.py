@@ -3,7 +3,13 @@ Schemes App - Admin Configuration
 """
 
 from django.contrib import admin
+from django.core.exceptions import PermissionDenied
+from django.http import JsonResponse, StreamingHttpResponse
+from django.urls import path, reverse
+from django.utils.html import format_html
+
 from .models import Scheme, SchemeRule
+from .services.rule_query import EligibleFarmers
 
 
 class SchemeRuleInline(admin.TabularInline):
@@ -15,7 +21,7 @@ class SchemeRuleInline(admin.TabularInline):
 
 @admin.register(Scheme)
 class SchemeAdmin(admin.ModelAdmin):
-    list_display = ['name', 'benefit_amount', 'is_active', 'deadline', 'created_at']
+    list_display = ['name', 'benefit_amount', 'is_active', 'deadline', 'created_at', 'eligible_farmers_link']
     list_filter = ['is_active', 'deadline', 'created_at']
     search_fields = ['name', 'name_hindi', 'description']
     readonly_fields = ['id', 'created_at', 'updated_at']
@@ -46,6 +52,71 @@ class SchemeAdmin(admin.ModelAdmin):
         if obj:  # Editing existing object
             return self.readonly_fields
         return ['id', 'created_at', 'updated_at']
+    
+    def get_urls(self):
+        custom_urls = [
+            path(
+                '<path:object_id>/eligible-farmers/',
+                self.admin_site.admin_view(self.eligible_farmers_view),
+                name='schemes_scheme_eligible_farmers'
+            ),
+        ]
+        return custom_urls + super().get_urls()
+    
+    @admin.display(description='Eligible farmers')
+    def eligible_farmers_link(self, obj):
+        url = reverse('admin:schemes_scheme_eligible_farmers', args=[obj.pk])
+        return format_html('<a href="{}">View</a>', url)
+    
+    def eligible_farmers_view(self, request, object_id):
+        """
+        Who qualifies for this scheme (rules evaluated in the database).
+        
+        GET ?page=1&page_size=500  -> JSON page of farmer IDs plus total count
+        GET ?stream=1              -> every eligible farmer ID, one per line
+        """
+        scheme = self.get_object(request, object_id)
+        if scheme is None:
+            return JsonResponse({
+                'success': False,
+                'message': 'Scheme not found'
+            }, status=404)
+        if not self.has_view_permission(request, scheme):
+            raise PermissionDenied
+        
+        farmers = EligibleFarmers(scheme.id)
+        
+        if request.GET.get('stream'):
+            return StreamingHttpResponse(
+                (f"{farmer_id}\n" for farmer_id in farmers.iter_ids()),
+                content_type='text/plain; charset=utf-8'
+            )
+        
+        try:
+            page = max(int(request.GET.get('page', 1)), 1)
+            page_size = min(max(int(request.GET.get('page_size', 500)), 1), 5000)
+        except ValueError:
+            return JsonResponse({
+                'success': False,
+                'message': 'page and page_size must be integers'
+            }, status=400)
+        
+        farmer_ids = list(farmers.iter_ids(offset=(page - 1) * page_size, limit=page_size))
+        count = farmers.count()
+        
+        return JsonResponse({
+            'success': True,
+            'data': {
+                'scheme_id': str(scheme.id),
+                'scheme_name': scheme.name,
+                'count': count,
+                'page': page,
+                'page_size': page_size,
+                'num_pages': (count + page_size - 1) // page_size,
+                'evaluated_in_sql': farmers.exact,
+                'farmer_ids': [str(farmer_id) for farmer_id in farmer_ids]
+            }
+        })
 
 
 @admin.register(SchemeRule)
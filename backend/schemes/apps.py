@@ -5,3 +5,6 @@ class SchemesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'schemes'
     verbose_name = 'Government Schemes'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,128 @@
+"""
+Benchmark the indexed eligibility path (categorical + numeric threshold
+indexes) against the full compiled scan and the linear _evaluate_rule path,
+on a synthetic in-memory catalogue (no database access).
+
+Usage:
+    python manage.py benchmark_eligibility
+    python manage.py benchmark_eligibility --sizes 1000,10000,50000 --farmers 200
+"""
+
+import random
+import time
+import uuid
+from decimal import Decimal
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand
+
+from farmers.models import Farmer
+from schemes.services.eligibility_engine import _evaluate_rule
+from schemes.services.rule_compiler import RuleCatalogue
+
+
+STATES = [
+    'Maharashtra', 'Punjab', 'Uttar Pradesh', 'Bihar', 'Gujarat', 'Rajasthan',
+    'Karnataka', 'Tamil Nadu', 'West Bengal', 'Madhya Pradesh', 'Odisha', 'Kerala',
+]
+SOCIAL_CATEGORIES = ['general', 'obc', 'sc', 'st', 'nt']
+LAND_TYPES = ['irrigated', 'rainfed', 'mixed']
+
+
+def _rule(field, operator, value):
+    return SimpleNamespace(id=uuid.uuid4(), field=field, operator=operator, value=value, message='')
+
+
+def build_synthetic_rules(count, rnd):
+    """Rule rows shaped like real state/central schemes."""
+    rules_by_scheme = {}
+    for _ in range(count):
+        rules = []
+        if rnd.random() < 0.85:  # most schemes are state specific
+            rules.append(_rule('state', 'IN', ','.join(rnd.sample(STATES, rnd.choice([1, 1, 2])))))
+        if rnd.random() < 0.3:
+            rules.append(_rule('social_category', 'IN', ','.join(rnd.sample(SOCIAL_CATEGORIES, 2))))
+        if rnd.random() < 0.2:
+            rules.append(_rule('land_type', '==', rnd.choice(LAND_TYPES)))
+        if rnd.random() < 0.6:
+            rules.append(_rule('land_size', '<=', rnd.choice(['2', '5', '10'])))
+        if rnd.random() < 0.4:
+            rules.append(_rule('annual_income', '<=', rnd.choice(['150000', '200000', '300000'])))
+        if rnd.random() < 0.2:
+            rules.append(_rule('age', '>=', rnd.choice(['18', '40', '60'])))
+        if rnd.random() < 0.2:
+            rules.append(_rule('is_bpl', '==', 'true'))
+        rules_by_scheme[uuid.uuid4()] = rules
+    return rules_by_scheme
+
+
+def build_synthetic_farmers(count, rnd):
+    return [
+        Farmer(
+            state=rnd.choice(STATES),
+            social_category=rnd.choice(SOCIAL_CATEGORIES),
+            land_type=rnd.choice(LAND_TYPES),
+            land_size=Decimal(rnd.choice(['0.5', '1', '2', '3.5', '6', '12'])),
+            annual_income=Decimal(rnd.randrange(20000, 400000, 5000)),
+            age=rnd.randint(18, 80),
+            is_bpl=rnd.random() < 0.3,
+        )
+        for _ in range(count)
+    ]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark indexed scheme eligibility against the linear and compiled rule scans'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1000,10000,50000',
+                            help='Comma-separated catalogue sizes (number of schemes)')
+        parser.add_argument('--farmers', type=int, default=100,
+                            help='Farmers evaluated per catalogue size')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rnd = random.Random(options['seed'])
+        farmers = build_synthetic_farmers(options['farmers'], rnd)
+
+        self.stdout.write(
+            f"{'schemes':>8} {'predicates':>10} {'linear ms':>10} {'scan ms':>9} "
+            f"{'indexed ms':>11} {'speedup':>8}"
+        )
+        for size in [int(s) for s in options['sizes'].split(',') if s.strip()]:
+            rules_by_scheme = build_synthetic_rules(size, rnd)
+            catalogue = RuleCatalogue.build('benchmark', rules_by_scheme)
+            plans = list(catalogue.plans.values())
+
+            start = time.perf_counter()
+            linear_results = [
+                {
+                    scheme_id for scheme_id, rules in rules_by_scheme.items()
+                    if all(_evaluate_rule(farmer, rule) for rule in rules)
+                }
+                for farmer in farmers
+            ]
+            linear_ms = (time.perf_counter() - start) * 1000 / len(farmers)
+
+            start = time.perf_counter()
+            scan_results = [
+                {plan.scheme_id for plan in plans if plan.is_eligible(farmer)}
+                for farmer in farmers
+            ]
+            scan_ms = (time.perf_counter() - start) * 1000 / len(farmers)
+
+            start = time.perf_counter()
+            indexed_results = []
+            for farmer in farmers:
+                bits = catalogue.evaluate(farmer)
+                indexed_results.append({sid for sid in bits.scope if bits.is_eligible(sid)})
+            indexed_ms = (time.perf_counter() - start) * 1000 / len(farmers)
+
+            if not (linear_results == scan_results == indexed_results):
+                self.stderr.write(self.style.ERROR(f'Result mismatch at {size} schemes'))
+                return
+
+            self.stdout.write(
+                f"{size:>8} {len(catalogue.network):>10} {linear_ms:>10.2f} {scan_ms:>9.2f} "
+                f"{indexed_ms:>11.2f} {linear_ms / indexed_ms if indexed_ms else 0:>7.1f}x"
+            )
@@ -0,0 +1,110 @@
+"""
+Query-count regression check for the eligibility endpoints.
+
+Runs EligibleSchemesView, AllSchemesView and EligibilityEngine.get_eligible_schemes
+for one farmer, then adds --extra synthetic schemes (each requiring a document)
+and runs them again. The number of queries must not grow with the number of
+schemes. Everything happens inside a transaction that is always rolled back.
+
+Usage:
+    python manage.py check_eligibility_queries
+    python manage.py check_eligibility_queries --farmer <farmer_id> --extra 40
+"""
+
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from farmers.models import Farmer
+from schemes.models import Scheme, SchemeRule
+from schemes.services.eligibility_engine import EligibilityEngine
+from schemes.services.rule_compiler import bump_rules_generation
+from schemes.views import AllSchemesView, EligibleSchemesView
+
+
+class Command(BaseCommand):
+    help = 'Check that eligibility endpoints use a constant number of queries'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--farmer', help='Farmer ID (default: first farmer with a complete profile)')
+        parser.add_argument('--extra', type=int, default=40,
+                            help='Synthetic schemes added for the second measurement')
+
+    def handle(self, *args, **options):
+        farmer = self._get_farmer(options['farmer'])
+
+        with transaction.atomic():
+            before = self._measure(farmer)
+            self._add_schemes(farmer, options['extra'])
+            after = self._measure(farmer)
+            transaction.set_rollback(True)
+
+        failed = False
+        for name in before:
+            grew = after[name] != before[name]
+            failed |= grew
+            self.stdout.write(
+                f"{name:<40} {before[name]:>3} queries -> {after[name]:>3} queries"
+                f" with {options['extra']} more schemes{'  <-- grew' if grew else ''}"
+            )
+        if failed:
+            raise CommandError('Query count depends on the number of schemes')
+        self.stdout.write(self.style.SUCCESS('Query counts are constant'))
+
+    def _get_farmer(self, farmer_id):
+        if farmer_id:
+            farmer = Farmer.objects.filter(pk=farmer_id).first()
+        else:
+            farmer = next((f for f in Farmer.objects.all().iterator() if f.is_profile_complete), None)
+        if farmer is None:
+            raise CommandError('No farmer with a complete profile found')
+        return farmer
+
+    def _measure(self, farmer):
+        factory = APIRequestFactory()
+        calls = {
+            'GET /api/schemes/eligible/': lambda: self._call(factory, EligibleSchemesView, '/api/schemes/eligible/', farmer),
+            'GET /api/schemes/': lambda: self._call(factory, AllSchemesView, '/api/schemes/', farmer),
+            'EligibilityEngine.get_eligible_schemes': lambda: EligibilityEngine.get_eligible_schemes(
+                Farmer.objects.get(pk=farmer.pk)
+            ),
+        }
+        counts = {}
+        for name, call in calls.items():
+            call()  # warm up: recompile rules / write stored eligibility
+            with CaptureQueriesContext(connection) as queries:
+                call()
+            counts[name] = len(queries)
+        return counts
+
+    @staticmethod
+    def _call(factory, view_class, path, farmer):
+        request = factory.get(path)
+        force_authenticate(request, user=Farmer.objects.get(pk=farmer.pk))
+        response = view_class.as_view()(request)
+        if response.status_code != 200:
+            raise CommandError(f"{path} returned {response.status_code}: {response.data}")
+        return response
+
+    @staticmethod
+    def _add_schemes(farmer, count):
+        schemes = Scheme.objects.bulk_create([
+            Scheme(
+                name=f'Synthetic scheme {i}',
+                description='Query-count check',
+                benefit_amount=Decimal('1000'),
+                required_documents=['aadhaar', 'land_record'],
+                is_active=True,
+            )
+            for i in range(count)
+        ])
+        rules = []
+        for i, scheme in enumerate(schemes):
+            if i % 2:
+                rules.append(SchemeRule(scheme=scheme, field='state', operator='IN', value=farmer.state or 'x'))
+            rules.append(SchemeRule(scheme=scheme, field='land_size', operator='>=', value='0'))
+        SchemeRule.objects.bulk_create(rules)
+        bump_rules_generation()  # bulk_create sends no signals
@@ -0,0 +1,116 @@
+"""
+Compute eligibility of every farmer against every active scheme in bulk.
+
+Farmers are streamed in chunks (values_list + iterator) so memory stays
+bounded; each chunk is evaluated as a vectorized farmers x schemes matrix.
+
+Usage:
+    python manage.py compute_eligibility_matrix
+    python manage.py compute_eligibility_matrix --state Maharashtra --district Pune \\
+        --output eligible.csv --chunk-size 10000
+    python manage.py compute_eligibility_matrix --verify 500
+"""
+
+import csv
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from farmers.models import Farmer
+from schemes.models import Scheme
+from schemes.services.eligibility_engine import _evaluate_rule
+from schemes.services.rule_compiler import get_rule_catalogue
+
+
+class Command(BaseCommand):
+    help = 'Compute the farmers x schemes eligibility matrix (vectorized)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=5000,
+                            help='Farmers loaded and evaluated per chunk')
+        parser.add_argument('--state', help='Only farmers from this state')
+        parser.add_argument('--district', help='Only farmers from this district')
+        parser.add_argument('--output', help='Write eligible (farmer_id, scheme_id) pairs to this CSV file')
+        parser.add_argument('--verify', type=int, default=0, metavar='N',
+                            help='Cross-check the first N farmers against _evaluate_rule')
+
+    def handle(self, *args, **options):
+        try:
+            from schemes.services.eligibility_matrix import EligibilityMatrix, iter_farmer_chunks
+        except ImportError:
+            raise CommandError('numpy is required. Run: pip install numpy')
+
+        chunk_size = options['chunk_size']
+        if chunk_size <= 0:
+            raise CommandError('--chunk-size must be positive')
+
+        catalogue = get_rule_catalogue()
+        schemes = [s for s in Scheme.objects.filter(is_active=True) if not s.is_expired]
+        matrix = EligibilityMatrix(catalogue, [s.id for s in schemes])
+
+        farmers = Farmer.objects.all().order_by('id')
+        if options['state']:
+            farmers = farmers.filter(state__iexact=options['state'])
+        if options['district']:
+            farmers = farmers.filter(district__iexact=options['district'])
+
+        output_file = open(options['output'], 'w', newline='') if options['output'] else None
+        writer = csv.writer(output_file) if output_file else None
+        if writer:
+            writer.writerow(['farmer_id', 'scheme_id'])
+
+        eligible_counts = [0] * len(schemes)
+        farmer_total = 0
+        to_verify = options['verify']
+        mismatches = 0
+        start = time.perf_counter()
+
+        try:
+            for ids, columns in iter_farmer_chunks(farmers, matrix.fields, chunk_size):
+                result = matrix.evaluate(columns, len(ids))
+                farmer_total += len(ids)
+
+                column_sums = result.sum(axis=0)
+                for col, count in enumerate(column_sums):
+                    eligible_counts[col] += int(count)
+
+                if writer:
+                    for row, col in zip(*result.nonzero()):
+                        writer.writerow([ids[row], schemes[col].id])
+
+                if to_verify > 0:
+                    sample = ids[:to_verify]
+                    mismatches += self._verify(sample, result, schemes, catalogue)
+                    to_verify -= len(sample)
+
+                self.stdout.write(f'  {farmer_total} farmers processed...')
+        finally:
+            if output_file:
+                output_file.close()
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f'Evaluated {farmer_total} farmers x {len(schemes)} schemes in {elapsed:.2f}s'
+        ))
+        for scheme, count in sorted(zip(schemes, eligible_counts), key=lambda item: -item[1]):
+            self.stdout.write(f'  {count:>8}  {scheme.name}')
+
+        if options['verify']:
+            if mismatches:
+                raise CommandError(f'{mismatches} farmer/scheme cells differ from _evaluate_rule')
+            self.stdout.write(self.style.SUCCESS('Verification passed: matrix matches _evaluate_rule'))
+
+    def _verify(self, farmer_ids, result, schemes, catalogue):
+        """Count cells where the matrix disagrees with the reference evaluator."""
+        rules = {scheme.id: list(scheme.schemerule_set.all()) for scheme in
+                 Scheme.objects.filter(id__in=[s.id for s in schemes]).prefetch_related('schemerule_set')}
+        farmers = Farmer.objects.in_bulk(farmer_ids)
+        mismatches = 0
+        for row, farmer_id in enumerate(farmer_ids):
+            farmer = farmers[farmer_id]
+            for col, scheme in enumerate(schemes):
+                expected = all(_evaluate_rule(farmer, rule) for rule in rules[scheme.id])
+                if bool(result[row, col]) != expected:
+                    mismatches += 1
+                    self.stderr.write(f'Mismatch: farmer {farmer_id}, scheme {scheme.name}')
+        return mismatches
@@ -0,0 +1,158 @@
+"""
+Cross-check the SchemeRule -> Q translation against _evaluate_rule.
+
+By default every scheme's rules are checked against the existing farmers
+(read-only). With --synthetic, random farmers covering edge cases (blank
+values, padded / mixed-case text, threshold boundaries) are inserted inside
+a transaction that is always rolled back, and checked against random rules.
+
+Usage:
+    python manage.py crosscheck_scheme_query
+    python manage.py crosscheck_scheme_query --synthetic 2000 --rules 300 --seed 7
+"""
+
+import random
+import uuid
+from decimal import Decimal
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from farmers.models import Farmer
+from schemes.models import Scheme, SchemeRule
+from schemes.services.eligibility_engine import _evaluate_rule
+from schemes.services.rule_compiler import compile_scheme
+from schemes.services.rule_query import scheme_q
+
+
+STATES = ['Maharashtra', ' maharashtra ', 'MAHARASHTRA', 'Punjab', 'Uttar Pradesh', '']
+DISTRICTS = ['Pune', 'pune', ' Nashik', '5', '05', '']
+LAND_SIZES = ['0', '0.01', '1.99', '2', '2.00', '2.01', '4.99', '5', '12.5', '99999999.99']
+INCOMES = ['0', '50000', '199999.99', '200000', '200000.01', '1000000']
+AGES = [-1, 0, 18, 39, 40, 41, 60, 120]
+
+RULE_SHAPES = [
+    ('state', 'IN', ['Maharashtra,Punjab', 'punjab', ' MAHARASHTRA , uttar pradesh', '']),
+    ('state', '==', ['maharashtra', 'Punjab ', '5']),
+    ('district', '==', ['pune', '5', '5.0']),
+    ('district', 'IN', ['pune,nashik', '5']),
+    ('land_size', '<=', ['2', '2.005', '5', '0', '-1', '1e12', 'abc']),
+    ('land_size', '>=', ['2', '2.001', '4.99', '1e12', 'NaN']),
+    ('land_size', '==', ['2', '2.00', '2.001']),
+    ('annual_income', '<=', ['200000', '199999.995']),
+    ('age', '>=', ['18', '40.5', '-5']),
+    ('age', '<=', ['40', '40.5', '1e30']),
+    ('age', '==', ['40', '40.0', '40.5']),
+    ('age', 'IN', ['18,40,60', '040']),
+    ('is_bpl', '==', ['true', 'false', 'yes', '1', '0']),
+    ('has_irrigation', 'IN', ['true', 'true,false', 'no']),
+    ('is_bpl', '>=', ['true']),
+    ('social_category', 'IN', ['sc,st', 'OBC', 'general, obc']),
+    ('gender', '==', ['female', 'Male']),
+    ('land_type', 'IN', ['irrigated', 'rainfed,mixed']),
+    ('crop_type', '>=', ['m']),
+    ('is_profile_complete', '==', ['true']),
+    ('unknown_field', '==', ['x']),
+    ('state', '!=', ['punjab']),
+]
+
+
+class Command(BaseCommand):
+    help = 'Compare SQL-translated scheme rules with the Python rule evaluator'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--synthetic', type=int, default=0, metavar='N',
+                            help='Check N synthetic farmers (rolled back) instead of existing data')
+        parser.add_argument('--rules', type=int, default=200,
+                            help='Random rule sets to check in synthetic mode')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rnd = random.Random(options['seed'])
+
+        if options['synthetic'] > 0:
+            mismatches, checked, pushed = self._check_synthetic(rnd, options['synthetic'], options['rules'])
+        else:
+            mismatches, checked, pushed = self._check_existing()
+
+        self.stdout.write(
+            f"Checked {checked} rule sets ({pushed} fully in SQL), {mismatches} mismatching farmers"
+        )
+        if mismatches:
+            raise CommandError('SQL translation disagrees with _evaluate_rule')
+        self.stdout.write(self.style.SUCCESS('SQL translation matches _evaluate_rule'))
+
+    def _check_existing(self):
+        farmers = list(Farmer.objects.all())
+        rules_by_scheme = {}
+        for rule in SchemeRule.objects.all():
+            rules_by_scheme.setdefault(rule.scheme_id, []).append(rule)
+
+        mismatches = pushed = 0
+        scheme_ids = list(Scheme.objects.values_list('id', flat=True))
+        for scheme_id in scheme_ids:
+            rules = rules_by_scheme.get(scheme_id, [])
+            bad, exact = self._compare(scheme_id, rules, farmers, Farmer.objects.all())
+            mismatches += bad
+            pushed += exact
+        return mismatches, len(scheme_ids), pushed
+
+    def _check_synthetic(self, rnd, size, rule_sets):
+        mismatches = pushed = 0
+        with transaction.atomic():
+            farmers = [self._synthetic_farmer(rnd) for _ in range(size)]
+            Farmer.objects.bulk_create(farmers)
+            queryset = Farmer.objects.filter(id__in=[farmer.id for farmer in farmers])
+            farmers = list(queryset)  # values as the database returns them
+
+            for index in range(rule_sets):
+                rules = []
+                for _ in range(rnd.randint(1, 4)):
+                    field, operator, values = rnd.choice(RULE_SHAPES)
+                    rules.append(SimpleNamespace(
+                        id=f'synthetic-{index}-{len(rules)}', field=field,
+                        operator=operator, value=rnd.choice(values), message=''
+                    ))
+                bad, exact = self._compare(f'synthetic-{index}', rules, farmers, queryset)
+                mismatches += bad
+                pushed += exact
+
+            transaction.set_rollback(True)
+        return mismatches, rule_sets, pushed
+
+    def _compare(self, scheme_id, rules, farmers, queryset):
+        """Return (mismatching farmers, 1 if evaluated fully in SQL else 0)."""
+        plan = compile_scheme(scheme_id, rules)
+        condition, residual = scheme_q(plan)
+
+        by_id = {farmer.id: farmer for farmer in farmers}
+        selected = [by_id[farmer_id] for farmer_id in queryset.filter(condition).values_list('id', flat=True)]
+        got = {farmer.id for farmer in selected if all(rule.evaluate(farmer) for rule in residual)}
+        expected = {farmer.id for farmer in farmers if all(_evaluate_rule(farmer, rule) for rule in rules)}
+
+        bad = got ^ expected
+        if bad:
+            self.stderr.write(
+                f"Scheme {scheme_id}: {len(bad)} mismatches for rules "
+                + '; '.join(f"{rule.field} {rule.operator} {rule.value!r}" for rule in rules)
+            )
+        return len(bad), int(not residual)
+
+    @staticmethod
+    def _synthetic_farmer(rnd):
+        return Farmer(
+            phone=f"x{uuid.uuid4().hex[:14]}",
+            name='Synthetic Farmer',
+            state=rnd.choice(STATES),
+            district=rnd.choice(DISTRICTS),
+            land_size=Decimal(rnd.choice(LAND_SIZES)),
+            crop_type=rnd.choice(['rice', 'Wheat', '']),
+            land_type=rnd.choice(['irrigated', 'rainfed', 'mixed']),
+            has_irrigation=rnd.random() < 0.5,
+            social_category=rnd.choice(['general', 'obc', 'sc', 'st']),
+            gender=rnd.choice(['male', 'female', 'other', '']),
+            age=rnd.choice(AGES),
+            annual_income=Decimal(rnd.choice(INCOMES)),
+            is_bpl=rnd.random() < 0.3,
+        )
@@ -0,0 +1,56 @@
+"""
+Rebuild the materialized farmer_eligibility table.
+
+Day to day the table is kept fresh incrementally (profile saves refresh a
+farmer's rows, rule edits refresh a scheme's column); run this after the
+initial migration or after editing rules directly in Supabase.
+
+Usage:
+    python manage.py refresh_eligibility
+    python manage.py refresh_eligibility --scheme <scheme_id> --chunk-size 5000
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from schemes.models import Scheme
+from schemes.services.rule_compiler import get_rule_catalogue
+
+
+class Command(BaseCommand):
+    help = 'Recompute stored farmer x scheme eligibility rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scheme', action='append', dest='schemes', metavar='SCHEME_ID',
+                            help='Only refresh this scheme (repeatable); default is every active scheme')
+        parser.add_argument('--chunk-size', type=int, default=2000,
+                            help='Farmers evaluated and written per chunk')
+
+    def handle(self, *args, **options):
+        try:
+            from schemes.services.eligibility_store import refresh_scheme
+            import numpy  # noqa: F401  (refresh_scheme evaluates rules vectorized)
+        except ImportError:
+            raise CommandError('numpy is required. Run: pip install numpy')
+
+        if options['chunk_size'] <= 0:
+            raise CommandError('--chunk-size must be positive')
+
+        schemes = Scheme.objects.filter(is_active=True)
+        if options['schemes']:
+            schemes = Scheme.objects.filter(pk__in=options['schemes'])
+        scheme_ids = list(schemes.values_list('id', flat=True))
+        if options['schemes'] and len(scheme_ids) != len(set(options['schemes'])):
+            raise CommandError('Unknown scheme ID in --scheme')
+        catalogue = get_rule_catalogue()
+
+        started = time.perf_counter()
+        total = 0
+        for scheme_id in scheme_ids:
+            total += refresh_scheme(scheme_id, catalogue, options['chunk_size'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Stored {total} eligibility rows for {len(scheme_ids)} schemes "
+            f"in {time.perf_counter() - started:.1f}s"
+        ))
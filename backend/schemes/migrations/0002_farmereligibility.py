@@ -0,0 +1,54 @@
+# Generated by Django 4.2.30 on 2026-10-16 22:55
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('farmers', '0001_initial'),
+        ('schemes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SchemeRule',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('field', models.CharField(help_text='Farmer model field name, e.g. land_size, annual_income, state', max_length=50)),
+                ('operator', models.CharField(help_text='Comparison operator: <=, >=, ==, IN', max_length=10)),
+                ('value', models.CharField(help_text='Threshold value. For IN operator, use comma-separated values', max_length=100)),
+                ('message', models.CharField(blank=True, default='', help_text='Human-readable reason shown when rule fails', max_length=255)),
+            ],
+            options={
+                'verbose_name': 'Scheme Rule',
+                'verbose_name_plural': 'Scheme Rules',
+                'db_table': 'scheme_rules',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='FarmerEligibility',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('eligible', models.BooleanField(default=False)),
+                ('failed_rule_ids', models.JSONField(default=list)),
+                ('rules_version', models.CharField(max_length=40)),
+                ('computed_at', models.DateTimeField()),
+                ('farmer', models.ForeignKey(db_column='farmer_id', db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='scheme_eligibility', to='farmers.farmer')),
+                ('scheme', models.ForeignKey(db_column='scheme_id', db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='farmer_eligibility', to='schemes.scheme')),
+            ],
+            options={
+                'verbose_name': 'Farmer Eligibility',
+                'verbose_name_plural': 'Farmer Eligibility',
+                'db_table': 'farmer_eligibility',
+                'indexes': [models.Index(fields=['farmer', 'eligible'], name='farmer_elig_farmer__895e15_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='farmereligibility',
+            constraint=models.UniqueConstraint(fields=('farmer', 'scheme'), name='unique_farmer_scheme_eligibility'),
+        ),
+    ]
@@ -125,3 +125,46 @@ class SchemeRule(models.Model):
     
     def __str__(self):
         return f"{self.scheme.name}: {self.field} {self.operator} {self.value}"
+
+
+class FarmerEligibility(models.Model):
+    """
+    Materialized eligibility of one farmer for one scheme.
+    Managed by Django via migrations (not a Supabase table).
+
+    rules_version holds the fingerprint of the scheme's compiled rules the
+    row was computed from; a mismatch (or a farmer profile saved after
+    computed_at) marks the row stale and readers fall back to live evaluation.
+    """
+    farmer = models.ForeignKey(
+        'farmers.Farmer',
+        on_delete=models.CASCADE,
+        related_name='scheme_eligibility',
+        db_column='farmer_id',
+        db_constraint=False  # farmers/schemes rows are also deleted directly in Supabase
+    )
+    scheme = models.ForeignKey(
+        Scheme,
+        on_delete=models.CASCADE,
+        related_name='farmer_eligibility',
+        db_column='scheme_id',
+        db_constraint=False
+    )
+    eligible = models.BooleanField(default=False)
+    failed_rule_ids = models.JSONField(default=list)
+    rules_version = models.CharField(max_length=40)
+    computed_at = models.DateTimeField()
+    
+    class Meta:
+        db_table = 'farmer_eligibility'
+        verbose_name = 'Farmer Eligibility'
+        verbose_name_plural = 'Farmer Eligibility'
+        constraints = [
+            models.UniqueConstraint(fields=['farmer', 'scheme'], name='unique_farmer_scheme_eligibility'),
+        ]
+        indexes = [
+            models.Index(fields=['farmer', 'eligible']),
+        ]
+    
+    def __str__(self):
+        return f"{self.farmer_id} / {self.scheme_id}: {'eligible' if self.eligible else 'not eligible'}"
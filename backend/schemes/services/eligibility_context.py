@@ -0,0 +1,132 @@
+"""
+Schemes App - Eligibility Context
+Request-scoped state for checking one farmer against many schemes.
+
+Everything an eligibility check needs beyond the scheme itself — the
+compiled rules, the farmer's predicate bits, the farmer's document types,
+the active schemes and localized strings — is loaded at most once per
+request, so listing N schemes costs the same queries as listing one.
+Schemes come from the worker's scheme catalogue snapshot (see
+scheme_catalogue), so most requests run no scheme query at all.
+"""
+
+import logging
+from typing import Any, Dict, FrozenSet, List, Optional
+
+from .rule_compiler import RuleCatalogue, get_rule_catalogue
+from .scheme_catalogue import SchemeCatalogue, SchemeRecord, get_scheme_catalogue
+
+logger = logging.getLogger(__name__)
+
+
+class EligibilityContext:
+    """
+    Create one per request (per farmer) and pass it to every engine call:
+
+        context = EligibilityContext(farmer)
+        for scheme in get_eligible_schemes_for_farmer(farmer, context):
+            EligibilityEngine.check_eligibility(farmer, scheme, context)
+    """
+
+    def __init__(self, farmer, catalogue: Optional[RuleCatalogue] = None):
+        self.farmer = farmer
+        self.language = getattr(farmer, 'language', 'english')
+        self._catalogue = catalogue
+        self._bits = None
+        self._schemes: Optional[SchemeCatalogue] = None
+        self._document_types: Optional[FrozenSet[str]] = None
+        self._documents_loaded = False
+        self._localized: Dict[Any, Dict[str, str]] = {}
+
+    @property
+    def catalogue(self) -> RuleCatalogue:
+        if self._catalogue is None:
+            self._catalogue = get_rule_catalogue()
+        return self._catalogue
+
+    # ------------------------------------------------------------
+    # Predicate bits
+    # ------------------------------------------------------------
+
+    @property
+    def has_bits(self) -> bool:
+        return self._bits is not None
+
+    @property
+    def bits(self):
+        """Predicate results for every scheme (evaluated on first use)."""
+        if self._bits is None:
+            self._bits = self.catalogue.network.evaluate(self.farmer)
+        return self._bits
+
+    @bits.setter
+    def bits(self, value):
+        self._bits = value
+
+    def bits_for(self, scheme_id):
+        """Bits covering scheme_id; a lone check only evaluates that scheme."""
+        if self._bits is not None:
+            return self._bits
+        return self.catalogue.evaluate(self.farmer, [scheme_id])
+
+    # ------------------------------------------------------------
+    # Schemes
+    # ------------------------------------------------------------
+
+    @property
+    def schemes(self) -> SchemeCatalogue:
+        """The scheme snapshot used for the whole request."""
+        if self._schemes is None:
+            self._schemes = get_scheme_catalogue()
+        return self._schemes
+
+    @property
+    def active_schemes(self) -> List:
+        """Active Scheme instances (shared snapshot objects: read-only)."""
+        return [record.scheme for record in self.schemes.active]
+
+    def record(self, scheme) -> Optional[SchemeRecord]:
+        """Snapshot record of a scheme, or None if it is not in the snapshot."""
+        return self.schemes.get(scheme.id)
+
+    # ------------------------------------------------------------
+    # Documents
+    # ------------------------------------------------------------
+
+    @property
+    def document_types(self) -> Optional[FrozenSet[str]]:
+        """Document types the farmer has uploaded, or None if unavailable."""
+        if not self._documents_loaded:
+            self._documents_loaded = True
+            try:
+                from documents.models import Document
+                self._document_types = frozenset(Document.get_farmer_document_types(self.farmer))
+            except Exception as e:
+                logger.warning("Could not load documents for farmer %s: %s", getattr(self.farmer, 'id', None), e)
+        return self._document_types
+
+    def missing_documents(self, scheme) -> List[str]:
+        """Required documents of the scheme the farmer has not uploaded."""
+        farmer_docs = self.document_types
+        if farmer_docs is None:
+            return []  # documents unavailable: don't block the farmer
+        return [doc for doc in (scheme.required_documents or []) if doc not in farmer_docs]
+
+    # ------------------------------------------------------------
+    # Localized strings
+    # ------------------------------------------------------------
+
+    def localized(self, scheme) -> Dict[str, str]:
+        """Scheme name and description in the farmer's language."""
+        strings = self._localized.get(scheme.id)
+        if strings is None:
+            record = self.record(scheme)
+            source = record if record is not None and record.scheme is scheme else None
+            strings = self._localized[scheme.id] = {
+                'name': source.localized_name(self.language) if source else scheme.get_localized_name(self.language),
+                'description': (
+                    source.localized_description(self.language) if source
+                    else scheme.get_localized_description(self.language)
+                ),
+            }
+        return strings
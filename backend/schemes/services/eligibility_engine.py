@@ -8,6 +8,8 @@ import logging
 from typing import List, Dict, Any
 from decimal import Decimal, InvalidOperation
 
+from .eligibility_context import EligibilityContext
+
 logger = logging.getLogger(__name__)
 
 
@@ -15,22 +17,31 @@ logger = logging.getLogger(__name__)
 # Core Decision Table Function (required by spec)
 # ============================================================
 
-def get_eligible_schemes_for_farmer(farmer):
+def get_eligible_schemes_for_farmer(farmer, context=None):
     """
     Returns a list of Scheme objects for which the farmer
     satisfies ALL associated SchemeRule rows.
 
     Performance:
-      - Single DB query with prefetch_related (no N+1).
-      - Early exit on first failing rule per scheme.
+      - Current rows of the materialized farmer_eligibility table are
+        read in one indexed query (see eligibility_store).
+      - Otherwise rules come pre-compiled from the process-wide
+        RuleCatalogue (recompiled only when the rules version changes),
+        each distinct predicate is evaluated once per farmer, and the
+        result is written back to the table.
+
+    Pass an EligibilityContext to reuse the schemes and eligibility bits
+    in later check_eligibility calls of the same request.
     """
-    from schemes.models import Scheme
+    from .eligibility_store import farmer_bits
+
+    if context is None:
+        context = EligibilityContext(farmer)
 
-    schemes = (
-        Scheme.objects
-        .filter(is_active=True)
-        .prefetch_related('schemerule_set')
-    )
+    schemes = context.active_schemes
+    if not context.has_bits:
+        context.bits = farmer_bits(farmer, context.catalogue, [scheme.id for scheme in schemes])
+    bits = context.bits
 
     eligible = []
 
@@ -39,21 +50,8 @@ def get_eligible_schemes_for_farmer(farmer):
         if scheme.is_expired:
             continue
 
-        rules = scheme.schemerule_set.all()  # already prefetched
-
-        # Schemes with NO rules are available to everyone
-        if not rules:
-            eligible.append(scheme)
-            continue
-
-        # ALL rules must pass (early exit on first failure)
-        is_eligible = True
-        for rule in rules:
-            if not _evaluate_rule(farmer, rule):
-                is_eligible = False
-                break  # early exit
-
-        if is_eligible:
+        # All rules must pass; schemes with no rules are eligible to everyone
+        if bits.is_eligible(scheme.id):
             eligible.append(scheme)
 
     return eligible
@@ -67,6 +65,9 @@ def _evaluate_rule(farmer, rule) -> bool:
     """
     Evaluate a single SchemeRule against a farmer instance.
     Returns True if the farmer passes this rule, False otherwise.
+
+    Reference implementation — the engine itself runs the pre-compiled
+    equivalent from rule_compiler.CompiledRule.evaluate.
     """
     field_name = rule.field
     operator = rule.operator.strip()
@@ -172,37 +173,24 @@ class EligibilityEngine:
     """
 
     @classmethod
-    def check_eligibility(cls, farmer, scheme) -> Dict[str, Any]:
+    def check_eligibility(cls, farmer, scheme, context=None) -> Dict[str, Any]:
         """
         Check if a farmer is eligible for a single scheme
-        using its SchemeRule rows.
-        """
-        rules = scheme.schemerule_set.all()
+        using its compiled SchemeRule rows.
 
-        matched_rules = []
-        failed_rules = []
+        Pass the request's EligibilityContext when checking many schemes
+        so predicates and documents are not re-loaded per scheme.
+        """
+        if context is None:
+            context = EligibilityContext(farmer)
 
-        for rule in rules:
-            passed = _evaluate_rule(farmer, rule)
-            entry = {
-                'rule': f"{rule.field} {rule.operator} {rule.value}",
-                'field': rule.field,
-                'message': rule.message or f"{rule.field} {rule.operator} {rule.value}"
-            }
-            if passed:
-                matched_rules.append(entry)
-            else:
-                failed_rules.append(entry)
+        bits = context.bits_for(scheme.id)
+        matched, failed = bits.split(context.catalogue.plan_for(scheme.id))
+        matched_rules = [cls._rule_entry(rule) for rule in matched]
+        failed_rules = [cls._rule_entry(rule) for rule in failed]
 
         # Document check (keep existing behavior)
-        missing_docs = []
-        try:
-            from documents.models import Document
-            farmer_docs = Document.get_farmer_document_types(farmer)
-            required_docs = scheme.required_documents or []
-            missing_docs = [doc for doc in required_docs if doc not in farmer_docs]
-        except Exception:
-            pass
+        missing_docs = context.missing_documents(scheme)
 
         is_eligible = len(failed_rules) == 0
 
@@ -214,38 +202,62 @@ class EligibilityEngine:
             'has_all_documents': len(missing_docs) == 0
         }
 
+    @staticmethod
+    def _rule_entry(rule) -> Dict[str, str]:
+        return {
+            'rule': rule.label,
+            'field': rule.field,
+            'message': rule.reason
+        }
+
+    @staticmethod
+    def _scheme_fields(scheme, context) -> Dict[str, Any]:
+        """ID, name, benefit and deadline, pre-formatted in the scheme snapshot."""
+        record = context.record(scheme)
+        if record is not None and record.scheme is scheme:
+            return {
+                'scheme_id': record.scheme_id,
+                'name': record.name,
+                'benefit_amount': record.benefit_amount,
+                'deadline': record.deadline,
+            }
+        return {
+            'scheme_id': str(scheme.id),
+            'name': scheme.name,
+            'benefit_amount': float(scheme.benefit_amount),
+            'deadline': str(scheme.deadline) if scheme.deadline else None,
+        }
+
     @classmethod
-    def get_eligible_schemes(cls, farmer, schemes=None) -> List[Dict[str, Any]]:
+    def get_eligible_schemes(cls, farmer, schemes=None, context=None) -> List[Dict[str, Any]]:
         """
         Get all eligible schemes for a farmer (with details).
         """
+        if context is None:
+            context = EligibilityContext(farmer)
+
         if schemes is None:
-            eligible_scheme_objs = get_eligible_schemes_for_farmer(farmer)
+            eligible_scheme_objs = get_eligible_schemes_for_farmer(farmer, context)
         else:
             # filter the given queryset through rule evaluation
-            eligible_scheme_objs = []
-            for scheme in schemes:
-                if scheme.is_expired:
-                    continue
-                rules = scheme.schemerule_set.all()
-                if not rules or all(_evaluate_rule(farmer, r) for r in rules):
-                    eligible_scheme_objs.append(scheme)
+            eligible_scheme_objs = [
+                scheme for scheme in schemes
+                if not scheme.is_expired and context.bits.is_eligible(scheme.id)
+            ]
 
         result = []
         for scheme in eligible_scheme_objs:
-            eligibility = cls.check_eligibility(farmer, scheme)
+            eligibility = cls.check_eligibility(farmer, scheme, context)
+            localized = context.localized(scheme)
+            fields = cls._scheme_fields(scheme, context)
             result.append({
                 'scheme': scheme,
-                'scheme_id': str(scheme.id),
-                'name': scheme.name,
-                'name_localized': scheme.get_localized_name(
-                    getattr(farmer, 'language', 'english')
-                ),
-                'description': scheme.get_localized_description(
-                    getattr(farmer, 'language', 'english')
-                ),
-                'benefit_amount': float(scheme.benefit_amount),
-                'deadline': str(scheme.deadline) if scheme.deadline else None,
+                'scheme_id': fields['scheme_id'],
+                'name': fields['name'],
+                'name_localized': localized['name'],
+                'description': localized['description'],
+                'benefit_amount': fields['benefit_amount'],
+                'deadline': fields['deadline'],
                 'eligibility': eligibility,
                 'can_apply': eligibility['has_all_documents']
             })
@@ -253,33 +265,32 @@ class EligibilityEngine:
         return result
 
     @classmethod
-    def get_all_schemes_with_eligibility(cls, farmer, schemes=None) -> List[Dict[str, Any]]:
+    def get_all_schemes_with_eligibility(cls, farmer, schemes=None, context=None) -> List[Dict[str, Any]]:
         """
         Get all schemes with eligibility status for a farmer.
         """
-        from schemes.models import Scheme
+        if context is None:
+            context = EligibilityContext(farmer)
 
         if schemes is None:
-            schemes = (
-                Scheme.objects
-                .filter(is_active=True)
-                .prefetch_related('schemerule_set')
-            )
+            schemes = context.active_schemes
+
+        # Every scheme is listed with its failed rules, so skip the index
+        if not context.has_bits:
+            context.bits = context.catalogue.network.evaluate(farmer)
 
         all_schemes = []
         for scheme in schemes:
-            result = cls.check_eligibility(farmer, scheme)
+            result = cls.check_eligibility(farmer, scheme, context)
+            localized = context.localized(scheme)
+            fields = cls._scheme_fields(scheme, context)
             all_schemes.append({
-                'scheme_id': str(scheme.id),
-                'name': scheme.name,
-                'name_localized': scheme.get_localized_name(
-                    getattr(farmer, 'language', 'english')
-                ),
-                'description': scheme.get_localized_description(
-                    getattr(farmer, 'language', 'english')
-                ),
-                'benefit_amount': float(scheme.benefit_amount),
-                'deadline': str(scheme.deadline) if scheme.deadline else None,
+                'scheme_id': fields['scheme_id'],
+                'name': fields['name'],
+                'name_localized': localized['name'],
+                'description': localized['description'],
+                'benefit_amount': fields['benefit_amount'],
+                'deadline': fields['deadline'],
                 'is_eligible': result['eligible'],
                 'eligibility_details': result,
                 'is_expired': scheme.is_expired
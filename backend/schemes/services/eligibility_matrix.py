@@ -0,0 +1,199 @@
+"""
+Schemes App - Vectorized Eligibility Matrix
+Evaluates every compiled predicate as a NumPy column comparison over a
+chunk of farmers, producing a farmers x schemes boolean matrix.
+
+Results match eligibility_engine._evaluate_rule exactly: empty values
+skip the rule, numeric comparisons are confirmed with Decimal where the
+float comparison is ambiguous, and anything that cannot be vectorized
+safely (NaN thresholds, non-finite farmer values) is evaluated per row.
+"""
+
+from decimal import InvalidOperation
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
+
+import numpy as np
+
+from .rule_compiler import CompiledRule, RuleCatalogue, _MISSING, _to_decimal
+
+
+class FarmerColumn:
+    """One farmer attribute for a chunk, pre-split by how rules compare it."""
+
+    def __init__(self, values: Sequence[Any]):
+        size = len(values)
+        self.values = values
+        self.empty = np.zeros(size, dtype=bool)
+        self.missing = np.zeros(size, dtype=bool)
+        self.is_bool = np.zeros(size, dtype=bool)
+        self.bool_value = np.zeros(size, dtype=bool)
+        self.numeric_ok = np.zeros(size, dtype=bool)
+        self.exotic = np.zeros(size, dtype=bool)  # NaN / Infinity values
+        self.number = np.zeros(size, dtype=np.float64)
+        self.decimal = np.empty(size, dtype=object)
+        self.text = np.empty(size, dtype=object)
+
+        for i, value in enumerate(values):
+            if value is _MISSING:
+                self.missing[i] = True
+                continue
+            if value is None or value == '':
+                self.empty[i] = True
+                continue
+            self.text[i] = str(value).strip().lower()
+            if isinstance(value, bool):
+                self.is_bool[i] = True
+                self.bool_value[i] = value
+                continue
+            try:
+                decimal_value = _to_decimal(value)
+            except (InvalidOperation, ValueError, TypeError):
+                continue
+            self.numeric_ok[i] = True
+            self.decimal[i] = decimal_value
+            if decimal_value.is_finite():
+                self.number[i] = float(decimal_value)
+            else:
+                self.exotic[i] = True
+
+
+def evaluate_rule_vector(rule: CompiledRule, column: FarmerColumn) -> np.ndarray:
+    """Vectorized CompiledRule.evaluate over one column."""
+    size = len(column.values)
+    if rule.kind == 'skip':
+        return np.ones(size, dtype=bool)
+
+    # Missing attribute / empty value → rule skipped
+    result = column.missing | column.empty
+    present = ~result
+
+    if rule.kind == 'in':
+        result[present] = [text in rule.values for text in column.text[present]]
+        return result
+
+    op = rule.operator.strip()
+    slow = np.zeros(size, dtype=bool)
+
+    numeric = np.zeros(size, dtype=bool)
+    if rule.number is not None:
+        numeric = present & column.numeric_ok
+        if rule.number.is_nan():
+            slow |= numeric
+            numeric[:] = False
+        else:
+            slow |= numeric & column.exotic
+            numeric &= ~column.exotic
+
+    if numeric.any():
+        threshold = float(rule.number)
+        values = column.number[numeric]
+        if op == '<=':
+            passed = values <= threshold
+        elif op == '>=':
+            passed = values >= threshold
+        else:
+            passed = values == threshold
+        # Distinct Decimals can round to the same float; settle ties exactly
+        ties = values == threshold
+        if ties.any():
+            exact = column.decimal[numeric][ties]
+            passed[ties] = [rule.evaluate_value(value) for value in exact]
+        result[numeric] = passed
+
+    rest = present & ~numeric & ~slow
+    booleans = rest & column.is_bool
+    if booleans.any():
+        result[booleans] = (op == '==') & (column.bool_value[booleans] == rule.flag)
+
+    strings = rest & ~column.is_bool
+    if strings.any():
+        texts = column.text[strings]
+        if op == '==':
+            result[strings] = texts == rule.text
+        elif op == '<=':
+            result[strings] = texts <= rule.text
+        else:
+            result[strings] = texts >= rule.text
+
+    if slow.any():
+        result[slow] = [rule.evaluate_value(column.values[i]) for i in np.flatnonzero(slow)]
+
+    return result
+
+
+class EligibilityMatrix:
+    """
+    Farmers x schemes eligibility for a compiled catalogue.
+
+    Each distinct predicate of the catalogue's PredicateNetwork is evaluated
+    once per chunk; a scheme column is the AND of its predicate rows.
+    """
+
+    def __init__(self, catalogue: RuleCatalogue, scheme_ids: Sequence[Any]):
+        self.catalogue = catalogue
+        self.scheme_ids = list(scheme_ids)
+        network = catalogue.network
+        self.fields = sorted({
+            network.predicates[slot].field
+            for scheme_id in self.scheme_ids
+            for slot in network.slots.get(scheme_id, ())
+            if network.predicates[slot].kind != 'skip'
+        })
+
+    def evaluate(self, columns: Dict[str, Sequence[Any]], size: int) -> np.ndarray:
+        """
+        Args:
+            columns: farmer field name -> values for the chunk (one per farmer)
+            size: number of farmers in the chunk
+
+        Returns:
+            bool array of shape (size, len(scheme_ids))
+        """
+        network = self.catalogue.network
+        prepared = {name: FarmerColumn(values) for name, values in columns.items()}
+
+        predicate_rows: Dict[int, np.ndarray] = {}
+        matrix = np.ones((size, len(self.scheme_ids)), dtype=bool)
+        for col, scheme_id in enumerate(self.scheme_ids):
+            for slot in network.slots.get(scheme_id, ()):
+                row = predicate_rows.get(slot)
+                if row is None:
+                    rule = network.predicates[slot]
+                    if rule.kind == 'skip':
+                        row = np.ones(size, dtype=bool)
+                    else:
+                        row = evaluate_rule_vector(rule, prepared[rule.field])
+                    predicate_rows[slot] = row
+                matrix[:, col] &= row
+        return matrix
+
+
+def iter_farmer_chunks(queryset, fields: Sequence[str], chunk_size: int) -> Iterator[Tuple[List[Any], Dict[str, List[Any]]]]:
+    """
+    Stream farmers in chunks of (ids, {field: values}) with bounded memory.
+
+    Concrete model fields are read with values_list; attributes that are not
+    columns (properties) need model instances, so those chunks load rows.
+    """
+    concrete = {f.attname for f in queryset.model._meta.concrete_fields}
+    plain = all(name in concrete for name in fields)
+
+    if plain:
+        rows = queryset.values_list('id', *fields).iterator(chunk_size=chunk_size)
+    else:
+        rows = (
+            (farmer.id, *(getattr(farmer, name, _MISSING) for name in fields))
+            for farmer in queryset.iterator(chunk_size=chunk_size)
+        )
+
+    ids: List[Any] = []
+    columns: Dict[str, List[Any]] = {name: [] for name in fields}
+    for row in rows:
+        ids.append(row[0])
+        for name, value in zip(fields, row[1:]):
+            columns[name].append(value)
+        if len(ids) >= chunk_size:
+            yield ids, columns
+            ids, columns = [], {name: [] for name in fields}
+    if ids:
+        yield ids, columns
@@ -0,0 +1,249 @@
+"""
+Schemes App - Materialized Eligibility Store
+Persists per-farmer, per-scheme eligibility in the farmer_eligibility table
+so listing a farmer's schemes is one indexed read.
+
+Rows carry the fingerprint of the scheme plan they were computed from.
+A row is stale when that fingerprint no longer matches the compiled plan,
+or when the farmer profile was saved after the row was computed; stale or
+missing rows fall back to live evaluation, which is then written back.
+"""
+
+import logging
+from contextlib import nullcontext
+from typing import Any, Iterable, List, Optional
+
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+
+from .predicate_network import FarmerBits
+from .rule_compiler import RuleCatalogue, get_rule_catalogue
+
+logger = logging.getLogger(__name__)
+
+
+REFRESH_CHUNK_SIZE = 2000
+
+
+# ============================================================
+# Read path
+# ============================================================
+
+def _savepoint():
+    """
+    Isolate store queries inside an open transaction, so a failure (e.g. the
+    table not migrated yet) does not abort the caller's transaction.
+    In autocommit mode there is nothing to protect and no round trip to pay.
+    """
+    if transaction.get_connection().in_atomic_block:
+        return transaction.atomic()
+    return nullcontext()
+
+
+def load_farmer_bits(farmer, catalogue: RuleCatalogue, scheme_ids: Iterable) -> Optional[FarmerBits]:
+    """
+    Eligibility of a farmer for the given schemes from stored rows.
+
+    Returns FarmerBits scoped to the eligible schemes (so they report no
+    failed rules), or None if any scheme's row is missing or stale.
+    """
+    from schemes.models import FarmerEligibility
+
+    rows = {
+        scheme_id: (eligible, rules_version, computed_at)
+        for scheme_id, eligible, rules_version, computed_at in
+        FarmerEligibility.objects.filter(farmer_id=farmer.id).values_list(
+            'scheme_id', 'eligible', 'rules_version', 'computed_at'
+        )
+    }
+
+    profile_updated = getattr(farmer, 'updated_at', None)
+    eligible = set()
+    for scheme_id in scheme_ids:
+        row = rows.get(scheme_id)
+        if row is None or row[1] != catalogue.plan_for(scheme_id).fingerprint:
+            return None
+        if profile_updated is not None and row[2] < profile_updated:
+            return None
+        if row[0]:
+            eligible.add(scheme_id)
+
+    return FarmerBits(catalogue.network, farmer, 0, eligible)
+
+
+def farmer_bits(farmer, catalogue: Optional[RuleCatalogue] = None, scheme_ids: Optional[Iterable] = None) -> FarmerBits:
+    """
+    Eligibility bits for a farmer: stored rows when current, otherwise a
+    live evaluation that is written back for the next read.
+    """
+    from schemes.models import Scheme
+
+    if catalogue is None:
+        catalogue = get_rule_catalogue()
+    if scheme_ids is None:
+        scheme_ids = Scheme.objects.filter(is_active=True).values_list('id', flat=True)
+    scheme_ids = list(scheme_ids)
+
+    try:
+        with _savepoint():
+            bits = load_farmer_bits(farmer, catalogue, scheme_ids)
+        if bits is not None:
+            return bits
+    except DatabaseError as e:
+        logger.warning("Eligibility store read failed, evaluating live: %s", e)
+        return catalogue.evaluate(farmer)
+
+    return refresh_farmer(farmer, catalogue, scheme_ids)
+
+
+# ============================================================
+# Refresh
+# ============================================================
+
+def refresh_farmer(farmer, catalogue: Optional[RuleCatalogue] = None, scheme_ids: Optional[Iterable] = None) -> FarmerBits:
+    """
+    Recompute one farmer's row set (one row per active scheme).
+    Returns the live bits so callers can use them directly.
+    """
+    from schemes.models import FarmerEligibility, Scheme
+
+    if catalogue is None:
+        catalogue = get_rule_catalogue()
+    if scheme_ids is None:
+        scheme_ids = Scheme.objects.filter(is_active=True).values_list('id', flat=True)
+
+    # Every row stores its failed rules, so evaluate the full network
+    bits = catalogue.network.evaluate(farmer)
+
+    now = timezone.now()
+    rows = []
+    for scheme_id in scheme_ids:
+        plan = catalogue.plan_for(scheme_id)
+        _, failed = bits.split(plan)
+        rows.append(FarmerEligibility(
+            farmer_id=farmer.id,
+            scheme_id=scheme_id,
+            eligible=not failed,
+            failed_rule_ids=[rule.rule_id for rule in failed],
+            rules_version=plan.fingerprint,
+            computed_at=now
+        ))
+
+    try:
+        with transaction.atomic():
+            FarmerEligibility.objects.filter(farmer_id=farmer.id).delete()
+            FarmerEligibility.objects.bulk_create(rows)
+    except DatabaseError as e:
+        logger.warning("Could not store eligibility for farmer %s: %s", farmer.id, e)
+
+    return bits
+
+
+def refresh_scheme(scheme_id, catalogue: Optional[RuleCatalogue] = None, chunk_size: int = REFRESH_CHUNK_SIZE) -> int:
+    """
+    Recompute one scheme's column for every farmer, chunk by chunk,
+    with each rule evaluated as a vector over the chunk.
+    Returns the number of rows written.
+    """
+    from farmers.models import Farmer
+    from schemes.models import FarmerEligibility, Scheme
+    from .eligibility_matrix import iter_farmer_chunks
+
+    if not Scheme.objects.filter(pk=scheme_id).exists():
+        # Scheme deleted (its rules cascade here too): drop leftover rows
+        FarmerEligibility.objects.filter(scheme_id=scheme_id).delete()
+        return 0
+
+    if catalogue is None:
+        catalogue = get_rule_catalogue()
+    plan = catalogue.plan_for(scheme_id)
+    rules = [rule for rule in plan.rules if rule.kind != 'skip']
+    fields = sorted({rule.field for rule in rules})
+
+    written = 0
+    for farmer_ids, columns in iter_farmer_chunks(Farmer.objects.order_by(), fields, chunk_size):
+        failed_rules = failed_rule_ids(rules, columns, len(farmer_ids))
+        written += store_scheme_rows(scheme_id, plan.fingerprint, farmer_ids, failed_rules)
+
+    logger.info("Refreshed eligibility of scheme %s for %d farmers", scheme_id, written)
+    return written
+
+
+def store_scheme_rows(scheme_id, rules_version: str, farmer_ids: List[Any], failed_rules: List[List[str]]) -> int:
+    """Replace the rows of a scheme for the given farmers; returns rows written."""
+    from schemes.models import FarmerEligibility
+
+    now = timezone.now()
+    rows = [
+        FarmerEligibility(
+            farmer_id=farmer_id,
+            scheme_id=scheme_id,
+            eligible=not failed,
+            failed_rule_ids=failed,
+            rules_version=rules_version,
+            computed_at=now
+        )
+        for farmer_id, failed in zip(farmer_ids, failed_rules)
+    ]
+    with transaction.atomic():
+        FarmerEligibility.objects.filter(scheme_id=scheme_id, farmer_id__in=farmer_ids).delete()
+        FarmerEligibility.objects.bulk_create(rows)
+    return len(rows)
+
+
+def failed_rule_ids(rules, columns, size: int) -> List[List[str]]:
+    """
+    IDs of the rules each farmer of a chunk fails, one rule vector at a time.
+    columns maps farmer field name -> values (see iter_farmer_chunks).
+    """
+    import numpy as np
+    from .eligibility_matrix import FarmerColumn, evaluate_rule_vector
+
+    prepared = {name: FarmerColumn(values) for name, values in columns.items()}
+    failed: List[List[str]] = [[] for _ in range(size)]
+    for rule in rules:
+        if rule.kind == 'skip':
+            continue
+        passed = evaluate_rule_vector(rule, prepared[rule.field])
+        for i in np.flatnonzero(~passed):
+            failed[i].append(rule.rule_id)
+    return failed
+
+
+# ============================================================
+# Deferred refresh (after the surrounding transaction commits)
+# ============================================================
+
+def schedule_after_commit(key, callback):
+    """
+    Run callback after the current transaction commits, once per key.
+    Pending callbacks live on the connection, so a rollback drops them too.
+
+    Returns the scheduled runner; its .callback is the one registered
+    first for the key (callers may add work to it before commit).
+    """
+    connection = transaction.get_connection()
+    for entry in connection.run_on_commit:
+        if getattr(entry[1], 'eligibility_key', None) == key:
+            return entry[1]
+
+    def run():
+        try:
+            callback()
+        except Exception as e:
+            logger.error("Eligibility refresh %s failed: %s", key, e, exc_info=True)
+
+    run.eligibility_key = key
+    run.callback = callback
+    transaction.on_commit(run)
+    return run
+
+
+def schedule_farmer_refresh(farmer):
+    """Recompute a farmer's rows once the profile save has committed."""
+    schedule_after_commit(('farmer', farmer.id), lambda: refresh_farmer(farmer))
+
+
+def schedule_scheme_refresh(scheme_id: Any):
+    """Recompute a scheme's column once the scheme change has committed."""
+    schedule_after_commit(('scheme', scheme_id), lambda: refresh_scheme(scheme_id))
@@ -0,0 +1,111 @@
+"""
+Schemes App - Shared Predicate Network
+Rete-style evaluation: every distinct (field, operator, value) predicate
+across the catalogue is evaluated once per farmer into a bitset, and each
+scheme's eligibility is an AND over its predicate bits.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from .rule_compiler import CompiledRule, SchemePlan
+
+
+class PredicateNetwork:
+    """
+    Distinct predicates of a compiled catalogue plus one bitmask per scheme.
+
+    Rules that behave identically (same field, operator and rule value)
+    share a single predicate slot no matter how many schemes repeat them.
+    """
+
+    def __init__(self, plans: Dict[Any, SchemePlan]):
+        self.predicates: List[CompiledRule] = []
+        self.masks: Dict[Any, int] = {}
+        self.slots: Dict[Any, Tuple[int, ...]] = {}
+
+        self.rule_count = 0
+
+        index: Dict[tuple, int] = {}
+        for scheme_id, plan in plans.items():
+            mask = 0
+            slots = []
+            for rule in plan.rules:
+                key = rule.predicate_key
+                slot = index.get(key)
+                if slot is None:
+                    slot = index[key] = len(self.predicates)
+                    self.predicates.append(rule)
+                slots.append(slot)
+                mask |= 1 << slot
+            self.masks[scheme_id] = mask
+            self.slots[scheme_id] = tuple(slots)
+            self.rule_count += len(slots)
+
+    def __len__(self):
+        return len(self.predicates)
+
+    def evaluate(self, farmer, scheme_ids: Optional[Iterable] = None) -> 'FarmerBits':
+        """
+        Evaluate predicates for one farmer.
+
+        With scheme_ids, schemes outside that scope read as ineligible and
+        only the predicates the scope references are evaluated — unless the
+        scope holds more rule rows than there are distinct predicates, in
+        which case evaluating every predicate is cheaper.
+        """
+        scope = None
+        slots = range(len(self.predicates))
+        if scheme_ids is not None:
+            scope = set(scheme_ids)
+            average_rules = self.rule_count / len(self.masks) if self.masks else 0
+            if len(scope) * average_rules < len(self.predicates):
+                slots = sorted({
+                    slot
+                    for scheme_id in scope
+                    for slot in self.slots.get(scheme_id, ())
+                })
+
+        failed = bytearray((len(self.predicates) + 7) // 8)
+        predicates = self.predicates
+        for slot in slots:
+            if not predicates[slot].evaluate(farmer):
+                failed[slot >> 3] |= 1 << (slot & 7)
+
+        return FarmerBits(self, farmer, int.from_bytes(failed, 'little'), scope)
+
+
+class FarmerBits:
+    """
+    Predicate results for one farmer (a set bit means the predicate failed).
+    scope is the set of scheme IDs whose predicates were evaluated, or None
+    when every predicate was.
+    """
+
+    def __init__(self, network: PredicateNetwork, farmer, failed: int, scope: Optional[Set] = None):
+        self.network = network
+        self.farmer = farmer
+        self.failed = failed
+        self.scope = scope
+
+    def is_eligible(self, scheme_id) -> bool:
+        mask = self.network.masks.get(scheme_id, 0)
+        if not mask:
+            return True  # no rules
+        if self.scope is not None and scheme_id not in self.scope:
+            return False
+        return not (mask & self.failed)
+
+    def split(self, plan: SchemePlan) -> Tuple[List[CompiledRule], List[CompiledRule]]:
+        """Return (matched, failed) rules of a plan in rule order."""
+        matched, failed = [], []
+        if self.scope is not None and plan.scheme_id not in self.scope:
+            for rule in plan.rules:
+                (matched if rule.evaluate(self.farmer) else failed).append(rule)
+            return matched, failed
+
+        for rule, slot in zip(plan.rules, self.network.slots.get(plan.scheme_id, ())):
+            if (self.failed >> slot) & 1:
+                failed.append(rule)
+            else:
+                matched.append(rule)
+        return matched, failed
@@ -0,0 +1,349 @@
+"""
+Schemes App - Decision Table Rule Compiler
+Turns SchemeRule rows into typed predicate plans once per rules version,
+so the eligibility hot path is plain attribute comparison.
+
+Semantics are identical to eligibility_engine._evaluate_rule:
+  - unknown farmer fields and unsupported operators are skipped (pass)
+  - empty farmer values (None / '') are skipped (pass)
+  - IN is case-insensitive membership in a comma-separated list
+  - <=, >=, == compare numerically when both sides parse as Decimal,
+    then fall back to boolean and finally case-insensitive string compare
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from functools import cached_property
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, FrozenSet, Iterable, Optional, Tuple
+
+from django.db.models import Count, Max
+
+logger = logging.getLogger(__name__)
+
+
+SUPPORTED_OPERATORS = ('<=', '>=', '==', 'IN')
+TRUE_VALUES = ('true', '1', 'yes')
+
+# Sentinel for "farmer has no such attribute"
+_MISSING = object()
+
+
+# ============================================================
+# Compiled rule / plan
+# ============================================================
+
+@dataclass(frozen=True)
+class CompiledRule:
+    """
+    One SchemeRule row with its value pre-parsed for the operator.
+
+    kind is one of:
+      'in'     — values holds the lower-cased allowed set
+      'compare'— number / flag / text hold the pre-parsed rule value
+      'skip'   — unknown field or unsupported operator, always passes
+    """
+    rule_id: str
+    field: str
+    operator: str
+    value: str
+    message: str
+    kind: str
+    values: FrozenSet[str] = frozenset()
+    number: Optional[Decimal] = None
+    flag: bool = False
+    text: str = ''
+
+    @property
+    def label(self) -> str:
+        return f"{self.field} {self.operator} {self.value}"
+
+    @property
+    def reason(self) -> str:
+        return self.message or self.label
+
+    @property
+    def predicate_key(self) -> tuple:
+        """Rules with equal keys evaluate identically for every farmer."""
+        if self.kind == 'skip':
+            return ('skip',)
+        if self.kind == 'in':
+            return (self.field, 'IN', self.values)
+        return (self.field, self.operator.strip(), self.text)
+
+    def evaluate(self, farmer) -> bool:
+        """Return True if the farmer passes this rule."""
+        if self.kind == 'skip':
+            return True
+        return self.evaluate_value(getattr(farmer, self.field, _MISSING))
+
+    def evaluate_value(self, farmer_value) -> bool:
+        """Return True if a raw farmer attribute value passes this rule."""
+        if self.kind == 'skip':
+            return True
+
+        if farmer_value is _MISSING or farmer_value is None or farmer_value == '':
+            return True
+
+        try:
+            return self.test(farmer_value)
+        except Exception as e:
+            logger.error(
+                "Error evaluating rule (field=%s, op=%s, val=%s, farmer_val=%s): %s",
+                self.field, self.operator, self.value, farmer_value, e
+            )
+            return True
+
+    def test(self, farmer_value) -> bool:
+        """Compare a non-empty farmer value against the pre-parsed rule value."""
+        if self.kind == 'in':
+            return str(farmer_value).strip().lower() in self.values
+
+        op = self.operator.strip()
+
+        if self.number is not None and not isinstance(farmer_value, bool):
+            try:
+                numeric_farmer = _to_decimal(farmer_value)
+                if op == '<=':
+                    return numeric_farmer <= self.number
+                if op == '>=':
+                    return numeric_farmer >= self.number
+                return numeric_farmer == self.number
+            except (InvalidOperation, ValueError, TypeError):
+                pass
+
+        if isinstance(farmer_value, bool):
+            return op == '==' and farmer_value == self.flag
+
+        str_farmer = str(farmer_value).strip().lower()
+        if op == '==':
+            return str_farmer == self.text
+        if op == '<=':
+            return str_farmer <= self.text
+        return str_farmer >= self.text
+
+
+@dataclass(frozen=True)
+class SchemePlan:
+    """All compiled rules of one scheme, in evaluation order."""
+    scheme_id: Any
+    rules: Tuple[CompiledRule, ...]
+
+    def is_eligible(self, farmer) -> bool:
+        # ALL rules must pass (early exit on first failure)
+        for rule in self.rules:
+            if not rule.evaluate(farmer):
+                return False
+        return True
+
+    @cached_property
+    def fingerprint(self) -> str:
+        """
+        Stable hash of the rule rows this plan was compiled from, used to tell
+        whether materialized eligibility rows are still current for the scheme.
+        Independent of rule order, since DB row order is not guaranteed.
+        """
+        entries = sorted(
+            f"{rule.rule_id}\x1f{rule.field}\x1f{rule.operator}\x1f{rule.value}"
+            for rule in self.rules
+        )
+        return hashlib.sha1('\x1e'.join(entries).encode('utf-8')).hexdigest()
+
+
+def _to_decimal(value) -> Decimal:
+    """Decimal(str(value)) without the string round trip for Decimal/int."""
+    if isinstance(value, Decimal):
+        return value
+    if isinstance(value, int):
+        return Decimal(value)
+    return Decimal(str(value))
+
+
+# ============================================================
+# Compiler
+# ============================================================
+
+def _farmer_attributes() -> FrozenSet[str]:
+    from farmers.models import Farmer
+    return frozenset(dir(Farmer))
+
+
+def compile_rule(rule, known_fields: Optional[FrozenSet[str]] = None) -> CompiledRule:
+    """
+    Compile a single SchemeRule (or any object with field/operator/value/message).
+    Unknown fields and unsupported operators are flagged here, once.
+    """
+    field_name = rule.field
+    operator = (rule.operator or '').strip()
+    rule_value = (rule.value or '').strip()
+    common = {
+        'rule_id': str(getattr(rule, 'id', '') or ''),
+        'field': field_name,
+        'operator': rule.operator,
+        'value': rule.value,
+        'message': rule.message or '',
+    }
+
+    if known_fields is None:
+        known_fields = _farmer_attributes()
+
+    if field_name not in known_fields:
+        logger.warning(
+            "SchemeRule references unknown farmer field '%s' — skipping rule",
+            field_name
+        )
+        return CompiledRule(kind='skip', **common)
+
+    if operator == 'IN':
+        allowed = frozenset(v.strip().lower() for v in rule_value.split(','))
+        return CompiledRule(kind='in', values=allowed, **common)
+
+    if operator in ('<=', '>=', '=='):
+        try:
+            number = Decimal(rule_value)
+        except (InvalidOperation, ValueError, TypeError):
+            number = None
+        return CompiledRule(
+            kind='compare',
+            number=number,
+            flag=rule_value.lower() in TRUE_VALUES,
+            text=rule_value.lower(),
+            **common
+        )
+
+    logger.warning(
+        "Unsupported operator '%s' in SchemeRule — skipping rule",
+        operator
+    )
+    return CompiledRule(kind='skip', **common)
+
+
+def compile_scheme(scheme_id, rules: Iterable, known_fields: Optional[FrozenSet[str]] = None) -> SchemePlan:
+    """Compile all rule rows of one scheme into a SchemePlan."""
+    if known_fields is None:
+        known_fields = _farmer_attributes()
+    return SchemePlan(
+        scheme_id=scheme_id,
+        rules=tuple(compile_rule(rule, known_fields) for rule in rules)
+    )
+
+
+class RuleCatalogue:
+    """
+    Immutable set of compiled plans for every scheme, built for one rules version.
+    Schemes without rules map to an empty plan (eligible for everyone).
+    """
+
+    def __init__(self, version: str, plans: Dict[Any, SchemePlan]):
+        from .predicate_network import PredicateNetwork
+        from .scheme_index import CategoricalIndex, NumericIndex
+
+        self.version = version
+        self.plans = plans
+        self.network = PredicateNetwork(plans)
+        self.categorical_index = CategoricalIndex(plans)
+        self.numeric_index = NumericIndex(plans)
+
+    def plan_for(self, scheme_id) -> SchemePlan:
+        return self.plans.get(scheme_id) or SchemePlan(scheme_id=scheme_id, rules=())
+
+    def candidates(self, farmer):
+        """IDs of schemes with rules that the farmer's indexed attributes allow."""
+        candidates = self.categorical_index.candidates(farmer)
+        failing = self.numeric_index.failing(farmer)
+        return candidates - failing if failing else candidates
+
+    def evaluate(self, farmer, scheme_ids=None):
+        """
+        Evaluate the shared predicates once for a farmer (see PredicateNetwork).
+        Without scheme_ids only the index candidates are evaluated; every other
+        scheme with rules is already known to be ineligible.
+        """
+        if scheme_ids is None:
+            scheme_ids = self.candidates(farmer)
+        return self.network.evaluate(farmer, scheme_ids)
+
+    @classmethod
+    def build(cls, version: str, rules_by_scheme: Dict[Any, Iterable]) -> 'RuleCatalogue':
+        known_fields = _farmer_attributes()
+        plans = {
+            scheme_id: compile_scheme(scheme_id, rules, known_fields)
+            for scheme_id, rules in rules_by_scheme.items()
+        }
+        return cls(version, plans)
+
+
+# ============================================================
+# Process-wide cache keyed by rules version
+# ============================================================
+
+_catalogue: Optional[RuleCatalogue] = None
+_catalogue_lock = threading.Lock()
+
+# Bumped by schemes.signals whenever Scheme/SchemeRule rows change in this process
+_local_generation = 0
+
+# Last DB probe: (monotonic time, local generation, version)
+_version_probe: Optional[Tuple[float, int, str]] = None
+
+
+def bump_rules_generation():
+    """Invalidate the compiled catalogue of this process."""
+    global _local_generation
+    _local_generation += 1
+
+
+def get_rules_version() -> str:
+    """
+    Cheap version stamp for the rule tables.
+
+    SchemeRule saves touch their scheme's updated_at (see schemes.signals),
+    so max(updated_at) plus row counts changes whenever any worker edits rules.
+    The DB is probed at most every SCHEME_CATALOGUE_POLL_SECONDS; edits made
+    in this process bump the local generation and force a new probe.
+    """
+    global _version_probe
+    from django.conf import settings
+    from schemes.models import Scheme, SchemeRule
+
+    generation = _local_generation
+    poll_seconds = getattr(settings, 'SCHEME_CATALOGUE_POLL_SECONDS', 5)
+    probe = _version_probe
+    now = time.monotonic()
+    if probe is not None and probe[1] == generation and now - probe[0] < poll_seconds:
+        return probe[2]
+
+    stamp = Scheme.objects.aggregate(latest=Max('updated_at'), total=Count('id'))
+    latest = stamp['latest'].isoformat() if stamp['latest'] else '-'
+    version = f"{generation}:{latest}:{stamp['total']}:{SchemeRule.objects.count()}"
+    _version_probe = (now, generation, version)
+    return version
+
+
+def get_rule_catalogue() -> RuleCatalogue:
+    """Return the compiled catalogue, recompiling only when the rules version moved."""
+    global _catalogue
+    from schemes.models import SchemeRule
+
+    version = get_rules_version()
+    catalogue = _catalogue
+    if catalogue is not None and catalogue.version == version:
+        return catalogue
+
+    with _catalogue_lock:
+        if _catalogue is not None and _catalogue.version == version:
+            return _catalogue
+
+        rules_by_scheme: Dict[Any, list] = {}
+        for rule in SchemeRule.objects.all():
+            rules_by_scheme.setdefault(rule.scheme_id, []).append(rule)
+
+        _catalogue = RuleCatalogue.build(version, rules_by_scheme)
+        logger.info(
+            "Compiled eligibility rules for %d schemes into %d shared predicates (version %s)",
+            len(_catalogue.plans), len(_catalogue.network), version
+        )
+        return _catalogue
@@ -0,0 +1,204 @@
+"""
+Schemes App - Rule Diff Engine
+When a scheme's SchemeRule rows change, works out which farmers can be
+affected and re-evaluates only those instead of the whole farmers table.
+
+Changed rules are matched by rule ID between the old and new rule sets:
+  edited  — farmers whose outcome differs between old and new (XOR)
+  removed — farmers failing the old rule (their failed rules change)
+  added   — farmers failing the new rule
+The union is pushed down as one ORM filter (see rule_query), so loosening
+land_size <= 2 to land_size <= 5 re-evaluates only 2 < land_size <= 5.
+Stored rows of every other farmer are carried over to the new rules version.
+"""
+
+import logging
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from typing import Any, Dict, Iterable, List, Optional
+
+from django.db.models import Q
+
+from .eligibility_store import (
+    REFRESH_CHUNK_SIZE, failed_rule_ids, schedule_after_commit, store_scheme_rows
+)
+from .rule_compiler import SchemePlan, compile_scheme, get_rule_catalogue
+from .rule_query import NEVER, rule_q
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RuleDelta:
+    """Outcome of re-evaluating a scheme after its rules changed."""
+    scheme_id: Any
+    evaluated: int = 0
+    newly_eligible: List[Any] = field(default_factory=list)
+    newly_ineligible: List[Any] = field(default_factory=list)
+    full_scan: bool = False
+
+
+def snapshot_rule(rule) -> SimpleNamespace:
+    """Detached copy of a SchemeRule row (instances are mutated by later saves)."""
+    return SimpleNamespace(
+        id=rule.id,
+        scheme_id=rule.scheme_id,
+        field=rule.field,
+        operator=rule.operator,
+        value=rule.value,
+        message=rule.message
+    )
+
+
+# ============================================================
+# Affected farmer slice
+# ============================================================
+
+def affected_farmers_q(old_plan: SchemePlan, new_plan: SchemePlan, rule_ids: Iterable[str]) -> Optional[Q]:
+    """
+    Q over farmers whose eligibility or failed rules may differ between
+    the two plans, or None if a changed rule cannot be translated to SQL.
+    """
+    old_rules = {rule.rule_id: rule for rule in old_plan.rules}
+    new_rules = {rule.rule_id: rule for rule in new_plan.rules}
+
+    affected = NEVER
+    for rule_id in rule_ids:
+        before, after = old_rules.get(rule_id), new_rules.get(rule_id)
+        if before is None and after is None:
+            continue
+        if before is not None and after is not None and before.predicate_key == after.predicate_key:
+            continue  # message / formatting only
+
+        passed_before = rule_q(before) if before is not None else None
+        passed_after = rule_q(after) if after is not None else None
+
+        if before is not None and after is not None:
+            if passed_before is None or passed_after is None:
+                return None
+            affected |= (passed_before & ~passed_after) | (~passed_before & passed_after)
+        elif before is not None:
+            if passed_before is None:
+                return None
+            affected |= ~passed_before
+        else:
+            if passed_after is None:
+                return None
+            affected |= ~passed_after
+    return affected
+
+
+# ============================================================
+# Delta re-evaluation
+# ============================================================
+
+def apply_rule_changes(scheme_id, changes: Dict[str, list], chunk_size: int = REFRESH_CHUNK_SIZE) -> RuleDelta:
+    """
+    Re-evaluate the farmers affected by a set of rule changes of one scheme.
+
+    Args:
+        changes: rule ID -> [old snapshot or None, new snapshot or None]
+
+    Rewrites their farmer_eligibility rows, moves the remaining rows to the
+    new rules version and sends scheme_eligibility_changed with the farmers
+    whose eligibility flipped.
+    """
+    from farmers.models import Farmer
+    from schemes.models import FarmerEligibility, Scheme, SchemeRule
+    from .eligibility_matrix import iter_farmer_chunks
+
+    result = RuleDelta(scheme_id)
+    if not Scheme.objects.filter(pk=scheme_id).exists():
+        # Scheme deleted (its rules cascade here too): drop leftover rows
+        FarmerEligibility.objects.filter(scheme_id=scheme_id).delete()
+        return result
+
+    current = list(SchemeRule.objects.filter(scheme_id=scheme_id))
+    previous = [rule for rule in current if str(rule.id) not in changes]
+    previous += [old for old, _ in changes.values() if old is not None]
+
+    old_plan = compile_scheme(scheme_id, previous)
+    new_plan = get_rule_catalogue().plan_for(scheme_id)
+
+    affected = affected_farmers_q(old_plan, new_plan, changes)
+    if affected is None:
+        result.full_scan = True
+        farmers = Farmer.objects.all()
+    else:
+        farmers = Farmer.objects.filter(affected)
+
+    fields = sorted({
+        rule.field for rule in old_plan.rules + new_plan.rules if rule.kind != 'skip'
+    })
+    for farmer_ids, columns in iter_farmer_chunks(farmers.order_by(), fields, chunk_size):
+        failed_before = failed_rule_ids(old_plan.rules, columns, len(farmer_ids))
+        failed_after = failed_rule_ids(new_plan.rules, columns, len(farmer_ids))
+        for farmer_id, before, after in zip(farmer_ids, failed_before, failed_after):
+            if before and not after:
+                result.newly_eligible.append(farmer_id)
+            elif after and not before:
+                result.newly_ineligible.append(farmer_id)
+
+        store_scheme_rows(scheme_id, new_plan.fingerprint, farmer_ids, failed_after)
+        result.evaluated += len(farmer_ids)
+
+    # Everyone outside the slice keeps their outcome and failed rules
+    if old_plan.fingerprint != new_plan.fingerprint:
+        FarmerEligibility.objects.filter(
+            scheme_id=scheme_id, rules_version=old_plan.fingerprint
+        ).update(rules_version=new_plan.fingerprint)
+
+    logger.info(
+        "Rules of scheme %s changed: re-evaluated %d farmers%s, %d newly eligible, %d newly ineligible",
+        scheme_id, result.evaluated, ' (full scan)' if result.full_scan else '',
+        len(result.newly_eligible), len(result.newly_ineligible)
+    )
+
+    if result.newly_eligible or result.newly_ineligible:
+        from schemes.signals import scheme_eligibility_changed
+        scheme_eligibility_changed.send(
+            sender=Scheme,
+            scheme_id=scheme_id,
+            newly_eligible=result.newly_eligible,
+            newly_ineligible=result.newly_ineligible
+        )
+    return result
+
+
+class PendingRuleChanges:
+    """Rule changes of one scheme, collected until the transaction commits."""
+
+    def __init__(self, scheme_id):
+        self.scheme_id = scheme_id
+        self.changes: Dict[str, list] = {}
+
+    def note(self, old, new):
+        rule_id = str((old or new).id)
+        if rule_id in self.changes:
+            self.changes[rule_id][1] = new  # keep the state from before the transaction
+        else:
+            self.changes[rule_id] = [old, new]
+
+    def __call__(self):
+        return apply_rule_changes(self.scheme_id, self.changes)
+
+
+def record_rule_change(old, new):
+    """
+    Queue a SchemeRule change (snapshots; old is None for inserts, new is
+    None for deletes). Changes to one scheme within a transaction are
+    diffed together once it commits.
+    """
+    if old is not None and new is not None and old.scheme_id != new.scheme_id:
+        # Rule moved to another scheme
+        record_rule_change(old, None)
+        record_rule_change(None, new)
+        return
+
+    scheme_id = (new or old).scheme_id
+    pending = PendingRuleChanges(scheme_id)
+    pending.note(old, new)  # outside a transaction the job runs immediately
+    runner = schedule_after_commit(('scheme', scheme_id), pending)
+    if runner.callback is not pending and isinstance(runner.callback, PendingRuleChanges):
+        runner.callback.note(old, new)
+    # Otherwise a full refresh of the scheme is already queued
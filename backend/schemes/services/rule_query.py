@@ -0,0 +1,252 @@
+"""
+Schemes App - Rule to ORM Translation
+Turns compiled rules into Django Q objects over the farmers table that
+select exactly the farmers passing the rule, so rule checks can be
+pushed down to the database.
+
+The Q keeps the engine's semantics (see rule_compiler):
+  - unknown fields / unsupported operators pass everyone
+  - empty farmer values (NULL / '') pass the rule
+  - IN and == on text columns are trimmed and case-insensitive
+    (SQL TRIM strips spaces, where Python strips all whitespace)
+  - booleans compare against the rule value's truthiness
+Rules whose outcome depends on Python-only behaviour (numeric parsing of
+text columns, string ordering, properties) are not translated; callers
+get None and must evaluate those rules in Python.
+"""
+
+import math
+from decimal import ROUND_CEILING, ROUND_FLOOR, Decimal
+from typing import Iterator, List, Optional, Tuple
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db import connection, models
+from django.db.models import Q
+from django.db.models.functions import Lower, Trim
+from django.db.models.lookups import Exact, In
+
+from .rule_compiler import CompiledRule, SchemePlan, get_rule_catalogue
+
+
+# Q objects that are always true / always false for a farmer row.
+# (An empty Q() is dropped from OR/AND chains, so it cannot stand in for TRUE.)
+ALWAYS = Q(pk__isnull=False)
+NEVER = Q(pk__in=[])
+
+TEXT_FIELDS = (models.CharField, models.TextField)
+
+
+def _farmer_model():
+    from farmers.models import Farmer
+    return Farmer
+
+
+def rule_q(rule: CompiledRule, model=None) -> Optional[Q]:
+    """
+    Q selecting the farmers that pass a compiled rule,
+    or None if the rule cannot be expressed in SQL exactly.
+    """
+    if rule.kind == 'skip':
+        return ALWAYS
+
+    model = model or _farmer_model()
+    try:
+        field = model._meta.get_field(rule.field)
+    except FieldDoesNotExist:
+        return None  # property or other Python-only attribute
+    if not field.concrete or field.is_relation:
+        return None
+
+    if isinstance(field, models.BooleanField):
+        match = _boolean_q(rule, field.attname)
+    elif isinstance(field, models.DecimalField):
+        match = _decimal_q(rule, field)
+    elif isinstance(field, models.IntegerField) and not isinstance(field, models.AutoField):
+        match = _integer_q(rule, field)
+    elif isinstance(field, TEXT_FIELDS):
+        match = _text_q(rule, field.attname)
+    else:
+        match = None
+
+    if match is None:
+        return None
+
+    # Empty farmer values skip the rule
+    empty = []
+    if field.null:
+        empty.append(Q(**{f'{field.attname}__isnull': True}))
+    if isinstance(field, TEXT_FIELDS):
+        empty.append(Q(**{field.attname: ''}))
+    for condition in empty:
+        match = condition | match
+    return match
+
+
+def scheme_q(plan: SchemePlan, model=None) -> Tuple[Q, List[CompiledRule]]:
+    """
+    AND of a scheme's translatable rules, plus the rules left for Python.
+    With no residual rules the Q selects exactly the eligible farmers;
+    otherwise it selects a superset that the residual rules narrow down.
+    """
+    condition = Q()  # no rules: everyone
+    residual = []
+    for rule in plan.rules:
+        passed = rule_q(rule, model)
+        if passed is None:
+            residual.append(rule)
+        else:
+            condition &= passed
+    return condition, residual
+
+
+class EligibleFarmers:
+    """
+    Farmers eligible for one scheme, filtered in the database.
+    Rules that cannot be pushed down are checked in Python chunk by chunk.
+    """
+
+    def __init__(self, scheme_id, catalogue=None, chunk_size: int = 2000):
+        from farmers.models import Farmer
+
+        catalogue = catalogue or get_rule_catalogue()
+        condition, self.residual = scheme_q(catalogue.plan_for(scheme_id))
+        self.queryset = Farmer.objects.filter(condition).order_by('id')
+        self.chunk_size = chunk_size
+
+    @property
+    def exact(self) -> bool:
+        """True when the SQL filter alone decides eligibility."""
+        return not self.residual
+
+    def iter_ids(self, offset: int = 0, limit: Optional[int] = None) -> Iterator:
+        """Eligible farmer IDs in ID order, skipping the first offset."""
+        if self.exact:
+            queryset = self.queryset.values_list('id', flat=True)
+            end = offset + limit if limit is not None else None
+            yield from queryset[offset:end].iterator(chunk_size=self.chunk_size)
+            return
+
+        from .eligibility_store import failed_rule_ids
+        from .eligibility_matrix import iter_farmer_chunks
+
+        fields = sorted({rule.field for rule in self.residual})
+        skipped = produced = 0
+        for farmer_ids, columns in iter_farmer_chunks(self.queryset, fields, self.chunk_size):
+            for farmer_id, failed in zip(farmer_ids, failed_rule_ids(self.residual, columns, len(farmer_ids))):
+                if failed:
+                    continue
+                if skipped < offset:
+                    skipped += 1
+                    continue
+                if limit is not None and produced >= limit:
+                    return
+                produced += 1
+                yield farmer_id
+
+    def count(self) -> int:
+        if self.exact:
+            return self.queryset.count()
+        return sum(1 for _ in self.iter_ids())
+
+
+def _boolean_q(rule: CompiledRule, name: str) -> Q:
+    if rule.kind == 'in':
+        flags = [flag for flag in (True, False) if str(flag).lower() in rule.values]
+        return Q(**{f'{name}__in': flags}) if flags else NEVER
+    # <= / >= are never true for booleans
+    return Q(**{name: rule.flag}) if rule.operator.strip() == '==' else NEVER
+
+
+def _integer_q(rule: CompiledRule, field: models.IntegerField) -> Optional[Q]:
+    name = field.attname
+    # Values outside the column's range would overflow the DB parameter
+    # (backends without enforced ranges still bind 64-bit integers)
+    low, high = connection.ops.integer_field_range(field.get_internal_type())
+    low = -2 ** 63 if low is None else low
+    high = 2 ** 63 - 1 if high is None else high
+
+    if rule.kind == 'in':
+        # Farmer ints are matched by their string form
+        allowed = [
+            int(value) for value in rule.values
+            if _is_canonical_int(value) and low <= int(value) <= high
+        ]
+        return Q(**{f'{name}__in': allowed}) if allowed else NEVER
+
+    if rule.number is None or not rule.number.is_finite():
+        return None  # string / NaN comparison
+
+    op = rule.operator.strip()
+    if op == '<=':
+        bound = math.floor(rule.number)
+        if bound >= high:
+            return ALWAYS
+        if bound < low:
+            return NEVER
+        return Q(**{f'{name}__lte': bound})
+    if op == '>=':
+        bound = math.ceil(rule.number)
+        if bound <= low:
+            return ALWAYS
+        if bound > high:
+            return NEVER
+        return Q(**{f'{name}__gte': bound})
+
+    if rule.number != rule.number.to_integral_value():
+        return NEVER
+    value = int(rule.number)
+    if value < low or value > high:
+        return NEVER
+    return Q(**{name: value})
+
+
+def _decimal_q(rule: CompiledRule, field: models.DecimalField) -> Optional[Q]:
+    if rule.kind == 'in' or rule.number is None or not rule.number.is_finite():
+        return None  # string form of a Decimal / NaN comparison
+
+    # Column values lie strictly within +-limit on a decimal_places grid, so
+    # out-of-range thresholds are constant and the rest snap onto the grid
+    # (the DB adapter would otherwise round them to nearest).
+    name = field.attname
+    number = rule.number
+    step = Decimal(1).scaleb(-field.decimal_places)
+    limit = Decimal(10) ** (field.max_digits - field.decimal_places)
+    op = rule.operator.strip()
+
+    if op == '<=':
+        if number >= limit:
+            return ALWAYS
+        if number < -limit:
+            return NEVER
+        return Q(**{f'{name}__lte': number.quantize(step, rounding=ROUND_FLOOR)})
+    if op == '>=':
+        if number <= -limit:
+            return ALWAYS
+        if number > limit:
+            return NEVER
+        return Q(**{f'{name}__gte': number.quantize(step, rounding=ROUND_CEILING)})
+
+    if abs(number) >= limit or number != number.quantize(step, rounding=ROUND_FLOOR):
+        return NEVER
+    return Q(**{name: number})
+
+
+def _text_q(rule: CompiledRule, name: str) -> Optional[Q]:
+    # output_field is given explicitly: the lookup is built before the
+    # column reference is resolved against the model
+    text = models.TextField()
+    normalized = Lower(Trim(name, output_field=text), output_field=text)
+    if rule.kind == 'in':
+        return Q(In(normalized, sorted(rule.values)))
+    if rule.number is not None:
+        return None  # numeric rule values compare numeric-looking text as Decimal
+    if rule.operator.strip() == '==':
+        return Q(Exact(normalized, rule.text))
+    return None  # <= / >= use Python string ordering, not DB collation
+
+
+def _is_canonical_int(value: str) -> bool:
+    try:
+        return str(int(value)) == value
+    except ValueError:
+        return False
@@ -0,0 +1,168 @@
+"""
+Schemes App - Scheme Catalogue Snapshot
+Process-wide, read-only snapshot of the schemes table.
+
+Scheme rows change rarely but are read on every listing, detail and voice
+request. Each worker keeps one snapshot with the localized strings, the
+formatted benefit amount and the serialized API payloads prepared once,
+and rebuilds it only when the rules version (max(updated_at) / row counts,
+see rule_compiler.get_rules_version) moves. Edits made by this worker are
+seen immediately; edits made by other workers within
+SCHEME_CATALOGUE_POLL_SECONDS.
+
+Only date-dependent values (is_expired, is_available) are computed per read.
+"""
+
+import logging
+import threading
+import uuid
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.utils import timezone
+
+from .rule_compiler import get_rules_version
+
+logger = logging.getLogger(__name__)
+
+LANGUAGES = ('hindi', 'marathi', 'english')
+
+
+# ============================================================
+# Records
+# ============================================================
+
+@dataclass(frozen=True, eq=False)
+class SchemeRecord:
+    """
+    One scheme with everything the read paths format per request.
+
+    `scheme` is the Scheme instance the record was built from. It is shared
+    by every request of this worker: pass it to ORM calls (foreign keys,
+    eligibility checks) but never modify or save it.
+    """
+    scheme: Any
+    id: Any
+    scheme_id: str
+    name: str
+    names: Dict[str, str]
+    descriptions: Dict[str, str]
+    benefit_amount: float
+    benefit_display: str
+    deadline: Optional[str]
+    deadline_date: Optional[date]
+    required_documents: Tuple[str, ...]
+    is_active: bool
+    list_item: Dict[str, Any] = field(repr=False)
+    detail: Dict[str, Any] = field(repr=False)
+
+    @classmethod
+    def build(cls, scheme) -> 'SchemeRecord':
+        from schemes.serializers import SchemeListSerializer, SchemeSerializer
+
+        detail = dict(SchemeSerializer(scheme).data)
+        detail.pop('is_expired', None)
+        detail.pop('is_available', None)
+        benefit_amount = float(scheme.benefit_amount)
+
+        return cls(
+            scheme=scheme,
+            id=scheme.id,
+            scheme_id=str(scheme.id),
+            name=scheme.name,
+            names={lang: scheme.get_localized_name(lang) for lang in LANGUAGES},
+            descriptions={lang: scheme.get_localized_description(lang) for lang in LANGUAGES},
+            benefit_amount=benefit_amount,
+            benefit_display=f"₹{benefit_amount:,.2f}",
+            deadline=str(scheme.deadline) if scheme.deadline else None,
+            deadline_date=scheme.deadline,
+            required_documents=tuple(scheme.required_documents or ()),
+            is_active=scheme.is_active,
+            list_item=dict(SchemeListSerializer(scheme).data),
+            detail=detail,
+        )
+
+    def localized_name(self, language: str = 'english') -> str:
+        name = self.names.get(language)
+        return name if name is not None else self.scheme.get_localized_name(language)
+
+    def localized_description(self, language: str = 'english') -> str:
+        description = self.descriptions.get(language)
+        return description if description is not None else self.scheme.get_localized_description(language)
+
+    @property
+    def is_expired(self) -> bool:
+        """Same as Scheme.is_expired (the date moves, the record does not)."""
+        if self.deadline_date:
+            return self.deadline_date < timezone.now().date()
+        return False
+
+    @property
+    def is_available(self) -> bool:
+        return self.is_active and not self.is_expired
+
+    def serialized(self) -> Dict[str, Any]:
+        """SchemeSerializer payload (a copy; nested values are shared)."""
+        data = dict(self.detail)
+        is_expired = self.is_expired
+        data['is_expired'] = is_expired
+        data['is_available'] = self.is_active and not is_expired
+        return data
+
+    def list_serialized(self) -> Dict[str, Any]:
+        """SchemeListSerializer payload (a copy)."""
+        return dict(self.list_item)
+
+
+# ============================================================
+# Catalogue
+# ============================================================
+
+class SchemeCatalogue:
+    """All schemes of one rules version, in the model's default ordering."""
+
+    def __init__(self, version: str, records: List[SchemeRecord]):
+        self.version = version
+        self.records: Tuple[SchemeRecord, ...] = tuple(records)
+        self.by_id: Dict[str, SchemeRecord] = {record.scheme_id: record for record in self.records}
+        self.active: Tuple[SchemeRecord, ...] = tuple(record for record in self.records if record.is_active)
+
+    def __len__(self):
+        return len(self.records)
+
+    def get(self, scheme_id) -> Optional[SchemeRecord]:
+        """Record for a scheme ID (UUID or string), or None."""
+        try:
+            key = str(scheme_id if isinstance(scheme_id, uuid.UUID) else uuid.UUID(str(scheme_id)))
+        except (TypeError, ValueError, AttributeError):
+            return None
+        return self.by_id.get(key)
+
+
+_scheme_catalogue: Optional[SchemeCatalogue] = None
+_scheme_catalogue_lock = threading.Lock()
+
+
+def get_scheme_catalogue() -> SchemeCatalogue:
+    """Return this worker's scheme snapshot, reloading only when the rules version moved."""
+    global _scheme_catalogue
+    from schemes.models import Scheme
+
+    version = get_rules_version()
+    catalogue = _scheme_catalogue
+    if catalogue is not None and catalogue.version == version:
+        return catalogue
+
+    with _scheme_catalogue_lock:
+        if _scheme_catalogue is not None and _scheme_catalogue.version == version:
+            return _scheme_catalogue
+
+        _scheme_catalogue = SchemeCatalogue(version, [
+            SchemeRecord.build(scheme) for scheme in Scheme.objects.all()
+        ])
+        logger.info(
+            "Loaded scheme catalogue: %d schemes, %d active (version %s)",
+            len(_scheme_catalogue), len(_scheme_catalogue.active), version
+        )
+        return _scheme_catalogue
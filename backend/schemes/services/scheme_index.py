@@ -0,0 +1,153 @@
+"""
+Schemes App - Scheme Indexes
+Narrow the catalogue to the schemes a farmer can possibly satisfy before
+any predicate is evaluated.
+"""
+
+from bisect import bisect_left, bisect_right
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, FrozenSet, List, Optional, Set, Tuple
+
+from .rule_compiler import SchemePlan, _to_decimal
+
+
+# Farmer fields whose IN / == rules are indexed by value
+CATEGORICAL_FIELDS = ('state', 'social_category', 'farming_category', 'gender', 'land_type')
+
+# Farmer fields whose numeric <= / >= thresholds are indexed
+NUMERIC_FIELDS = ('land_size', 'annual_income', 'age')
+
+CANDIDATE_CACHE_SIZE = 1024
+
+
+def _normalize(value) -> str:
+    return str(value).strip().lower()
+
+
+def _categorical_values(rule) -> Optional[FrozenSet[str]]:
+    """Values a categorical rule accepts, or None if the rule is not indexable."""
+    if rule.field not in CATEGORICAL_FIELDS:
+        return None
+    if rule.kind == 'in':
+        return rule.values
+    # == on a non-numeric value is a plain case-insensitive string match
+    if rule.kind == 'compare' and rule.operator.strip() == '==' and rule.number is None:
+        return frozenset([rule.text])
+    return None
+
+
+class CategoricalIndex:
+    """
+    Inverted index: categorical field value -> candidate scheme IDs.
+
+    Each constrained scheme is posted under one primary field (the first of
+    CATEGORICAL_FIELDS it restricts), keyed by every value it accepts there.
+    Schemes with rules but no categorical restriction are always candidates.
+    Secondary categorical rules are still checked by the predicate network.
+    """
+
+    def __init__(self, plans: Dict[Any, SchemePlan]):
+        self.unconstrained: Set[Any] = set()
+        self.by_field: Dict[str, Set[Any]] = {name: set() for name in CATEGORICAL_FIELDS}
+        self.postings: Dict[str, Dict[str, Set[Any]]] = {name: {} for name in CATEGORICAL_FIELDS}
+        # Farmers share a handful of state/category combinations
+        self._cache: Dict[tuple, FrozenSet[Any]] = {}
+
+        for scheme_id, plan in plans.items():
+            allowed: Dict[str, FrozenSet[str]] = {}
+            for rule in plan.rules:
+                values = _categorical_values(rule)
+                if values is None:
+                    continue
+                # Several rules on one field must all pass
+                allowed[rule.field] = allowed[rule.field] & values if rule.field in allowed else values
+
+            primary = next((name for name in CATEGORICAL_FIELDS if name in allowed), None)
+            if primary is None:
+                self.unconstrained.add(scheme_id)
+                continue
+
+            self.by_field[primary].add(scheme_id)
+            postings = self.postings[primary]
+            for value in allowed[primary]:
+                postings.setdefault(value, set()).add(scheme_id)
+
+    def candidates(self, farmer) -> FrozenSet[Any]:
+        """Scheme IDs (among schemes with rules) the farmer may be eligible for."""
+        key = tuple(
+            None if value is None or value == '' else _normalize(value)
+            for value in (getattr(farmer, name, None) for name in CATEGORICAL_FIELDS)
+        )
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+
+        result = set(self.unconstrained)
+        for name, value in zip(CATEGORICAL_FIELDS, key):
+            if value is None:
+                # Empty profile fields skip the rule, so nothing is excluded
+                result |= self.by_field[name]
+            else:
+                result |= self.postings[name].get(value, set())
+
+        if len(self._cache) >= CANDIDATE_CACHE_SIZE:
+            self._cache.clear()
+        self._cache[key] = frozenset(result)
+        return self._cache[key]
+
+
+class NumericIndex:
+    """
+    Sorted threshold arrays for numeric <= / >= rules.
+
+    Per field, a scheme's tightest upper bound (min of its <= values) and
+    tightest lower bound (max of its >= values) are kept in sorted arrays.
+    bisect finds the split point for a farmer's value in O(log n); the
+    schemes on the failing side of it form one contiguous slice.
+    """
+
+    def __init__(self, plans: Dict[Any, SchemePlan]):
+        upper: Dict[str, Dict[Any, Decimal]] = {name: {} for name in NUMERIC_FIELDS}
+        lower: Dict[str, Dict[Any, Decimal]] = {name: {} for name in NUMERIC_FIELDS}
+
+        for scheme_id, plan in plans.items():
+            for rule in plan.rules:
+                if (rule.field not in NUMERIC_FIELDS or rule.kind != 'compare'
+                        or rule.number is None or not rule.number.is_finite()):
+                    continue
+                op = rule.operator.strip()
+                if op == '<=':
+                    bounds = upper[rule.field]
+                    bounds[scheme_id] = min(bounds.get(scheme_id, rule.number), rule.number)
+                elif op == '>=':
+                    bounds = lower[rule.field]
+                    bounds[scheme_id] = max(bounds.get(scheme_id, rule.number), rule.number)
+
+        self.upper = {name: self._sorted(bounds) for name, bounds in upper.items()}
+        self.lower = {name: self._sorted(bounds) for name, bounds in lower.items()}
+
+    @staticmethod
+    def _sorted(bounds: Dict[Any, Decimal]) -> Tuple[List[Decimal], List[Any]]:
+        pairs = sorted(bounds.items(), key=lambda item: item[1])
+        return [value for _, value in pairs], [scheme_id for scheme_id, _ in pairs]
+
+    def failing(self, farmer) -> Set[Any]:
+        """Scheme IDs with a numeric bound the farmer's value is outside of."""
+        result: Set[Any] = set()
+        for name in NUMERIC_FIELDS:
+            value = getattr(farmer, name, None)
+            if value is None or value == '' or isinstance(value, bool):
+                continue  # empty values skip the rule
+            try:
+                value = _to_decimal(value)
+            except (InvalidOperation, ValueError, TypeError):
+                continue  # non-numeric values fall back to string compare
+            if not value.is_finite():
+                continue
+
+            values, scheme_ids = self.upper[name]
+            result.update(scheme_ids[:bisect_left(values, value)])  # bound < value
+
+            values, scheme_ids = self.lower[name]
+            result.update(scheme_ids[bisect_right(values, value):])  # bound > value
+        return result
@@ -0,0 +1,63 @@
+"""
+Schemes App - Signals
+Keeps the compiled eligibility rules and the materialized
+farmer_eligibility table in step with Scheme/SchemeRule edits.
+"""
+
+from django.db.models.signals import post_save, post_delete, pre_save
+from django.dispatch import Signal, receiver
+from django.utils import timezone
+
+from .models import Scheme, SchemeRule
+from .services.eligibility_store import schedule_scheme_refresh
+from .services.rule_compiler import bump_rules_generation
+from .services.rule_diff import record_rule_change, snapshot_rule
+
+
+# Sent after a rule change has been applied to stored eligibility.
+# Receivers get scheme_id, newly_eligible and newly_ineligible (farmer IDs),
+# e.g. for targeted notifications.
+scheme_eligibility_changed = Signal()
+
+
+@receiver(post_save, sender=Scheme)
+@receiver(post_delete, sender=Scheme)
+def scheme_changed(sender, instance, **kwargs):
+    """Invalidate this worker's compiled rules."""
+    bump_rules_generation()
+    if kwargs.get('created'):
+        # New schemes have no stored rows yet
+        schedule_scheme_refresh(instance.pk)
+
+
+def _rules_changed(scheme_id):
+    """
+    Touch the parent scheme's updated_at so other workers see a new
+    rules version, then invalidate this worker's compiled rules.
+    """
+    Scheme.objects.filter(pk=scheme_id).update(updated_at=timezone.now())
+    bump_rules_generation()
+
+
+@receiver(pre_save, sender=SchemeRule)
+def scheme_rule_saving(sender, instance, **kwargs):
+    """Keep the stored version of the rule so the change can be diffed."""
+    previous = SchemeRule.objects.filter(pk=instance.pk).first() if instance.pk else None
+    instance._previous_rule = snapshot_rule(previous) if previous else None
+
+
+@receiver(post_save, sender=SchemeRule)
+def scheme_rule_saved(sender, instance, **kwargs):
+    """Re-evaluate only the farmers the edited rule can affect."""
+    previous = getattr(instance, '_previous_rule', None)
+    _rules_changed(instance.scheme_id)
+    if previous is not None and previous.scheme_id != instance.scheme_id:
+        _rules_changed(previous.scheme_id)
+    record_rule_change(previous, snapshot_rule(instance))
+
+
+@receiver(post_delete, sender=SchemeRule)
+def scheme_rule_deleted(sender, instance, **kwargs):
+    """Re-evaluate only the farmers the removed rule was failing."""
+    _rules_changed(instance.scheme_id)
+    record_rule_change(snapshot_rule(instance), None)
@@ -7,9 +7,10 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 
-from .models import Scheme
-from .serializers import SchemeSerializer, SchemeListSerializer, EligibleSchemeSerializer
+from .serializers import EligibleSchemeSerializer
+from .services.eligibility_context import EligibilityContext
 from .services.eligibility_engine import EligibilityEngine, get_eligible_schemes_for_farmer
+from .services.scheme_catalogue import get_scheme_catalogue
 from core.authentication import get_farmer_from_token
 
 
@@ -42,20 +43,22 @@ class EligibleSchemesView(APIView):
             }, status=status.HTTP_400_BAD_REQUEST)
         
         # Get eligible schemes using Decision Table engine
-        eligible_scheme_objs = get_eligible_schemes_for_farmer(farmer)
+        context = EligibilityContext(farmer)
+        eligible_scheme_objs = get_eligible_schemes_for_farmer(farmer, context)
         
         # Prepare response with localized names
         response_data = []
         for scheme in eligible_scheme_objs:
-            eligibility = EligibilityEngine.check_eligibility(farmer, scheme)
+            eligibility = EligibilityEngine.check_eligibility(farmer, scheme, context)
+            record = context.record(scheme)
             response_data.append({
-                'scheme_id': str(scheme.id),
-                'name': scheme.name,
-                'name_localized': scheme.get_localized_name(farmer.language),
-                'description': scheme.get_localized_description(farmer.language),
-                'benefit_amount': float(scheme.benefit_amount),
-                'benefit_display': f"₹{float(scheme.benefit_amount):,.2f}",
-                'deadline': str(scheme.deadline) if scheme.deadline else None,
+                'scheme_id': record.scheme_id,
+                'name': record.name,
+                'name_localized': record.localized_name(context.language),
+                'description': record.localized_description(context.language),
+                'benefit_amount': record.benefit_amount,
+                'benefit_display': record.benefit_display,
+                'deadline': record.deadline,
                 'can_apply': eligibility['has_all_documents'],
                 'missing_documents': eligibility['missing_documents'],
                 'portal_url': 'https://dummyscheme.netlify.app'
@@ -98,9 +101,8 @@ class SchemeDetailView(APIView):
     def get(self, request, scheme_id):
         farmer = get_farmer_from_token(request)
         
-        try:
-            scheme = Scheme.objects.get(id=scheme_id)
-        except Scheme.DoesNotExist:
+        record = get_scheme_catalogue().get(scheme_id)
+        if record is None:
             return Response({
                 'success': False,
                 'message': 'Scheme not found'
@@ -109,15 +111,13 @@ class SchemeDetailView(APIView):
         # Get eligibility if farmer exists
         eligibility_info = None
         if farmer:
-            eligibility_info = EligibilityEngine.check_eligibility(farmer, scheme)
-        
-        serializer = SchemeSerializer(scheme)
+            eligibility_info = EligibilityEngine.check_eligibility(farmer, record.scheme)
         
         return Response({
             'success': True,
             'data': {
-                'scheme': serializer.data,
-                'name_localized': scheme.get_localized_name(farmer.language if farmer else 'english'),
+                'scheme': record.serialized(),
+                'name_localized': record.localized_name(farmer.language if farmer else 'english'),
                 'eligibility': eligibility_info
             }
         })
@@ -134,11 +134,9 @@ class AllSchemesView(APIView):
     def get(self, request):
         farmer = get_farmer_from_token(request)
         
-        schemes = Scheme.objects.filter(is_active=True)
-        
         if farmer and farmer.is_profile_complete:
-            # Return with eligibility info
-            all_schemes = EligibilityEngine.get_all_schemes_with_eligibility(farmer, schemes)
+            # Return with eligibility info (active schemes of the snapshot)
+            all_schemes = EligibilityEngine.get_all_schemes_with_eligibility(farmer)
             return Response({
                 'success': True,
                 'data': {
@@ -148,12 +146,12 @@ class AllSchemesView(APIView):
             })
         else:
             # Return basic list without eligibility
-            serializer = SchemeListSerializer(schemes, many=True)
+            active = get_scheme_catalogue().active
             return Response({
                 'success': True,
                 'data': {
-                    'total_count': schemes.count(),
-                    'schemes': serializer.data,
+                    'total_count': len(active),
+                    'schemes': [record.list_serialized() for record in active],
                     'note': 'Complete your profile to see eligibility'
                 }
             })
@@ -175,20 +173,19 @@ class CheckEligibilityView(APIView):
                 'message': 'Farmer not found'
             }, status=status.HTTP_404_NOT_FOUND)
         
-        try:
-            scheme = Scheme.objects.get(id=scheme_id)
-        except Scheme.DoesNotExist:
+        record = get_scheme_catalogue().get(scheme_id)
+        if record is None:
             return Response({
                 'success': False,
                 'message': 'Scheme not found'
             }, status=status.HTTP_404_NOT_FOUND)
         
-        result = EligibilityEngine.check_eligibility(farmer, scheme)
+        result = EligibilityEngine.check_eligibility(farmer, record.scheme)
         
         return Response({
             'success': True,
             'data': {
-                'scheme_name': scheme.name,
+                'scheme_name': record.name,
                 'is_eligible': result['eligible'],
                 'matched_rules': result['matched_rules'],
                 'failed_rules': result['failed_rules'],
@@ -5,3 +5,6 @@ class VoiceConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'voice'
     verbose_name = 'Voice Interaction'
+
+    def ready(self):
+        from . import signals  # noqa: F401
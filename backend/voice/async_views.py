@@ -0,0 +1,343 @@
+"""
+Voice App - Async Views
+ASGI version of the voice pipeline.
+
+POST /api/voice/process/async/ accepts the same input and returns the same
+responses as VoiceProcessView, but never parks a worker thread on Sarvam or
+Groq. The network calls are awaited on the event loop (httpx / AsyncGroq).
+Only the ORM work runs in the request's sync thread, and it overlaps with
+the network calls:
+
+  - the farmer is loaded while the audio is being transcribed; a retried
+    clip is looked up in the replay cache (voice_replay) by the token's
+    farmer ID before that
+  - follow-ups to the farmer's last turn are answered from the voice
+    session (voice_session) without intent mapping
+  - when the regex parser's guess is escalated to Groq, its handler runs
+    while Groq classifies the text; the result is used when Groq agrees,
+    otherwise it is discarded
+  - every sentence of the response is synthesized concurrently, and with
+    `stream` the audio is sent sentence by sentence as it is ready
+
+Serve through core/asgi.py (see Procfile) so one worker holds many sessions.
+"""
+
+import asyncio
+import json
+import logging
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions
+
+from core.authentication import FarmerAuthentication
+from core.exceptions import custom_exception_handler
+from .services.audio_formats import negotiate_format, transcode
+from .services.intent_parser import Intent, IntentParser
+from .services.tracing import span, tag, timed, trace_request
+from .services.voice_replay import get_voice_replays, replay_key
+from .services.voice_service import VoiceService
+from .services.voice_session import get_voice_sessions
+from .views import VoiceProcessView, build_audio_response, build_audio_stream_response, wants_stream
+
+
+logger = logging.getLogger(__name__)
+
+# Intents whose handlers only read the database and are cheap to run on a
+# guess. APPLY_SCHEME also fetches documents from Supabase storage; HELP and
+# UNKNOWN need no data at all.
+SPECULATIVE_INTENTS = {
+    Intent.SHOW_ELIGIBLE_SCHEMES,
+    Intent.CHECK_STATUS,
+    Intent.LIST_APPLICATIONS,
+    Intent.VIEW_PROFILE,
+    Intent.VIEW_DOCUMENTS,
+}
+
+
+def _json(data, status=200):
+    return JsonResponse(data, status=status, json_dumps_params={'ensure_ascii': False})
+
+
+def _error_response(exc):
+    """Format a DRF exception like the API views do (core.exceptions)."""
+    response = custom_exception_handler(exc, {})
+    result = _json(response.data, status=response.status_code)
+    if response.status_code == 401:
+        result['WWW-Authenticate'] = FarmerAuthentication().authenticate_header(None)
+    return result
+
+
+def _discard(task):
+    """Done-callback for a speculative task whose result is not used."""
+    if not task.cancelled() and task.exception() is not None:
+        logger.debug(f"Voice: Discarded speculative handler failed: {task.exception()}")
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncVoiceProcessView(View):
+    """
+    POST /api/voice/process/async/
+
+    Accepts:
+        - audio: Audio file (m4a/wav/mp3) for STT processing
+        - text: Direct text input for intent parsing
+
+    Returns:
+        - intent, confidence, response text, audio (WAV), action, data
+          (same as POST /api/voice/process/)
+        - Server-Timing header; stages that overlap here (auth and stt,
+          intent and a speculative db) are timed on their own
+        - X-Voice-Replay header for a replayed response (as POST
+          /api/voice/process/)
+    """
+    http_method_names = ['post', 'options']
+
+    # Intent handlers are shared with the WSGI view
+    handlers = VoiceProcessView()
+
+    @trace_request
+    async def post(self, request):
+        # Token signature/expiry is checked locally; the farmer row is
+        # fetched in the background while the audio is transcribed.
+        authenticator = FarmerAuthentication()
+        try:
+            header = authenticator.get_header(request)
+            raw_token = authenticator.get_raw_token(header) if header is not None else None
+            if raw_token is None:
+                raise exceptions.NotAuthenticated()
+            validated_token = authenticator.get_validated_token(raw_token)
+        except exceptions.APIException as exc:
+            return _error_response(exc)
+
+        farmer_task = asyncio.ensure_future(timed('auth', sync_to_async(authenticator.get_user)(validated_token)))
+
+        try:
+            with span('upload'):
+                data, files = self._parse_body(request)
+        except exceptions.APIException as exc:
+            farmer_task.add_done_callback(_discard)
+            return _error_response(exc)
+
+        try:
+            return await self._process(request, farmer_task, validated_token.get('farmer_id'), data, files)
+        except exceptions.APIException as exc:
+            return _error_response(exc)
+        except Exception as e:
+            logger.error(f"Voice: Unhandled error in AsyncVoiceProcessView: {type(e).__name__}: {e}", exc_info=True)
+            return _json({
+                'success': False,
+                'message': 'An internal error occurred while processing your voice command. Please try again.'
+            }, status=500)
+        finally:
+            if not farmer_task.done():
+                farmer_task.add_done_callback(_discard)
+
+    @staticmethod
+    def _parse_body(request):
+        """(data, files) from a JSON or multipart/form request."""
+        if request.content_type == 'application/json':
+            try:
+                data = json.loads(request.body or b'{}')
+            except ValueError as e:
+                raise exceptions.ParseError(f'JSON parse error - {e}')
+            if not isinstance(data, dict):
+                raise exceptions.ParseError('JSON parse error - expected an object')
+            return data, {}
+        return request.POST, request.FILES
+
+    async def _process(self, request, farmer_task, farmer_id, data, files):
+        audio_file = files.get('audio')
+        text = (data.get('text') or '').strip()
+
+        replay_lead = None
+        if audio_file:
+            file_size = audio_file.size
+            if file_size < 100:
+                return _json({
+                    'success': False,
+                    'message': 'Audio file too small. Please speak longer.'
+                }, status=400)
+
+            if file_size > 10 * 1024 * 1024:  # 10MB limit
+                return _json({
+                    'success': False,
+                    'message': 'Audio file too large (max 10MB).'
+                }, status=400)
+
+            # A retry of a clip already answered (or being answered), looked
+            # up by the token's farmer ID while the farmer row loads
+            with span('replay'):
+                key = await asyncio.to_thread(replay_key, farmer_id, audio_file)
+                replay, shared, replay_lead = await get_voice_replays().aclaim(key)
+            if replay is not None:
+                farmer = await farmer_task
+                if replay.language == (farmer.language or 'hindi'):
+                    get_voice_replays().served(shared)
+                    return await self._replay(request, data, replay, shared)
+
+        try:
+            return await self._respond(request, farmer_task, data, audio_file, text, replay_lead)
+        finally:
+            if replay_lead is not None:
+                replay_lead.abandon()
+
+    async def _respond(self, request, farmer_task, data, audio_file, text, replay_lead):
+        if audio_file:
+            # Sent straight from the upload: no temp file round trip
+            stt_task = asyncio.ensure_future(
+                timed('stt', VoiceService.aspeech_to_text(audio_file, audio_file.name))
+            )
+            try:
+                farmer = await farmer_task
+            except BaseException:
+                stt_task.add_done_callback(_discard)
+                raise
+            logger.info(f"Voice: Received audio file ({audio_file.size} bytes) from farmer {farmer.id}")
+            if replay_lead is not None:
+                replay_lead.language = farmer.language or 'hindi'
+
+            text, detected_lang = await stt_task
+            language = detected_lang or farmer.language or 'hindi'
+            logger.info(f"Voice: STT result — lang={language}, text='{text[:100] if text else 'None'}'")
+
+            if not text:
+                return _json({
+                    'success': False,
+                    'message': 'Could not understand the audio. Please try speaking more clearly.'
+                }, status=400)
+
+        elif not text:
+            await farmer_task
+            return _json({
+                'success': False,
+                'message': 'No voice audio or text provided.'
+            }, status=400)
+        else:
+            farmer = await farmer_task
+            language = farmer.language or 'hindi'
+            logger.info(f"Voice: Text input from farmer {farmer.id}: '{text[:100]}'")
+
+        tag(language=language)
+        parsed, result = await self._resolve(text, language, farmer)
+        tag(intent=parsed.intent.value)
+        logger.info(f"Voice: Intent={parsed.intent.value}, confidence={parsed.confidence}")
+
+        speech_text = result.get('speech_text', '')
+        metadata = {
+            'success': True,
+            'intent': parsed.intent.value,
+            'confidence': parsed.confidence,
+            'original_text': text,
+            'response': result['response'],
+            'speech_text': speech_text,
+            'action': result.get('action'),
+            'data': result.get('data')
+        }
+
+        if speech_text and wants_stream(request, data):
+            try:
+                with span('tts'):
+                    audio_stream = await VoiceService.astream_speech(speech_text, language)
+                if audio_stream is not None:
+                    if replay_lead is not None:
+                        audio_stream = replay_lead.astream(audio_stream, metadata)
+                    return build_audio_stream_response(audio_stream, metadata)
+                logger.warning("Voice: TTS returned no audio — falling back to JSON")
+            except Exception as tts_error:
+                logger.error(f"Voice: TTS failed: {tts_error}")
+            return _json({
+                'success': True,
+                'data': metadata
+            })
+
+        audio_content = None
+        if speech_text:
+            try:
+                with span('tts'):
+                    audio_content = await VoiceService.asynthesize(speech_text, language)
+                if audio_content:
+                    logger.info(f"Voice: TTS generated {len(audio_content)} bytes")
+                else:
+                    logger.warning("Voice: TTS returned no audio — falling back to JSON")
+            except Exception as tts_error:
+                logger.error(f"Voice: TTS failed: {tts_error}")
+
+        if audio_content:
+            if replay_lead is not None:
+                replay_lead.finish(metadata, audio_content)
+            with span('transcode'):
+                audio_content, audio_format = await asyncio.to_thread(
+                    transcode, audio_content, negotiate_format(request, data)
+                )
+            return build_audio_response(audio_content, metadata, audio_format)
+        if replay_lead is not None and not speech_text:
+            replay_lead.finish(metadata)
+        return _json({
+            'success': True,
+            'data': metadata
+        })
+
+    async def _replay(self, request, data, replay, shared):
+        """Answer with the result of an identical earlier request (voice_replay)."""
+        tag(intent=replay.metadata['intent'])
+        logger.info(f"Voice: Replaying {replay.metadata['intent']} response ({'shared' if shared else 'cached'})")
+        if replay.audio is None:
+            response = _json({
+                'success': True,
+                'data': replay.metadata
+            })
+        else:
+            with span('transcode'):
+                audio_content, audio_format = await asyncio.to_thread(
+                    transcode, replay.audio, negotiate_format(request, data)
+                )
+            response = build_audio_response(audio_content, replay.metadata, audio_format)
+        response['X-Voice-Replay'] = 'shared' if shared else 'hit'
+        return response
+
+    async def _resolve(self, text, language, farmer):
+        """
+        Map the text to an intent and run its handler, and record the turn
+        in the farmer's voice session.
+        """
+        session = get_voice_sessions().session(farmer)
+        parsed = VoiceService.follow_up(text, session)
+        if parsed is not None:
+            result = await sync_to_async(self.handlers._handle_intent)(parsed, farmer, language)
+        else:
+            parsed, result = await self._map_and_handle(text, language, farmer)
+        if session is not None:
+            session.remember(parsed, result)
+        return parsed, result
+
+    async def _map_and_handle(self, text, language, farmer):
+        """
+        Map the text to an intent and run its handler, starting the handler
+        for the regex parser's guess while the LLM is still answering.
+        """
+        handle = sync_to_async(self.handlers._handle_intent)
+
+        guess = IntentParser.parse(text, language)
+        speculative = None
+        if guess.intent in SPECULATIVE_INTENTS and VoiceService._escalates(guess):
+            speculative = asyncio.ensure_future(handle(guess, farmer, language))
+
+        try:
+            with span('intent'):
+                parsed = await VoiceService.amap_intent(text, language, guess=guess)
+        except BaseException:
+            if speculative is not None:
+                speculative.add_done_callback(_discard)
+            raise
+
+        if speculative is not None:
+            if parsed.intent == guess.intent:
+                return parsed, await speculative
+            speculative.add_done_callback(_discard)
+            logger.info(f"Voice: Speculative handler for {guess.intent.value} discarded (LLM: {parsed.intent.value})")
+
+        return parsed, await handle(parsed, farmer, language)
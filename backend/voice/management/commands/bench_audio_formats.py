@@ -0,0 +1,202 @@
+"""
+Benchmark of the response audio formats (voice/services/audio_formats).
+
+For speech-like clips shaped like TTS output (22050 Hz 16-bit mono), reports
+per format:
+
+  - payload size
+  - transcode time on first use and when served from the transcode cache
+  - fidelity: SNR of the decoded payload against the source resampled to
+    the same rate (PCM renditions are exact up to 16-bit rounding)
+  - end-to-end latency: server time of POST /api/voice/tts/ with the
+    format (TTS answered by a local stand-in, audio cached as in steady
+    state) plus the time to deliver the payload over typical 2G/3G links
+
+Usage:
+    python manage.py bench_audio_formats
+    python manage.py bench_audio_formats --seconds 3 8 15 --runs 20
+"""
+
+import base64
+import logging
+import statistics
+import struct
+import threading
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from farmers.models import Farmer
+from voice.services.audio_formats import (
+    FORMATS, IMA_INDEX_TABLE, IMA_STEP_TABLE, encode, get_transcode_cache, transcode,
+)
+from voice.services.audio_preprocess import decode_wav, resample
+from voice.services.tts_cache import reset_tts_cache
+from voice.services.voice_bank import reset_voice_bank
+from voice.services.voice_service import VoiceService
+from voice.views import VoiceTTSView
+from .bench_audio_preprocess import synthetic_clip
+from .voice_load_test import StubServer
+
+
+# (name, downlink kbit/s, round trip s)
+LINKS = [
+    ('2G/EDGE', 100, 0.6),
+    ('3G', 750, 0.2),
+]
+
+
+# ============================================================
+# Reference decoders (for the fidelity check)
+# ============================================================
+
+def _chunks(payload):
+    """{chunk id: body} of a RIFF/WAVE file."""
+    chunks, offset = {}, 12
+    while offset + 8 <= len(payload):
+        chunk_id, size = payload[offset:offset + 4], struct.unpack('<I', payload[offset + 4:offset + 8])[0]
+        chunks[chunk_id] = payload[offset + 8:offset + 8 + size]
+        offset += 8 + size + (size % 2)
+    return chunks
+
+
+def decode_payload(payload):
+    """(float samples, rate) of a PCM, mu-law or IMA ADPCM WAV."""
+    chunks = _chunks(payload)
+    tag, _, rate = struct.unpack('<HHI', chunks[b'fmt '][:8])
+    data = chunks[b'data']
+    if tag == 1:
+        samples, rate = decode_wav(payload)
+        return samples[:, 0], rate
+
+    frames = struct.unpack('<I', chunks[b'fact'])[0]
+    if tag == 7:
+        code = ~np.frombuffer(data, dtype=np.uint8).astype(np.int32) & 0xFF
+        sign, exponent, mantissa = code & 0x80, (code >> 4) & 0x07, code & 0x0F
+        magnitude = (((mantissa << 3) + 0x84) << exponent) - 0x84
+        return np.where(sign, -magnitude, magnitude)[:frames] / 32768.0, rate
+
+    if tag == 0x11:
+        block_align, _, _, per_block = struct.unpack('<HHHH', chunks[b'fmt '][12:20])
+        blocks = np.frombuffer(data, dtype=np.uint8).reshape(-1, block_align)
+        predictor = blocks[:, 0:2].copy().view('<i2')[:, 0].astype(np.int32)
+        index = blocks[:, 2].astype(np.int32)
+        nibbles = np.empty((len(blocks), per_block - 1), dtype=np.int32)
+        nibbles[:, 0::2] = blocks[:, 4:] & 0x0F
+        nibbles[:, 1::2] = blocks[:, 4:] >> 4
+        output = np.empty((len(blocks), per_block), dtype=np.int32)
+        output[:, 0] = predictor
+        for position in range(per_block - 1):
+            step = IMA_STEP_TABLE[index]
+            code = nibbles[:, position]
+            delta = (step >> 3) + np.where(code & 4, step, 0) + np.where(code & 2, step >> 1, 0) + np.where(code & 1, step >> 2, 0)
+            predictor = np.clip(np.where(code & 8, predictor - delta, predictor + delta), -32768, 32767)
+            index = np.clip(index + IMA_INDEX_TABLE[code], 0, 88)
+            output[:, position + 1] = predictor
+        return output.reshape(-1)[:frames] / 32768.0, rate
+
+    raise ValueError(f'Unsupported WAVE format {tag}')
+
+
+def snr_db(reference, decoded):
+    size = min(len(reference), len(decoded))
+    noise = reference[:size] - decoded[:size]
+    return 10 * np.log10(np.sum(reference[:size] ** 2) / max(np.sum(noise ** 2), 1e-20))
+
+
+class Command(BaseCommand):
+    help = 'Compare payload size, transcode cost and latency of the response audio formats'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seconds', type=float, nargs='+', default=[2.0, 5.0, 12.0],
+                            help='Response durations to test')
+        parser.add_argument('--runs', type=int, default=10, help='Requests per format for the latency figures')
+        parser.add_argument('--farmer', help='Farmer ID (default: first farmer)')
+
+    def handle(self, *args, **options):
+        farmer = Farmer.objects.filter(pk=options['farmer']).first() if options['farmer'] else Farmer.objects.first()
+        if farmer is None:
+            raise CommandError('No farmer found')
+
+        failures = []
+        for seconds in options['seconds']:
+            clip, _ = synthetic_clip(22050, 1, 2, 0.0, seconds, 0.0, seed=int(seconds * 10))
+            self.stdout.write(f"\n{seconds:.1f} s response ({len(clip)} bytes as synthesized)")
+            self.stdout.write(
+                f"{'format':<10} {'bytes':>8} {'ratio':>6} {'encode':>8} {'cached':>8} {'SNR':>7} {'server':>8}"
+                + ''.join(f" {name:>9}" for name, _, _ in LINKS)
+            )
+            server_times = self._server_times(farmer, clip, options['runs'])
+            source, source_rate = decode_wav(clip)
+
+            for name, fmt in FORMATS.items():
+                started = time.perf_counter()
+                payload = encode(clip, fmt) if name != 'wav' else clip
+                encode_ms = 1000 * (time.perf_counter() - started)
+
+                transcode(clip, name)
+                started = time.perf_counter()
+                transcode(clip, name)
+                cached_ms = 1000 * (time.perf_counter() - started)
+
+                decoded, rate = decode_payload(payload)
+                snr = snr_db(resample(source[:, 0], source_rate, rate), decoded)
+                if snr < 12:
+                    failures.append(f'{name} at {seconds:.1f} s: SNR {snr:.1f} dB')
+
+                server = server_times[name]
+                links = ''.join(
+                    f" {1000 * (server + rtt + len(payload) * 8 / (kbps * 1000)):>7.0f}ms"
+                    for _, kbps, rtt in LINKS
+                )
+                self.stdout.write(
+                    f"{name:<10} {len(payload):>8} {len(payload) / len(clip):>6.2f} "
+                    f"{encode_ms:>6.1f}ms {cached_ms:>6.2f}ms {min(snr, 99):>5.1f}dB {1000 * server:>6.1f}ms{links}"
+                )
+
+        if failures:
+            raise CommandError('Encoding fidelity too low: ' + '; '.join(failures))
+
+    def _server_times(self, farmer, clip, runs):
+        """Median server time of POST /api/voice/tts/ per format (cached TTS audio)."""
+        server = StubServer({'stt': 0, 'llm': 0, 'tts': 0})
+        server.audio = base64.b64encode(clip).decode()
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        tts_url = VoiceService.SARVAM_TTS_URL
+        VoiceService.SARVAM_TTS_URL = f'{server.url}/text-to-speech'
+        factory = APIRequestFactory()
+        times = {}
+        logging.disable(logging.WARNING)
+        try:
+            with override_settings(SARVAM_API_KEY='stub', TTS_CACHE_DIR='', VOICE_BANK_DIR=''):
+                reset_tts_cache()
+                reset_voice_bank()
+                text = f'Benchmark response {len(clip)}'
+                for name in FORMATS:
+                    samples = []
+                    for run in range(runs + 1):
+                        request = factory.post(
+                            f'/api/voice/tts/?audio_format={name}', {'text': text, 'language': 'english'},
+                            format='json',
+                        )
+                        force_authenticate(request, user=farmer)
+                        started = time.perf_counter()
+                        response = VoiceTTSView.as_view()(request)
+                        elapsed = time.perf_counter() - started
+                        if response.status_code != 200 or response['X-Voice-Audio-Format'] != name:
+                            raise CommandError(f'{name}: unexpected response {response.status_code}')
+                        if run:  # the first request synthesizes and transcodes
+                            samples.append(elapsed)
+                    times[name] = statistics.median(samples)
+        finally:
+            logging.disable(logging.NOTSET)
+            VoiceService.SARVAM_TTS_URL = tts_url
+            server.shutdown()
+            server.server_close()
+            reset_tts_cache()
+            reset_voice_bank()
+            get_transcode_cache().clear()
+        return times
@@ -0,0 +1,142 @@
+"""
+Benchmark of the STT audio preprocessing stage (voice/services/audio_preprocess).
+
+Runs preprocess_wav over a corpus of WAV clips and reports, per clip and in
+total, the upload size before and after, the audio kept and the time spent.
+Without --clips a synthetic corpus is used: voiced speech-like bursts
+(harmonic tones with syllable-rate amplitude modulation) between stretches
+of low-level background noise, recorded like phones do (44.1/48 kHz,
+mono/stereo, 16/24-bit), and a clip that starts straight away with a quiet
+word. Each synthetic clip is also checked to keep all of
+its speech.
+
+Usage:
+    python manage.py bench_audio_preprocess
+    python manage.py bench_audio_preprocess --clips /path/to/wavs --repeat 5
+"""
+
+import glob
+import io
+import os
+import time
+import wave
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from voice.services.audio_preprocess import decode_wav, preprocess_wav
+
+
+# (name, sample rate, channels, sample width, lead silence s, speech s, trail silence s, noise dBFS,
+#  quiet onset: (s, dB quieter) of speech at its start or None)
+SYNTHETIC = [
+    ('short-command-44k-mono', 44100, 1, 2, 1.5, 1.8, 2.0, -60, None),
+    ('short-command-48k-stereo', 48000, 2, 2, 0.8, 2.2, 1.2, -60, None),
+    ('long-hold-44k-mono', 44100, 1, 2, 3.0, 2.5, 4.5, -55, None),
+    ('no-silence-44k-mono', 44100, 1, 2, 0.0, 3.0, 0.0, -60, None),
+    ('question-48k-24bit', 48000, 1, 3, 1.0, 4.0, 1.5, -65, None),
+    ('already-16k-mono', 16000, 1, 2, 1.0, 2.0, 1.0, -60, None),
+    ('noisy-field-44k-stereo', 44100, 2, 2, 2.0, 3.5, 2.5, -35, None),
+    ('quiet-onset-44k-mono', 44100, 1, 2, 0.0, 2.0, 0.0, -45, (0.8, 26)),
+]
+
+
+def synthetic_clip(rate, channels, width, lead, speech, trail, seed, noise_db=-60.0, onset=None):
+    """WAV bytes plus the sample range that holds speech."""
+    rng = np.random.default_rng(seed)
+    total = int(rate * (lead + speech + trail))
+    signal = rng.normal(0, 10 ** (noise_db / 20), total)
+
+    start, count = int(rate * lead), int(rate * speech)
+    t = np.arange(count) / rate
+    pitch = 120 + 40 * np.sin(2 * np.pi * 0.7 * t)
+    phase = 2 * np.pi * np.cumsum(pitch) / rate
+    voice = sum(np.sin(k * phase) / k for k in range(1, 8))
+    syllables = 0.5 * (1 - np.cos(2 * np.pi * 4.0 * t)) ** 2  # ~4 syllables/s
+    gain = np.full(count, 0.25)
+    if onset is not None:
+        gain[:int(rate * onset[0])] *= 10 ** (-onset[1] / 20)
+    signal[start:start + count] += gain * voice * syllables
+
+    if channels == 2:
+        signal = np.stack([signal, 0.9 * signal + rng.normal(0, 1e-4, total)], axis=1)
+    else:
+        signal = signal[:, None]
+    signal = np.clip(signal, -1, 1)
+
+    if width == 3:
+        values = (signal * 8388607).astype(np.int32).reshape(-1)
+        raw = np.stack([values & 0xFF, (values >> 8) & 0xFF, (values >> 16) & 0xFF], axis=1).astype(np.uint8).tobytes()
+    else:
+        raw = (signal * 32767).astype('<i2').tobytes()
+
+    output = io.BytesIO()
+    with wave.open(output, 'wb') as writer:
+        writer.setnchannels(channels)
+        writer.setsampwidth(width)
+        writer.setframerate(rate)
+        writer.writeframes(raw)
+    return output.getvalue(), (start, start + count)
+
+
+class Command(BaseCommand):
+    help = 'Benchmark silence trimming and 16 kHz resampling of STT uploads'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clips', help='Directory of WAV clips (default: synthetic corpus)')
+        parser.add_argument('--rate', type=int, default=16000, help='Target sample rate')
+        parser.add_argument('--repeat', type=int, default=3, help='Timing runs per clip')
+
+    def handle(self, *args, **options):
+        corpus = self._corpus(options['clips'])
+        total_in = total_out = 0
+        failures = []
+
+        self.stdout.write(f"{'clip':<28} {'in':>9} {'out':>9} {'saved':>6} {'seconds':>13} {'ms':>7}")
+        for name, content, speech in corpus:
+            timings = []
+            for _ in range(options['repeat']):
+                started = time.perf_counter()
+                result = preprocess_wav(content, options['rate'])
+                timings.append(time.perf_counter() - started)
+
+            size = len(result.audio) if result else len(content)
+            total_in += len(content)
+            total_out += size
+            decoded = decode_wav(content)
+            original_seconds = len(decoded[0]) / decoded[1] if decoded else 0.0
+            seconds = result.seconds if result else original_seconds
+            self.stdout.write(
+                f"{name[:28]:<28} {len(content):>9} {size:>9} {100 * (1 - size / len(content)):>5.0f}% "
+                f"{original_seconds:>5.1f}->{seconds:>5.1f}s {1000 * min(timings):>7.1f}"
+                + ('' if result else '  (unchanged)')
+            )
+
+            if speech is not None and result is not None:
+                rate = decoded[1]
+                speech_seconds = (speech[1] - speech[0]) / rate
+                if result.seconds < speech_seconds:
+                    failures.append(f'{name}: kept {result.seconds:.2f}s of {speech_seconds:.2f}s speech')
+
+        self.stdout.write(
+            f"Total: {total_in} -> {total_out} bytes, saved {total_in - total_out} "
+            f"({100 * (1 - total_out / total_in):.0f}%) over {len(corpus)} clips"
+        )
+        if failures:
+            raise CommandError('Speech was trimmed: ' + '; '.join(failures))
+
+    def _corpus(self, directory):
+        if directory:
+            paths = sorted(glob.glob(os.path.join(directory, '*.wav')))
+            if not paths:
+                raise CommandError(f'No .wav files in {directory}')
+            corpus = []
+            for path in paths:
+                with open(path, 'rb') as f:
+                    corpus.append((os.path.basename(path), f.read(), None))
+            return corpus
+
+        return [
+            (name, *synthetic_clip(rate, channels, width, lead, speech, trail, seed=index, noise_db=noise, onset=onset))
+            for index, (name, rate, channels, width, lead, speech, trail, noise, onset) in enumerate(SYNTHETIC)
+        ]
@@ -0,0 +1,116 @@
+"""
+Benchmark the LLM gateway (voice/services/llm_gateway) against a local stub.
+
+Classifies the same utterances, one after another, through
+
+  reused client       the gateway's Groq backend (one pooled client) against
+                      the chat completions stand-in of voice_load_test
+  client per request  the same backend creating a Groq client per request
+                      (each opens its own connection)
+  stub backend        the in-process StubBackend, without HTTP
+
+and reports the prompt size, latency, connections and the token accounting
+of each. Fails if the reused client opens more than one connection.
+
+Usage:
+    python manage.py bench_intent_llm
+    python manage.py bench_intent_llm --requests 500 --llm-delay 0.05
+"""
+
+import logging
+import os
+import threading
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from groq import Groq
+
+from core.http_client import reset_upstreams
+from voice.services.llm_gateway import (
+    INTENT_SYSTEM_PROMPT, GroqBackend, LLMGateway, StubBackend, intent_messages, reset_llm_gateway,
+)
+from .voice_load_test import StubServer
+
+
+UTTERANCES = [
+    ('मेरी योजनाएं दिखाओ', 'hindi'),
+    ('PM Kisan के लिए अप्लाई करो', 'hindi'),
+    ('माझ्या अर्जाची स्थिती सांगा', 'marathi'),
+    ('show me the documents I uploaded', 'english'),
+]
+
+
+class FreshClientBackend(GroqBackend):
+    """GroqBackend without client reuse: a new Groq client per request."""
+
+    def _client(self):
+        return Groq(api_key=self._key(), max_retries=0)
+
+
+class Command(BaseCommand):
+    help = 'Compare intent LLM latency and tokens: reused vs per-request client vs stub backend'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Classifications per mode')
+        parser.add_argument('--llm-delay', type=float, default=0.0, help='Stand-in response delay (seconds)')
+
+    def handle(self, *args, **options):
+        count, delay = options['requests'], options['llm_delay']
+        server = StubServer({'stt': 0, 'llm': delay, 'tts': 0})
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        groq_base_url = os.environ.get('GROQ_BASE_URL')
+        os.environ['GROQ_BASE_URL'] = server.url
+
+        user_chars = [len(intent_messages(text, language)[1]['content']) for text, language in UTTERANCES]
+        self.stdout.write(
+            f"prompt: system {len(INTENT_SYSTEM_PROMPT)} chars (same on every request), "
+            f"user {sum(user_chars) / len(user_chars):.0f} chars on average"
+        )
+        self.stdout.write(f"{count} sequential classifications per mode, stand-in delay {1000 * delay:.0f} ms\n")
+
+        results = []
+        logging.disable(logging.INFO)
+        try:
+            with override_settings(GROQ_API_KEY='stub'):
+                reset_upstreams()
+                for label, backend in (
+                    ('reused client', GroqBackend()),
+                    ('client per request', FreshClientBackend()),
+                    ('stub backend', StubBackend(delay)),
+                ):
+                    results.append((label, *self._run(server, LLMGateway(backend, 'stub'), count)))
+        finally:
+            logging.disable(logging.NOTSET)
+            if groq_base_url is None:
+                os.environ.pop('GROQ_BASE_URL', None)
+            else:
+                os.environ['GROQ_BASE_URL'] = groq_base_url
+            server.shutdown()
+            server.server_close()
+            reset_upstreams()
+            reset_llm_gateway()
+
+        for label, connections, failed, stats in results:
+            self.stdout.write(
+                f"  {label:<20} {stats['mean_ms']:7.2f} ms/request (max {stats['max_ms']:.0f})  "
+                f"{connections:>4} connections  {stats['mean_prompt_tokens']:.0f} prompt + "
+                f"{stats['completion_tokens'] / max(stats['requests'] - stats['errors'], 1):.0f} completion "
+                f"tokens/request  {failed} failed"
+            )
+
+        problems = [f'{label}: {failed} classifications failed' for label, _, failed, _ in results if failed]
+        if results[0][1] > 1:
+            problems.append(f'reused client opened {results[0][1]} connections')
+        if problems:
+            raise CommandError('; '.join(problems))
+
+    def _run(self, server, gateway, count):
+        """(connections opened, failures, gateway stats) of count classifications."""
+        before, failed = server.connections, 0
+        for i in range(count):
+            text, language = UTTERANCES[i % len(UTTERANCES)]
+            try:
+                gateway.classify(text, language)
+            except Exception:
+                failed += 1
+        return server.connections - before, failed, gateway.stats()
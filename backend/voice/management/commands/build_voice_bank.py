@@ -0,0 +1,135 @@
+"""
+Pre-render the fixed ResponseGenerator texts into the voice bank.
+
+Renders every static response and every fixed fragment of the templated
+responses (see voice.services.voice_bank) to WAV with the production TTS
+settings and writes VOICE_BANK_DIR/manifest.json. Texts already rendered
+with the same TTS payload are kept unless --force is given, so re-running
+on deploy only renders new or changed templates.
+
+Usage:
+    python manage.py build_voice_bank
+    python manage.py build_voice_bank --language hindi --force
+    python manage.py build_voice_bank --output /srv/voice_bank
+"""
+
+import json
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from voice.services.tts_cache import TTSCache
+from voice.services.voice_bank import MANIFEST_NAME, MANIFEST_VERSION, bank_texts, reset_voice_bank
+from voice.services.voice_service import VoiceService
+
+
+class Command(BaseCommand):
+    help = 'Render the fixed voice responses to WAV once (voice bank)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', help='Bank directory (default: VOICE_BANK_DIR)')
+        parser.add_argument('--language', action='append', dest='languages',
+                            help='Only render this language (repeatable)')
+        parser.add_argument('--force', action='store_true', help='Re-render texts that are already banked')
+
+    def handle(self, *args, **options):
+        directory = options['output'] or getattr(settings, 'VOICE_BANK_DIR', '')
+        if not directory:
+            raise CommandError('No bank directory: set VOICE_BANK_DIR or pass --output')
+        if not VoiceService._get_sarvam_key():
+            raise CommandError('SARVAM_API_KEY is required to render the voice bank')
+        os.makedirs(directory, exist_ok=True)
+
+        languages = set(options['languages'] or [])
+        previous = self._read_manifest(directory)
+        entries = {
+            entry['key']: entry for entry in previous
+            if languages and entry['language'] not in languages
+        }
+
+        rendered = reused = 0
+        failed = []
+        for language, text, info in bank_texts():
+            if languages and language not in languages:
+                continue
+            payload = VoiceService._tts_payload(text, language)
+            key = TTSCache.key(payload)
+            filename = f'{key}.wav'
+            path = os.path.join(directory, filename)
+
+            if os.path.exists(path) and not options['force']:
+                reused += 1
+                size = os.path.getsize(path)
+            else:
+                audio = VoiceService._request_speech(payload)
+                if not audio:
+                    failed.append(f'{language}: {text}')
+                    continue
+                self._write(path, audio)
+                rendered += 1
+                size = len(audio)
+
+            entries[key] = {
+                'key': key,
+                'file': filename,
+                'language': language,
+                'text': text,
+                'bytes': size,
+                **info,
+            }
+
+        self._write_manifest(directory, entries)
+        removed = self._prune(directory, entries)
+        reset_voice_bank()
+
+        self.stdout.write(
+            f"Voice bank {directory}: {len(entries)} texts "
+            f"({rendered} rendered, {reused} already banked, {removed} stale files removed)"
+        )
+        if failed:
+            raise CommandError(f"{len(failed)} texts could not be rendered:\n  " + '\n  '.join(failed))
+        self.stdout.write(self.style.SUCCESS('Voice bank is complete'))
+
+    @staticmethod
+    def _read_manifest(directory):
+        try:
+            with open(os.path.join(directory, MANIFEST_NAME), encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return []
+        if manifest.get('version') != MANIFEST_VERSION:
+            return []
+        return manifest.get('entries', [])
+
+    @staticmethod
+    def _write(path, data):
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _write_manifest(self, directory, entries):
+        manifest = {
+            'version': MANIFEST_VERSION,
+            'entries': sorted(
+                entries.values(),
+                key=lambda entry: (entry['language'], entry['intent'], entry['response_type'], entry['text'])
+            ),
+        }
+        self._write(
+            os.path.join(directory, MANIFEST_NAME),
+            json.dumps(manifest, ensure_ascii=False, indent=2).encode('utf-8')
+        )
+
+    @staticmethod
+    def _prune(directory, entries):
+        """Remove WAV files that are no longer in the manifest."""
+        keep = {entry['file'] for entry in entries.values()}
+        removed = 0
+        for name in os.listdir(directory):
+            if name.endswith('.wav') and name not in keep:
+                os.remove(os.path.join(directory, name))
+                removed += 1
+        return removed
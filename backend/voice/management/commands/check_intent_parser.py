@@ -0,0 +1,144 @@
+"""
+Equivalence check and micro-benchmark of IntentParser.
+
+Compares IntentParser.parse (compiled single-pass matcher) with the
+original per-pattern implementation (reference_parse below) on a corpus of
+Hindi, Marathi and English utterances plus randomly generated ones built
+from the pattern vocabulary, for every preferred language, and times both.
+
+Usage:
+    python manage.py check_intent_parser
+    python manage.py check_intent_parser --random 5000 --repeat 20
+"""
+
+import random
+import re
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from voice.services.intent_parser import Intent, IntentParser, ParsedIntent
+
+
+CORPUS = [
+    # Hindi
+    'मेरी योजनाएं दिखाओ', 'मुझे मेरी योजना बताओ', 'कौन सी योजना मेरे लिए है', 'योजना देखनी है',
+    'पात्र योजना', 'इस योजना के लिए आवेदन करो', 'PM Kisan के लिए अप्लाई करो', 'आवेदन कर दो',
+    'आवेदन की स्थिति बताओ', 'स्टेटस दिखाओ', 'मेरा आवेदन कहां है', 'मेरी प्रोफाइल दिखाओ',
+    'मेरी जानकारी', 'मेरे सारे आवेदन', 'आवेदन की लिस्ट', 'मेरे दस्तावेज दिखाओ', 'दस्तावेज देखने हैं',
+    'मदद करो', 'मैं क्या कर सकता हूं', 'फसल बीमा योजना के लिए आवेदन करना है', 'किसान क्रेडिट कार्ड',
+    'मृदा स्वास्थ्य योजना दिखाओ', 'प्रधानमंत्री किसान सम्मान निधि', 'मौसम कैसा है',
+    # Marathi
+    'मला माझ्या योजना दाखवा', 'कोणत्या योजना आहेत', 'योजना पहायच्या आहेत', 'या योजनेसाठी अर्ज करा',
+    'योजना अर्ज', 'अप्लाय करा', 'माझ्या अर्जाची स्थिती', 'अर्ज स्थिती', 'स्टेटस दाखवा',
+    'माझी माहिती दाखवा', 'प्रोफाइल दाखवा', 'माझे सर्व अर्ज', 'अर्ज यादी', 'माझी कागदपत्रे दाखवा',
+    'कागदपत्रे दाखवा', 'डॉक्युमेंटस पहायचे', 'मदत करा', 'पीएम किसान योजना', 'पाऊस कधी येणार',
+    # English
+    'show my schemes', 'Show me schemes', 'which eligible schemes do I have', 'what scheme can I get',
+    'list schemes', 'apply for this scheme', 'apply to PM-Kisan scheme', 'submit application',
+    'apply now', 'check my application status', 'application status', 'what is my status',
+    'show my profile', 'my details', 'list all my applications', 'my applications',
+    'show my documents', 'view documents', 'upload docs', 'help', 'what can you do', 'What can I do?',
+    'I need help with fasal bima', 'soil health card', 'kisan credit card apply now', 'hello',
+    # Mixed and noisy
+    'मेरी scheme दिखाओ', 'PM kisan status check', '  HELP  ', 'मदद help मदत', 'my scheme application status',
+    'show documents and profile', '', '...', 'योजना', 'application',
+]
+
+LANGUAGES = ['hindi', 'marathi', 'english', 'tamil']
+
+
+def reference_parse(text, language='hindi'):
+    """IntentParser.parse as it was before the patterns were precompiled."""
+    text_lower = text.lower().strip()
+
+    best_match = None
+    best_confidence = 0.0
+
+    for intent, patterns_by_lang in IntentParser.INTENT_PATTERNS.items():
+        languages_to_check = [language, 'hindi', 'english', 'marathi']
+        seen = set()
+        languages_to_check = [x for x in languages_to_check if not (x in seen or seen.add(x))]
+
+        for lang in languages_to_check:
+            if lang in patterns_by_lang:
+                for pattern in patterns_by_lang[lang]:
+                    if re.search(pattern, text_lower, re.IGNORECASE | re.UNICODE):
+                        confidence = 0.9 if lang == language else 0.7
+                        if confidence > best_confidence:
+                            best_confidence = confidence
+                            best_match = intent
+                        break
+
+    if best_match is not None:
+        entities = {}
+        for pattern in IntentParser.SCHEME_PATTERNS:
+            match = re.search(pattern, text, re.IGNORECASE | re.UNICODE)
+            if match:
+                entities['scheme_mention'] = match.group(0)
+                break
+        return ParsedIntent(intent=best_match, confidence=best_confidence, entities=entities, original_text=text)
+
+    return ParsedIntent(intent=Intent.UNKNOWN, confidence=0.0, entities={}, original_text=text)
+
+
+def random_corpus(count, seed):
+    """Utterances made of words taken from the intent and scheme patterns."""
+    words = set()
+    for patterns_by_lang in IntentParser.INTENT_PATTERNS.values():
+        for patterns in patterns_by_lang.values():
+            for pattern in patterns:
+                words.update(re.findall(r'\w+', pattern))
+    for pattern in IntentParser.SCHEME_PATTERNS:
+        words.update(re.findall(r'\w+', pattern))
+    words = sorted(words) + ['the', 'और', 'आणि', 'please', 'कृपया', 'PM', 'Kisan', '-', '?']
+
+    rng = random.Random(seed)
+    return [' '.join(rng.choice(words) for _ in range(rng.randint(1, 7))) for _ in range(count)]
+
+
+class Command(BaseCommand):
+    help = 'Check IntentParser against the original implementation and time both'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--random', type=int, default=2000, help='Randomly generated utterances')
+        parser.add_argument('--seed', type=int, default=13)
+        parser.add_argument('--repeat', type=int, default=10, help='Benchmark passes over the corpus')
+
+    def handle(self, *args, **options):
+        generated = random_corpus(options['random'], options['seed'])
+
+        mismatches = []
+        checked = 0
+        for text in CORPUS + generated:
+            for language in LANGUAGES:
+                expected, actual = reference_parse(text, language), IntentParser.parse(text, language)
+                checked += 1
+                if expected != actual:
+                    mismatches.append((text, language, expected, actual))
+
+        for text, language, expected, actual in mismatches[:10]:
+            self.stdout.write(
+                f"MISMATCH {language} {text!r}: reference {expected.intent.value}/{expected.confidence}"
+                f"/{expected.entities}, parser {actual.intent.value}/{actual.confidence}/{actual.entities}"
+            )
+        self.stdout.write(f"Equivalence: {checked - len(mismatches)}/{checked} results identical")
+
+        cases = [(text, language) for text in CORPUS for language in LANGUAGES[:3]]
+        timings = {}
+        for name, parse in (('reference', reference_parse), ('compiled', IntentParser.parse)):
+            started = time.perf_counter()
+            for _ in range(options['repeat']):
+                for text, language in cases:
+                    parse(text, language)
+            timings[name] = (time.perf_counter() - started) / (options['repeat'] * len(cases))
+        self.stdout.write(
+            f"Benchmark ({len(cases)} utterances x {options['repeat']}): "
+            f"reference {timings['reference'] * 1e6:.1f} us/parse, "
+            f"compiled {timings['compiled'] * 1e6:.1f} us/parse "
+            f"({timings['reference'] / timings['compiled']:.1f}x)"
+        )
+
+        if mismatches:
+            raise CommandError(f'{len(mismatches)} results differ from the reference parser')
+        self.stdout.write(self.style.SUCCESS('IntentParser matches the reference implementation'))
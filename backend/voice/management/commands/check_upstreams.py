@@ -0,0 +1,214 @@
+"""
+Check the outbound HTTP layer (core/http_client) against a local stub.
+
+Runs the Sarvam stand-in of voice_load_test with injected latency and
+errors, and checks:
+
+  pool      sequential requests through the pooled client share one
+            connection (a client per request opens one each)
+  retries   with a share of the answers 503, retries raise the success
+            rate, and stay within the retry budget
+  breaker   during an outage (every answer 503, after a delay) TTS fails
+            fast once the circuit is open, without reaching the stand-in;
+            once the stand-in recovers, the trial request after the reset
+            time closes the circuit
+  bulkhead  with the Sarvam concurrency cap at 4, 12 concurrent slow
+            requests: 4 are served and the others rejected after the
+            bulkhead wait (from threads, and from an event loop)
+
+Usage:
+    python manage.py check_upstreams
+    python manage.py check_upstreams --requests 400 --failure-rate 0.5
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from core.http_client import (
+    RETRY_BUDGET_MIN_PER_SECOND, RETRY_BUDGET_WINDOW, BulkheadFull, async_http_client, http_client,
+    reset_upstreams, upstream, upstream_stats,
+)
+from voice.services.tts_cache import reset_tts_cache
+from voice.services.voice_bank import reset_voice_bank
+from voice.services.voice_service import VoiceService
+from .voice_load_test import StubServer
+
+
+POLICY = {
+    'HTTP_RETRY_ATTEMPTS': 3,
+    'HTTP_RETRY_BUDGET_RATIO': 0.2,
+    'HTTP_BREAKER_FAILURES': 5,
+    'HTTP_BREAKER_RESET_SECONDS': 1.0,
+    'HTTP_BULKHEAD_WAIT_SECONDS': 0.2,
+    'SARVAM_MAX_CONCURRENCY': 4,
+}
+
+
+class Command(BaseCommand):
+    help = 'Check connection reuse, retries, circuit breaker and bulkhead of the outbound HTTP clients'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Requests for the pool and retry checks')
+        parser.add_argument('--failure-rate', type=float, default=0.3, help='Share of 503 answers in the retry check')
+
+    def handle(self, *args, **options):
+        server = StubServer({'stt': 0, 'llm': 0, 'tts': 0})
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.url = f'{server.url}/text-to-speech'
+        tts_url = VoiceService.SARVAM_TTS_URL
+        VoiceService.SARVAM_TTS_URL = self.url
+
+        failures = []
+        logging.disable(logging.ERROR)  # the failures are injected
+        try:
+            with override_settings(SARVAM_API_KEY='stub', TTS_CACHE_DIR='', VOICE_BANK_DIR='', **POLICY):
+                reset_tts_cache()
+                reset_voice_bank()
+                for check in (self._check_pool, self._check_retries, self._check_breaker, self._check_bulkhead):
+                    server.delays['tts'], server.failures = 0, {}
+                    reset_upstreams()
+                    failures += check(server, options)
+                self.stdout.write(f"\nupstreams: {upstream_stats()}")
+        finally:
+            logging.disable(logging.NOTSET)
+            VoiceService.SARVAM_TTS_URL = tts_url
+            server.shutdown()
+            server.server_close()
+            reset_upstreams()
+            reset_tts_cache()
+            reset_voice_bank()
+
+        if failures:
+            raise CommandError('; '.join(failures))
+        self.stdout.write(self.style.SUCCESS('\nAll upstream checks passed'))
+
+    def _post(self, client=None):
+        """Status of one TTS-shaped request (0: not answered)."""
+        try:
+            return (client or http_client('sarvam')).post(self.url, json={}, timeout=5).status_code
+        except httpx.TransportError:
+            return 0
+
+    def _check_pool(self, server, options):
+        count = options['requests']
+        results = {}
+        for label, client in (('pooled client', None), ('client per request', httpx)):
+            before, started = server.connections, time.perf_counter()
+            for _ in range(count):
+                self._post(client)
+            results[label] = (server.connections - before, (time.perf_counter() - started) / count)
+
+        self.stdout.write(f"\npool: {count} sequential requests")
+        for label, (connections, seconds) in results.items():
+            self.stdout.write(f"  {label:<20} {connections:>4} connections  {1000 * seconds:6.2f} ms/request")
+        if results['pooled client'][0] != 1:
+            return [f"pooled client opened {results['pooled client'][0]} connections"]
+        return []
+
+    def _check_retries(self, server, options):
+        count, rate = options['requests'], options['failure_rate']
+        server.failures = {'tts': rate}
+        results = {}
+        for attempts in (1, POLICY['HTTP_RETRY_ATTEMPTS']):
+            with override_settings(HTTP_RETRY_ATTEMPTS=attempts):
+                reset_upstreams()
+                started = time.perf_counter()
+                ok = sum(self._post() == 200 for _ in range(count))
+                results[attempts] = (ok, time.perf_counter() - started, upstream('sarvam').stats())
+
+        self.stdout.write(f"\nretries: {count} requests, {rate:.0%} answered 503")
+        for attempts, (ok, seconds, stats) in results.items():
+            self.stdout.write(
+                f"  {attempts} attempt(s)  ok {ok / count:6.1%}  retries {stats['retries']:>4}  "
+                f"budget exhausted {stats['budget_exhausted']:>4}  {seconds:5.2f} s"
+            )
+
+        problems = []
+        (plain, _, _), (retried, seconds, stats) = results[1], results[POLICY['HTTP_RETRY_ATTEMPTS']]
+        if rate and retried <= plain:
+            problems.append(f'retries did not raise the success rate ({plain} -> {retried} of {count})')
+        windows = seconds / RETRY_BUDGET_WINDOW + 1
+        allowed = RETRY_BUDGET_MIN_PER_SECOND * RETRY_BUDGET_WINDOW * windows + POLICY['HTTP_RETRY_BUDGET_RATIO'] * count
+        if stats['retries'] > allowed:
+            problems.append(f"{stats['retries']} retries exceed the budget ({allowed:.0f})")
+        return problems
+
+    def _check_breaker(self, server, options):
+        server.delays['tts'], server.failures = 0.2, {'tts': 1.0}
+        calls_before = server.calls['tts']
+        durations = []
+        for i in range(10):
+            started = time.perf_counter()
+            audio = VoiceService.text_to_speech(f'Outage check {i}', 'english')
+            durations.append(time.perf_counter() - started)
+            if audio:
+                return ['TTS succeeded during the outage']
+        reached = server.calls['tts'] - calls_before
+
+        server.delays['tts'], server.failures = 0, {}
+        time.sleep(POLICY['HTTP_BREAKER_RESET_SECONDS'])
+        recovered = VoiceService.text_to_speech('Outage check recovered', 'english')
+        breaker = upstream('sarvam').breaker
+
+        self.stdout.write("\nbreaker: Sarvam outage (503 after 200 ms), 10 TTS calls")
+        self.stdout.write("  per call (ms): " + ' '.join(f'{1000 * seconds:.0f}' for seconds in durations))
+        self.stdout.write(
+            f"  stand-in reached {reached} times; after {POLICY['HTTP_BREAKER_RESET_SECONDS']:.0f} s and recovery: "
+            f"{'audio' if recovered else 'no audio'}, circuit {breaker.state}"
+        )
+
+        problems = []
+        if reached != POLICY['HTTP_BREAKER_FAILURES']:
+            problems.append(f"outage reached the stand-in {reached} times (expected {POLICY['HTTP_BREAKER_FAILURES']})")
+        if max(durations[-5:]) > 0.05:
+            problems.append(f'calls with the circuit open took up to {1000 * max(durations[-5:]):.0f} ms')
+        if not recovered or breaker.state != breaker.CLOSED:
+            problems.append('circuit did not close after the stand-in recovered')
+        return problems
+
+    def _check_bulkhead(self, server, options):
+        server.delays['tts'] = 0.5
+        cap, total = POLICY['SARVAM_MAX_CONCURRENCY'], 12
+
+        def timed_post():
+            started = time.perf_counter()
+            try:
+                status = http_client('sarvam').post(self.url, json={}, timeout=5).status_code
+            except BulkheadFull:
+                status = 'rejected'
+            return status, time.perf_counter() - started
+
+        async def atimed_post():
+            started = time.perf_counter()
+            try:
+                status = (await async_http_client('sarvam').post(self.url, json={}, timeout=5)).status_code
+            except BulkheadFull:
+                status = 'rejected'
+            return status, time.perf_counter() - started
+
+        async def agather():
+            return await asyncio.gather(*(atimed_post() for _ in range(total)))
+
+        with ThreadPoolExecutor(max_workers=total) as pool:
+            threaded = list(pool.map(lambda _: timed_post(), range(total)))
+        looped = asyncio.run(agather())
+
+        self.stdout.write(f"\nbulkhead: {total} concurrent requests (500 ms each), cap {cap}")
+        problems = []
+        for label, results in (('threads', threaded), ('event loop', looped)):
+            served = [seconds for status, seconds in results if status == 200]
+            rejected = [seconds for status, seconds in results if status == 'rejected']
+            self.stdout.write(
+                f"  {label:<10} served {len(served):>2} ({1000 * max(served, default=0):.0f} ms)  "
+                f"rejected {len(rejected):>2} (after {1000 * max(rejected, default=0):.0f} ms)"
+            )
+            if len(served) != cap or len(rejected) != total - cap:
+                problems.append(f'{label}: {len(served)} served, {len(rejected)} rejected with a cap of {cap}')
+        return problems
@@ -0,0 +1,119 @@
+"""
+Check that fixed voice responses never reach TTS at request time.
+
+Builds a voice bank in a temporary directory against a local TTS stand-in
+(the stub server of voice_load_test), then, with a cold memory-only TTS
+cache and no Groq key (regex intents), sends help / unknown utterances in
+every language through VoiceProcessView and the async synthesis path and
+counts the calls the stand-in receives. Help and unknown must make zero
+outbound calls; a templated response (documents count) is composed from
+banked fragments with only its variable part synthesized.
+
+Usage:
+    python manage.py check_voice_bank
+    python manage.py check_voice_bank --farmer <farmer_id>
+"""
+
+import asyncio
+import logging
+import tempfile
+import threading
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from farmers.models import Farmer
+from voice.services.tts_cache import reset_tts_cache
+from voice.services.voice_bank import reset_voice_bank
+from voice.services.voice_service import VoiceService
+from voice.views import VoiceProcessView
+from .voice_load_test import StubServer
+
+
+UTTERANCES = [
+    ('help', 'help', 0),
+    ('unknown', 'qwerty zxcv', 0),
+    ('documents (composed)', 'show my documents', 1),
+]
+LANGUAGES = ['hindi', 'marathi', 'english']
+
+
+class Command(BaseCommand):
+    help = 'Verify that banked voice responses make no TTS calls'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--farmer', help='Farmer ID (default: first farmer)')
+
+    def handle(self, *args, **options):
+        farmer = Farmer.objects.filter(pk=options['farmer']).first() if options['farmer'] else Farmer.objects.first()
+        if farmer is None:
+            raise CommandError('No farmer found')
+
+        server = StubServer({'stt': 0, 'llm': 0, 'tts': 0})
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        tts_url = VoiceService.SARVAM_TTS_URL
+        VoiceService.SARVAM_TTS_URL = f'{server.url}/text-to-speech'
+
+        failures = []
+        try:
+            with tempfile.TemporaryDirectory() as directory, override_settings(
+                SARVAM_API_KEY='stub', GROQ_API_KEY='', VOICE_BANK_DIR=directory,
+                VOICE_BANK_COMPOSE=True, TTS_CACHE_DIR='',
+            ):
+                reset_voice_bank()
+                call_command('build_voice_bank', output=directory, stdout=self.stdout)
+                self.stdout.write(f"Rendering the bank took {server.calls['tts']} TTS calls")
+
+                logging.disable(logging.ERROR)
+                try:
+                    for language in LANGUAGES:
+                        for label, text, allowed in UTTERANCES:
+                            sync_calls, async_calls = self._measure(server, farmer, language, text)
+                            ok = sync_calls <= allowed and async_calls <= allowed
+                            if not ok:
+                                failures.append(f'{language} {label}')
+                            self.stdout.write(
+                                f"{language:<8} {label:<22} sync: {sync_calls} TTS calls, "
+                                f"async: {async_calls} TTS calls{'' if ok else '  <-- expected at most ' + str(allowed)}"
+                            )
+                finally:
+                    logging.disable(logging.NOTSET)
+        finally:
+            VoiceService.SARVAM_TTS_URL = tts_url
+            server.shutdown()
+            server.server_close()
+            reset_voice_bank()
+            reset_tts_cache()
+
+        if failures:
+            raise CommandError('Banked responses reached TTS: ' + ', '.join(failures))
+        self.stdout.write(self.style.SUCCESS('Fixed responses are served from the voice bank'))
+
+    @staticmethod
+    def _calls(server):
+        with server.lock:
+            return server.calls['tts']
+
+    def _measure(self, server, farmer, language, text):
+        """TTS calls made by the WSGI view and by async synthesis, each with a cold cache."""
+        farmer.language = language  # in memory only
+
+        reset_tts_cache()
+        before = self._calls(server)
+        request = APIRequestFactory().post('/api/voice/process/', {'text': text}, format='json')
+        force_authenticate(request, user=farmer)
+        response = VoiceProcessView.as_view()(request)
+        if response.status_code != 200 or response['Content-Type'] != 'audio/wav':
+            raise CommandError(f'{language} "{text}": no audio returned ({response.status_code})')
+        sync_calls = self._calls(server) - before
+
+        reset_tts_cache()
+        speech_text = VoiceProcessView()._handle_intent(
+            VoiceService.map_intent(text, language), farmer, language
+        )['speech_text']
+        before = self._calls(server)
+        if not asyncio.run(VoiceService.asynthesize(speech_text, language)):
+            raise CommandError(f'{language} "{text}": async synthesis returned no audio')
+        return sync_calls, self._calls(server) - before
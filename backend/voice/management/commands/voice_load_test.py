@@ -0,0 +1,300 @@
+"""
+Load test of the voice pipeline against local Sarvam/Groq stub servers.
+
+Starts an in-process HTTP stub that answers speech-to-text, chat
+completions and text-to-speech after a fixed delay, then drives the same
+number of voice sessions (audio upload -> STT -> intent -> handler -> TTS)
+through
+
+  - POST /api/voice/process/ on the WSGI app with --threads threads, like one
+    gunicorn worker with --threads N, and
+  - POST /api/voice/process/async/ on the ASGI app from one event loop, like
+    one uvicorn worker.
+
+and reports throughput, latency and the average number of sessions in
+flight (concurrent voice sessions per worker).
+
+Usage:
+    python manage.py voice_load_test
+    python manage.py voice_load_test --sessions 128 --threads 4 --concurrency 64
+    python manage.py voice_load_test --stt-delay 0.8 --llm-delay 0.4 --tts-delay 0.6
+"""
+
+import asyncio
+import base64
+import io
+import json
+import logging
+import os
+import random
+import statistics
+import threading
+import time
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from core.http_client import reset_upstreams
+from farmers.models import Farmer
+from voice.services.llm_gateway import reset_llm_gateway
+from voice.services.tts_cache import reset_tts_cache
+from voice.services.voice_bank import reset_voice_bank
+from voice.services.voice_replay import reset_voice_replays
+from voice.services.voice_service import VoiceService
+
+
+TRANSCRIPT = 'मेरी योजनाएं दिखाओ'
+INTENT_ANSWER = {'intent': 'show_eligible_schemes', 'confidence': 0.95, 'entities': {}}
+
+
+def _silence_wav(seconds=0.2, rate=22050):
+    output = io.BytesIO()
+    with wave.open(output, 'wb') as writer:
+        writer.setnchannels(1)
+        writer.setsampwidth(2)
+        writer.setframerate(rate)
+        writer.writeframes(b'\x00\x00' * int(seconds * rate))
+    return output.getvalue()
+
+
+class StubServer(ThreadingHTTPServer):
+    """
+    Sarvam + Groq look-alike with fixed response delays. A share of the
+    requests of a kind can be answered 503 instead (failures, 1.0: outage).
+    """
+    daemon_threads = True
+    request_queue_size = 256
+
+    def __init__(self, delays, failures=None):
+        super().__init__(('127.0.0.1', 0), StubHandler)
+        self.delays = delays
+        self.failures = failures or {}
+        self.audio = base64.b64encode(_silence_wav()).decode()
+        self.calls = {'stt': 0, 'llm': 0, 'tts': 0}
+        self.connections = 0
+        self.lock = threading.Lock()
+
+    def process_request(self, request, client_address):
+        with self.lock:
+            self.connections += 1
+        super().process_request(request, client_address)
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.server_address[1]}'
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True  # headers and body go out in separate writes
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        request = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        if self.path.endswith('/speech-to-text'):
+            kind, body = 'stt', {'transcript': TRANSCRIPT, 'language_code': 'hi-IN'}
+        elif self.path.endswith('/text-to-speech'):
+            kind, body = 'tts', {'audios': [self.server.audio]}
+        elif self.path.endswith('/chat/completions'):
+            content = json.dumps(INTENT_ANSWER)
+            prompt = sum(len(message['content']) for message in json.loads(request)['messages'])
+            kind, body = 'llm', {
+                'id': 'stub', 'object': 'chat.completion', 'created': 0, 'model': 'stub',
+                'choices': [{
+                    'index': 0, 'finish_reason': 'stop',
+                    'message': {'role': 'assistant', 'content': content},
+                }],
+                # Estimated at 4 characters per token
+                'usage': {
+                    'prompt_tokens': prompt // 4, 'completion_tokens': len(content) // 4,
+                    'total_tokens': (prompt + len(content)) // 4,
+                },
+            }
+        else:
+            self.send_error(404)
+            return
+
+        with self.server.lock:
+            self.server.calls[kind] += 1
+        time.sleep(self.server.delays[kind])
+
+        status = 200
+        if random.random() < self.server.failures.get(kind, 0):
+            status, body = 503, {'error': {'message': 'Service unavailable (stub)'}}
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class Command(BaseCommand):
+    help = 'Compare concurrent voice sessions per worker: WSGI threads vs the ASGI pipeline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--farmer', help='Farmer ID (default: first farmer with a complete profile)')
+        parser.add_argument('--sessions', type=int, default=64, help='Voice sessions per mode')
+        parser.add_argument('--threads', type=int, default=4, help='WSGI threads per worker')
+        parser.add_argument('--concurrency', type=int, default=64, help='Concurrent sessions sent to the ASGI app')
+        parser.add_argument('--stt-delay', type=float, default=0.5)
+        parser.add_argument('--llm-delay', type=float, default=0.3)
+        parser.add_argument('--tts-delay', type=float, default=0.4)
+
+    def handle(self, *args, **options):
+        farmer = self._get_farmer(options['farmer'])
+        token = RefreshToken()
+        token['farmer_id'] = str(farmer.id)
+        headers = {'Authorization': f'Bearer {token.access_token}'}
+        audio = _silence_wav(seconds=1.0, rate=16000)
+
+        server = StubServer({
+            'stt': options['stt_delay'], 'llm': options['llm_delay'], 'tts': options['tts_delay'],
+        })
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        stt_url, tts_url = VoiceService.SARVAM_STT_URL, VoiceService.SARVAM_TTS_URL
+        groq_base_url = os.environ.get('GROQ_BASE_URL')
+        VoiceService.SARVAM_STT_URL = f'{server.url}/speech-to-text'
+        VoiceService.SARVAM_TTS_URL = f'{server.url}/text-to-speech'
+        os.environ['GROQ_BASE_URL'] = server.url
+        logging.disable(logging.WARNING)
+        try:
+            # Stub audio must never reach the real TTS cache or voice bank.
+            # Every session sends the same clip: replaying it would skip the
+            # pipeline. Concurrency caps would measure the bulkheads.
+            with override_settings(SARVAM_API_KEY='stub', GROQ_API_KEY='stub', TTS_CACHE_DIR='', VOICE_BANK_DIR='',
+                                   VOICE_REPLAY_TTL_SECONDS=0, SARVAM_MAX_CONCURRENCY=0, GROQ_MAX_CONCURRENCY=0):
+                reset_tts_cache()
+                reset_voice_bank()
+                reset_voice_replays()
+                reset_upstreams()
+                reset_llm_gateway()
+                wsgi = self._run_wsgi(headers, audio, options['sessions'], options['threads'])
+                reset_tts_cache()
+                asgi = asyncio.run(self._run_asgi(headers, audio, options['sessions'], options['concurrency']))
+                results = [
+                    ('WSGI', f"{options['threads']} threads", wsgi),
+                    ('ASGI', '1 event loop', asgi),
+                ]
+        finally:
+            logging.disable(logging.NOTSET)
+            reset_tts_cache()
+            reset_voice_bank()
+            reset_voice_replays()
+            reset_upstreams()
+            reset_llm_gateway()
+            VoiceService.SARVAM_STT_URL, VoiceService.SARVAM_TTS_URL = stt_url, tts_url
+            if groq_base_url is None:
+                os.environ.pop('GROQ_BASE_URL', None)
+            else:
+                os.environ['GROQ_BASE_URL'] = groq_base_url
+            server.shutdown()
+            server.server_close()
+
+        stub_latency = options['stt_delay'] + options['llm_delay'] + options['tts_delay']
+        self.stdout.write(
+            f"{options['sessions']} sessions per mode, stub latency "
+            f"{stub_latency:.2f}s per session (stub calls: {server.calls})"
+        )
+        for mode, workers, (elapsed, latencies, errors) in results:
+            self._report(mode, workers, elapsed, latencies, errors)
+        if any(errors for _, _, (_, _, errors) in results):
+            raise CommandError('Some voice sessions failed')
+
+    def _get_farmer(self, farmer_id):
+        if farmer_id:
+            farmer = Farmer.objects.filter(pk=farmer_id).first()
+        else:
+            farmer = next((f for f in Farmer.objects.all().iterator() if f.is_profile_complete), None)
+        if farmer is None:
+            raise CommandError('No farmer with a complete profile found')
+        return farmer
+
+    @staticmethod
+    def _check(response):
+        if response.status_code != 200 or response.headers.get('content-type') != 'audio/wav':
+            raise RuntimeError(f'HTTP {response.status_code}: {response.text[:200]}')
+
+    def _run_wsgi(self, headers, audio, sessions, threads):
+        from django.core.wsgi import get_wsgi_application
+
+        app = get_wsgi_application()
+        local = threading.local()
+
+        def session(_):
+            client = getattr(local, 'client', None)
+            if client is None:
+                client = local.client = httpx.Client(
+                    transport=httpx.WSGITransport(app=app), base_url='http://localhost'
+                )
+            started = time.perf_counter()
+            response = client.post(
+                '/api/voice/process/', headers=headers,
+                files={'audio': ('voice.wav', audio, 'audio/wav')},
+            )
+            self._check(response)
+            return time.perf_counter() - started
+
+        return self._collect(lambda: ThreadPoolExecutor(max_workers=threads), session, sessions)
+
+    def _collect(self, make_pool, session, sessions):
+        latencies, errors = [], []
+        started = time.perf_counter()
+        with make_pool() as pool:
+            for future in [pool.submit(session, i) for i in range(sessions)]:
+                try:
+                    latencies.append(future.result())
+                except Exception as e:
+                    errors.append(str(e))
+        return time.perf_counter() - started, latencies, errors
+
+    async def _run_asgi(self, headers, audio, sessions, concurrency):
+        from django.core.asgi import get_asgi_application
+
+        app = get_asgi_application()
+        limit = asyncio.Semaphore(concurrency)
+        latencies, errors = [], []
+
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url='http://localhost', timeout=120
+        ) as client:
+            async def session():
+                async with limit:
+                    started = time.perf_counter()
+                    try:
+                        response = await client.post(
+                            '/api/voice/process/async/', headers=headers,
+                            files={'audio': ('voice.wav', audio, 'audio/wav')},
+                        )
+                        self._check(response)
+                        latencies.append(time.perf_counter() - started)
+                    except Exception as e:
+                        errors.append(str(e))
+
+            started = time.perf_counter()
+            await asyncio.gather(*(session() for _ in range(sessions)))
+            return time.perf_counter() - started, latencies, errors
+
+    def _report(self, mode, workers, elapsed, latencies, errors):
+        if not latencies:
+            self.stdout.write(f"{mode} ({workers}): all {len(errors)} sessions failed: {errors[:1]}")
+            return
+        latencies.sort()
+        throughput = len(latencies) / elapsed
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        # Little's law: sessions in flight = throughput x time per session
+        in_flight = throughput * statistics.mean(latencies)
+        self.stdout.write(
+            f"{mode} ({workers}): {throughput:6.1f} sessions/s, "
+            f"p50 {statistics.median(latencies):.2f}s, p95 {p95:.2f}s, "
+            f"{in_flight:5.1f} concurrent sessions per worker"
+            + (f", {len(errors)} failed: {errors[:1]}" if errors else '')
+        )
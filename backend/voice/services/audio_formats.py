@@ -0,0 +1,297 @@
+"""
+Voice App - Response Audio Formats
+Negotiates and produces compact encodings of spoken responses.
+
+TTS audio is synthesized, cached and banked once, as 22050 Hz 16-bit WAV.
+Clients on slow links can ask for a smaller rendition, which is transcoded
+locally on first use and kept in a small in-process LRU:
+
+    name        rate      encoding                     size vs. wav
+    wav         as is     16-bit PCM (default)         1
+    wav-16k     16 kHz    16-bit PCM                   0.73
+    wav-8k      8 kHz     16-bit PCM                   0.36
+    ulaw-16k    16 kHz    G.711 mu-law, 8 bit          0.36
+    ulaw-8k     8 kHz     G.711 mu-law, 8 bit          0.18
+    adpcm-16k   16 kHz    IMA ADPCM, 4 bit             0.19
+    adpcm-8k    8 kHz     IMA ADPCM, 4 bit             0.09
+
+All of them are WAV files (audio/wav). The format is picked from the
+`audio_format` query parameter / body field, or else from the Accept
+header: audio/wav (also audio/vnd.wave, audio/wave, audio/x-wav) with a
+`codec` parameter (pcm, ulaw, adpcm, or the RFC 2361 ids 1, 7, 11) and a
+`rate` parameter (8000, 16000), by q-value. Keep application/json in such
+an Accept header: errors and TTS fallbacks are JSON.
+"""
+
+import hashlib
+import struct
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from django.conf import settings
+
+from .audio_preprocess import decode_wav, encode_wav, resample
+
+
+@dataclass(frozen=True)
+class AudioFormat:
+    name: str
+    rate: Optional[int]  # None: keep the synthesized rate
+    codec: str           # pcm / ulaw / adpcm
+
+
+DEFAULT_FORMAT = 'wav'
+
+FORMATS: Dict[str, AudioFormat] = {
+    fmt.name: fmt for fmt in (
+        AudioFormat('wav', None, 'pcm'),
+        AudioFormat('wav-16k', 16000, 'pcm'),
+        AudioFormat('wav-8k', 8000, 'pcm'),
+        AudioFormat('ulaw-16k', 16000, 'ulaw'),
+        AudioFormat('ulaw-8k', 8000, 'ulaw'),
+        AudioFormat('adpcm-16k', 16000, 'adpcm'),
+        AudioFormat('adpcm-8k', 8000, 'adpcm'),
+    )
+}
+
+WAV_MEDIA_TYPES = {'audio/wav', 'audio/wave', 'audio/x-wav', 'audio/vnd.wave'}
+
+# Accept header codec values, including RFC 2361 WAVE format ids (hex)
+CODEC_NAMES = {
+    'pcm': 'pcm', '1': 'pcm',
+    'ulaw': 'ulaw', 'mulaw': 'ulaw', 'mu-law': 'ulaw', '7': 'ulaw',
+    'adpcm': 'adpcm', 'ima-adpcm': 'adpcm', '11': 'adpcm',
+}
+
+
+# ============================================================
+# Negotiation
+# ============================================================
+
+def _format_for(codec: str, rate: Optional[int]) -> Optional[str]:
+    """Format with the codec and rate; without a rate, the codec's most compact one."""
+    if codec == 'pcm' and rate is None:
+        return DEFAULT_FORMAT
+    matches = [fmt for fmt in FORMATS.values() if fmt.codec == codec and (rate is None or fmt.rate == rate)]
+    return min(matches, key=lambda fmt: fmt.rate).name if matches else None
+
+
+def parse_accept(header: str) -> Optional[str]:
+    """Best supported format in an Accept header, or None."""
+    choices = []
+    for position, item in enumerate((header or '').split(',')):
+        media_type, *params = [part.strip() for part in item.split(';')]
+        if media_type.lower() not in WAV_MEDIA_TYPES:
+            continue
+        values = {}
+        for param in params:
+            key, _, value = param.partition('=')
+            values[key.strip().lower()] = value.strip().strip('"').lower()
+        try:
+            quality = float(values.get('q', 1))
+        except ValueError:
+            quality = 0
+        codec = CODEC_NAMES.get(values.get('codec', values.get('codecs', 'pcm')))
+        try:
+            rate = int(values['rate']) if 'rate' in values else None
+        except ValueError:
+            rate = None
+        name = _format_for(codec, rate) if codec else None
+        if name and quality > 0:
+            choices.append((-quality, position, name))
+    return min(choices)[2] if choices else None
+
+
+def negotiate_format(request, data) -> str:
+    """Response audio format for a request (audio_format param, Accept header, default)."""
+    requested = data.get('audio_format', request.GET.get('audio_format', ''))
+    requested = str(requested or '').strip().lower()
+    if requested in FORMATS:
+        return requested
+    return parse_accept(request.META.get('HTTP_ACCEPT', '')) or DEFAULT_FORMAT
+
+
+# ============================================================
+# Encoders
+# ============================================================
+
+def _riff(fmt_chunk: bytes, data: bytes, frames: Optional[int] = None) -> bytes:
+    """RIFF/WAVE file from a fmt chunk body and data (plus fact chunk for compressed data)."""
+    chunks = [b'fmt ', struct.pack('<I', len(fmt_chunk)), fmt_chunk]
+    if frames is not None:
+        chunks += [b'fact', struct.pack('<II', 4, frames)]
+    chunks += [b'data', struct.pack('<I', len(data)), data]
+    if len(data) % 2:
+        chunks.append(b'\x00')
+    body = b''.join(chunks)
+    return b'RIFF' + struct.pack('<I', 4 + len(body)) + b'WAVE' + body
+
+
+def _to_int16(samples) -> np.ndarray:
+    return (np.clip(samples, -1.0, 1.0) * 32767.0).round().astype(np.int32)
+
+
+def encode_ulaw(samples, rate: int) -> bytes:
+    """G.711 mu-law WAV (format 7) of float samples in -1..1."""
+    pcm = _to_int16(samples)
+    sign = (pcm < 0).astype(np.int32) << 7
+    magnitude = np.minimum(np.abs(pcm), 32635) + 0x84
+    exponent = np.clip(np.floor(np.log2(magnitude)).astype(np.int32) - 7, 0, 7)
+    mantissa = (magnitude >> (exponent + 3)) & 0x0F
+    data = (~(sign | (exponent << 4) | mantissa) & 0xFF).astype(np.uint8).tobytes()
+    fmt_chunk = struct.pack('<HHIIHHH', 7, 1, rate, rate, 1, 8, 0)
+    return _riff(fmt_chunk, data, frames=len(pcm))
+
+
+IMA_INDEX_TABLE = np.array([-1, -1, -1, -1, 2, 4, 6, 8] * 2, dtype=np.int32)
+IMA_STEP_TABLE = np.array([
+    7, 8, 9, 10, 11, 12, 13, 14, 16, 17, 19, 21, 23, 25, 28, 31, 34, 37, 41, 45,
+    50, 55, 60, 66, 73, 80, 88, 97, 107, 118, 130, 143, 157, 173, 190, 209, 230,
+    253, 279, 307, 337, 371, 408, 449, 494, 544, 598, 658, 724, 796, 876, 963,
+    1060, 1166, 1282, 1411, 1552, 1707, 1878, 2066, 2272, 2499, 2749, 3024, 3327,
+    3660, 4026, 4428, 4871, 5358, 5894, 6484, 7132, 7845, 8630, 9493, 10442, 11487,
+    12635, 13899, 15289, 16818, 18500, 20350, 22385, 24623, 27086, 29794, 32767,
+], dtype=np.int32)
+
+
+def encode_ima_adpcm(samples, rate: int) -> bytes:
+    """
+    IMA ADPCM WAV (format 0x11) of float samples in -1..1. Blocks are
+    independent (each starts from its own predictor and step index), so
+    all blocks are encoded together, one sample position at a time.
+    """
+    # Short blocks: fewer sequential steps, 1.6% header overhead
+    block_align = 256
+    per_block = (block_align - 4) * 2 + 1
+    pcm = _to_int16(samples)
+    frames = len(pcm)
+    blocks = max(1, -(-frames // per_block))
+    padded = np.zeros(blocks * per_block, dtype=np.int32)
+    padded[:frames] = pcm
+    grid = padded.reshape(blocks, per_block)
+
+    predictor = grid[:, 0].copy()
+    # Start each block with a step size matching its opening slope
+    opening = np.abs(np.diff(grid[:, :9], axis=1)).mean(axis=1)
+    index = np.clip(np.searchsorted(IMA_STEP_TABLE, opening), 0, 88).astype(np.int32)
+    first_index = index.copy()
+
+    codes = np.empty((blocks, per_block - 1), dtype=np.int32)
+    for position in range(1, per_block):
+        step = IMA_STEP_TABLE[index]
+        diff = grid[:, position] - predictor
+        code = np.where(diff < 0, 8, 0)
+        diff = np.abs(diff)
+        delta = step >> 3
+        for bit, share in ((4, step), (2, step >> 1), (1, step >> 2)):
+            hit = diff >= share
+            code |= np.where(hit, bit, 0)
+            diff = np.where(hit, diff - share, diff)
+            delta = np.where(hit, delta + share, delta)
+        predictor = np.clip(np.where(code & 8, predictor - delta, predictor + delta), -32768, 32767)
+        index = np.clip(index + IMA_INDEX_TABLE[code], 0, 88)
+        codes[:, position - 1] = code
+
+    packed = (codes[:, 0::2] | (codes[:, 1::2] << 4)).astype(np.uint8)
+    headers = np.zeros((blocks, 4), dtype=np.uint8)
+    headers[:, 0:2] = grid[:, 0].astype('<i2').view(np.uint8).reshape(blocks, 2)
+    headers[:, 2] = first_index
+    data = np.concatenate([headers, packed], axis=1).tobytes()
+
+    byte_rate = rate * block_align // per_block
+    fmt_chunk = struct.pack('<HHIIHHHH', 0x11, 1, rate, byte_rate, block_align, 4, 2, per_block)
+    return _riff(fmt_chunk, data, frames=frames)
+
+
+def encode(audio: bytes, fmt: AudioFormat) -> Optional[bytes]:
+    """The WAV audio in another format, or None if it cannot be decoded."""
+    decoded = decode_wav(audio)
+    if decoded is None:
+        return None
+    samples, rate = decoded
+    mono = samples.mean(axis=1) if samples.shape[1] > 1 else samples[:, 0]
+    target = min(rate, fmt.rate or rate)  # never upsample
+    mono = resample(mono, rate, target)
+    if fmt.codec == 'ulaw':
+        return encode_ulaw(mono, target)
+    if fmt.codec == 'adpcm':
+        return encode_ima_adpcm(mono, target)
+    return encode_wav(mono, target)
+
+
+# ============================================================
+# Lazy transcoding
+# ============================================================
+
+class TranscodeCache:
+    """LRU of transcoded audio keyed by (digest of the source WAV, format)."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: 'OrderedDict[Tuple[bytes, str], bytes]' = OrderedDict()
+        self._used = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            audio = self._entries.get(key)
+            if audio is not None:
+                self._entries.move_to_end(key)
+            return audio
+
+    def put(self, key, audio: bytes):
+        if len(audio) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._used -= len(previous)
+            self._entries[key] = audio
+            self._used += len(audio)
+            while self._used > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._used -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._used = 0
+
+
+_transcode_cache: Optional[TranscodeCache] = None
+_transcode_cache_lock = threading.Lock()
+
+
+def get_transcode_cache() -> TranscodeCache:
+    global _transcode_cache
+    if _transcode_cache is None:
+        with _transcode_cache_lock:
+            if _transcode_cache is None:
+                _transcode_cache = TranscodeCache(
+                    int(getattr(settings, 'AUDIO_FORMAT_CACHE_MB', 16) * 1024 * 1024)
+                )
+    return _transcode_cache
+
+
+def transcode(audio: bytes, name: str) -> Tuple[bytes, str]:
+    """
+    (audio, format name) of synthesized WAV audio in the requested format;
+    the original audio and DEFAULT_FORMAT if it cannot be transcoded.
+    """
+    fmt = FORMATS.get(name)
+    if fmt is None or name == DEFAULT_FORMAT or not audio:
+        return audio, DEFAULT_FORMAT
+
+    key = (hashlib.blake2b(audio, digest_size=16).digest(), name)
+    cache = get_transcode_cache()
+    converted = cache.get(key)
+    if converted is None:
+        converted = encode(audio, fmt)
+        if converted is None:
+            return audio, DEFAULT_FORMAT
+        cache.put(key, converted)
+    return converted, name
+
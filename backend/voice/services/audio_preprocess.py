@@ -0,0 +1,207 @@
+"""
+Voice App - STT Audio Preprocessing
+Shrinks PCM WAV clips before they are uploaded to Sarvam STT.
+
+Farmers hold the mic button well before and after speaking, and phones
+record at 44.1/48 kHz, often in stereo. For WAV uploads this stage
+
+  1. decodes the PCM samples (8/16/24/32-bit) with NumPy
+  2. downmixes to mono
+  3. trims leading and trailing silence with an energy VAD: 30 ms frames
+     are speech when their level is clearly above the clip's noise floor;
+     a little padding is kept around the speech. The floor is taken no
+     higher than VAD_SPEECH_RANGE_DB below the loud speech, so a quiet
+     first word in a clip without silence is not mistaken for noise
+  4. resamples to STT_SAMPLE_RATE (16 kHz, what STT models use) with an
+     FFT band-limited resampler
+  5. re-encodes as 16-bit mono WAV
+
+Compressed formats (m4a/AAC, MP3, Ogg, ...) would need a decoder such as
+ffmpeg and are passed through unchanged, as are clips the stage cannot
+make smaller. Bytes in/out are counted per process (preprocess_stats).
+"""
+
+import io
+import threading
+import wave
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+FRAME_SECONDS = 0.03
+# Speech padding kept before the first / after the last voiced frame
+LEAD_PAD_SECONDS = 0.2
+TRAIL_PAD_SECONDS = 0.3
+# A frame is voiced when it is this much above the noise floor ...
+VAD_MARGIN_DB = 12.0
+# ... and above this absolute level (dBFS)
+VAD_MIN_DB = -50.0
+# The noise floor is at least this far below the loud speech (90th
+# percentile frame level); quieter floors are taken as measured
+VAD_SPEECH_RANGE_DB = 40.0
+
+
+@dataclass
+class PreprocessedAudio:
+    """Result of preprocess_wav."""
+    audio: bytes
+    original_bytes: int
+    original_rate: int
+    original_channels: int
+    original_seconds: float
+    rate: int
+    seconds: float
+
+    @property
+    def bytes_saved(self) -> int:
+        return self.original_bytes - len(self.audio)
+
+
+# ============================================================
+# Decoding / encoding
+# ============================================================
+
+def decode_wav(content: bytes):
+    """(float32 samples [frames x channels] in -1..1, sample rate), or None."""
+    try:
+        with wave.open(io.BytesIO(content), 'rb') as reader:
+            channels = reader.getnchannels()
+            width = reader.getsampwidth()
+            rate = reader.getframerate()
+            raw = reader.readframes(reader.getnframes())
+    except (wave.Error, EOFError):
+        return None  # not RIFF/PCM (e.g. float or compressed WAV)
+
+    if width == 1:
+        samples = (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    elif width == 2:
+        samples = np.frombuffer(raw, dtype='<i2').astype(np.float32) / 32768.0
+    elif width == 3:
+        data = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        values = data[:, 0] | (data[:, 1] << 8) | (data[:, 2] << 16)
+        values = np.where(values & 0x800000, values - 0x1000000, values)
+        samples = values.astype(np.float32) / 8388608.0
+    elif width == 4:
+        samples = np.frombuffer(raw, dtype='<i4').astype(np.float32) / 2147483648.0
+    else:
+        return None
+
+    frames = len(samples) // channels
+    return samples[:frames * channels].reshape(frames, channels), rate
+
+
+def encode_wav(samples, rate: int) -> bytes:
+    """16-bit mono WAV of float samples in -1..1."""
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767.0).round().astype('<i2')
+    output = io.BytesIO()
+    with wave.open(output, 'wb') as writer:
+        writer.setnchannels(1)
+        writer.setsampwidth(2)
+        writer.setframerate(rate)
+        writer.writeframes(pcm.tobytes())
+    return output.getvalue()
+
+
+# ============================================================
+# Processing
+# ============================================================
+
+def voiced_range(samples, rate: int):
+    """(start, end) sample indices of the speech, padded; None if none found."""
+    frame = max(1, int(rate * FRAME_SECONDS))
+    count = len(samples) // frame
+    if count == 0:
+        return None
+
+    frames = samples[:count * frame].reshape(count, frame)
+    energy = np.sqrt(np.mean(frames.astype(np.float64) ** 2, axis=1))
+    level = 20.0 * np.log10(np.maximum(energy, 1e-10))
+
+    # Without leading silence the 10th percentile can be a quiet word
+    noise_floor = min(np.percentile(level, 10), np.percentile(level, 90) - VAD_SPEECH_RANGE_DB)
+    voiced = np.flatnonzero(level > max(noise_floor + VAD_MARGIN_DB, VAD_MIN_DB))
+    if len(voiced) == 0:
+        return None
+
+    start = max(0, voiced[0] * frame - int(rate * LEAD_PAD_SECONDS))
+    end = min(len(samples), (voiced[-1] + 1) * frame + int(rate * TRAIL_PAD_SECONDS))
+    return start, end
+
+
+def resample(samples, rate: int, target: int):
+    """Band-limited resampling of mono samples (FFT: drops content above target/2)."""
+    if rate == target or len(samples) == 0:
+        return samples
+    size = max(1, int(round(len(samples) * target / rate)))
+    spectrum = np.fft.rfft(samples.astype(np.float64))
+    bins = size // 2 + 1
+    if bins <= len(spectrum):
+        spectrum = spectrum[:bins]
+    else:
+        spectrum = np.concatenate([spectrum, np.zeros(bins - len(spectrum), dtype=spectrum.dtype)])
+    return (np.fft.irfft(spectrum, size) * (size / len(samples))).astype(np.float32)
+
+
+def preprocess_wav(content: bytes, target_rate: int = 16000) -> Optional[PreprocessedAudio]:
+    """
+    Trimmed 16-bit mono WAV at target_rate (never upsampled), or None if the
+    content is not PCM WAV or would not get smaller.
+    """
+    decoded = decode_wav(content)
+    if decoded is None:
+        return None
+    samples, rate = decoded
+    original_seconds = len(samples) / rate if rate else 0.0
+
+    mono = samples.mean(axis=1) if samples.shape[1] > 1 else samples[:, 0]
+    span = voiced_range(mono, rate)
+    if span is not None:
+        mono = mono[span[0]:span[1]]
+
+    output_rate = min(rate, target_rate)
+    audio = encode_wav(resample(mono, rate, output_rate), output_rate)
+    if len(audio) >= len(content):
+        return None
+
+    return PreprocessedAudio(
+        audio=audio,
+        original_bytes=len(content),
+        original_rate=rate,
+        original_channels=samples.shape[1],
+        original_seconds=original_seconds,
+        rate=output_rate,
+        seconds=len(mono) / rate,
+    )
+
+
+# ============================================================
+# Statistics
+# ============================================================
+
+class PreprocessStats:
+    """Clips seen / shrunk and bytes in / out, per process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {'clips': 0, 'processed': 0, 'bytes_in': 0, 'bytes_out': 0, 'seconds_trimmed': 0.0}
+
+    def record(self, original_bytes: int, result: Optional[PreprocessedAudio]):
+        with self._lock:
+            self._counters['clips'] += 1
+            self._counters['bytes_in'] += original_bytes
+            if result is None:
+                self._counters['bytes_out'] += original_bytes
+            else:
+                self._counters['processed'] += 1
+                self._counters['bytes_out'] += len(result.audio)
+                self._counters['seconds_trimmed'] += result.original_seconds - result.seconds
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._counters)
+        stats['bytes_saved'] = stats['bytes_in'] - stats['bytes_out']
+        return stats
+
+
+preprocess_stats = PreprocessStats()
@@ -0,0 +1,184 @@
+"""
+Voice App - Intent Memoization
+Caches LLM intent answers by normalized transcript.
+
+Farmers repeat the same few commands, so the Groq answer for an utterance
+is kept (per process) under its language plus a normalized transcript:
+Unicode NFC, case folded, punctuation/symbols folded into spaces,
+zero-width format characters dropped, any decimal digit (Devanagari ३,
+...) mapped to ASCII and whitespace collapsed.
+"मेरी योजनाएं दिखाओ।" and "मेरी  योजनाएं दिखाओ" share one entry.
+
+Entries expire after INTENT_CACHE_TTL_SECONDS and the least recently used
+ones are dropped beyond INTENT_CACHE_MAX_ENTRIES.
+
+Concurrent misses for the same key are coalesced (singleflight): one
+caller asks the LLM, the others wait for its answer.
+"""
+
+import asyncio
+import concurrent.futures
+import copy
+import threading
+import time
+import unicodedata
+import weakref
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from django.conf import settings
+
+from .intent_parser import ParsedIntent
+
+
+def normalize_transcript(text: str) -> str:
+    """Canonical form of a transcript for cache lookups."""
+    text = unicodedata.normalize('NFC', text or '').casefold()
+    chars = []
+    for ch in text:
+        category = unicodedata.category(ch)
+        if category == 'Nd':
+            chars.append(str(unicodedata.digit(ch)))
+        elif category == 'Cf':
+            continue  # zero-width joiners and the like
+        elif category[0] in 'PSZC':
+            chars.append(' ')
+        else:
+            chars.append(ch)
+    return ' '.join(''.join(chars).split())
+
+
+def rebind(parsed: ParsedIntent, text: str) -> ParsedIntent:
+    """Copy of a cached result for another utterance of the same key."""
+    return ParsedIntent(
+        intent=parsed.intent,
+        confidence=parsed.confidence,
+        entities=copy.deepcopy(parsed.entities),
+        original_text=text,
+    )
+
+
+class IntentCache:
+    """TTL + LRU bounded map of (language, normalized transcript) -> ParsedIntent."""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: 'OrderedDict[Tuple[str, str], Tuple[float, ParsedIntent]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(text: str, language: str) -> Tuple[str, str]:
+        return language or '', normalize_transcript(text)
+
+    def get(self, key: Tuple[str, str], text: str) -> Optional[ParsedIntent]:
+        """Cached result for the key, re-bound to `text`, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, parsed = entry
+            if expires <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+        return rebind(parsed, text)
+
+    def put(self, key: Tuple[str, str], parsed: ParsedIntent):
+        if self.max_entries <= 0 or self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, rebind(parsed, parsed.original_text))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# ============================================================
+# Singleflight
+# ============================================================
+
+class SingleFlight:
+    """Coalesces concurrent blocking calls with the same key."""
+
+    def __init__(self):
+        self._flights: Dict[Any, concurrent.futures.Future] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn: Callable[[], Any], timeout: Optional[float] = None) -> Tuple[Any, bool]:
+        """(fn's result, whether it came from another caller's call)."""
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = concurrent.futures.Future()
+
+        if not leader:
+            return flight.result(timeout=timeout), True
+
+        try:
+            result = fn()
+        except BaseException as e:
+            flight.set_exception(e)
+            raise
+        else:
+            flight.set_result(result)
+            return result, False
+        finally:
+            with self._lock:
+                del self._flights[key]
+
+
+class AsyncSingleFlight:
+    """
+    Coalesces concurrent coroutine calls with the same key (per event loop).
+    The shared call runs as its own task, so a cancelled caller does not
+    cancel it for the others.
+    """
+
+    def __init__(self):
+        self._flights = weakref.WeakKeyDictionary()  # loop -> {key: task}
+
+    async def do(self, key, make_coro: Callable[[], Any]) -> Tuple[Any, bool]:
+        loop = asyncio.get_running_loop()
+        flights = self._flights.setdefault(loop, {})
+        task = flights.get(key)
+        shared = task is not None
+        if not shared:
+            task = flights[key] = loop.create_task(make_coro())
+            task.add_done_callback(lambda _: flights.pop(key, None))
+        return await asyncio.shield(task), shared
+
+
+_intent_cache: Optional[IntentCache] = None
+_intent_cache_lock = threading.Lock()
+
+intent_flights = SingleFlight()
+async_intent_flights = AsyncSingleFlight()
+
+
+def get_intent_cache() -> IntentCache:
+    """Process-wide intent cache configured from settings."""
+    global _intent_cache
+    if _intent_cache is None:
+        with _intent_cache_lock:
+            if _intent_cache is None:
+                _intent_cache = IntentCache(
+                    max_entries=int(getattr(settings, 'INTENT_CACHE_MAX_ENTRIES', 5000)),
+                    ttl=float(getattr(settings, 'INTENT_CACHE_TTL_SECONDS', 6 * 3600)),
+                )
+    return _intent_cache
+
+
+def reset_intent_cache():
+    """Recreate the cache from settings on next use."""
+    global _intent_cache
+    with _intent_cache_lock:
+        _intent_cache = None
@@ -4,7 +4,7 @@ Parses voice text input into structured intents
 """
 
 import re
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 from dataclasses import dataclass
 from enum import Enum
 
@@ -150,6 +150,19 @@ class IntentParser:
         }
     }
     
+    # Scheme names worth passing on as entities; the first pattern (in this
+    # order) found in the text wins
+    SCHEME_PATTERNS = [
+        r'(pm[-\s]?kisan|पीएम[-\s]?किसान|प्रधानमंत्री[-\s]?किसान)',
+        r'(fasal bima|फसल बीमा)',
+        r'(kisan credit|किसान क्रेडिट)',
+        r'(soil health|मृदा स्वास्थ्य)',
+    ]
+
+    # Confidence of a match in the preferred language / in any other language
+    PREFERRED_CONFIDENCE = 0.9
+    OTHER_CONFIDENCE = 0.7
+
     @classmethod
     def parse(cls, text: str, language: str = 'hindi') -> ParsedIntent:
         """
@@ -163,35 +176,22 @@ class IntentParser:
             ParsedIntent with detected intent and confidence
         """
         text_lower = text.lower().strip()
-        
-        # Try to match patterns for each intent
-        best_match = None
-        best_confidence = 0.0
-        
-        for intent, patterns_by_lang in cls.INTENT_PATTERNS.items():
-            # Check preferred language first
-            languages_to_check = [language, 'hindi', 'english', 'marathi']
-            seen = set()
-            languages_to_check = [x for x in languages_to_check if not (x in seen or seen.add(x))]
-            
-            for lang in languages_to_check:
-                if lang in patterns_by_lang:
-                    for pattern in patterns_by_lang[lang]:
-                        if re.search(pattern, text_lower, re.IGNORECASE | re.UNICODE):
-                            # Higher confidence for preferred language match
-                            confidence = 0.9 if lang == language else 0.7
-                            if confidence > best_confidence:
-                                best_confidence = confidence
-                                best_match = intent
-                            break
-        
-        if best_match is not None:
-            return ParsedIntent(
-                intent=best_match,
-                confidence=best_confidence,
-                entities=cls._extract_entities(text, best_match),
-                original_text=text
-            )
+        own, others = _matcher(language)
+
+        # An intent matched in the preferred language beats any other
+        # language; among equals the first intent in INTENT_PATTERNS wins
+        for probe, confidence in ((own, cls.PREFERRED_CONFIDENCE), (others, cls.OTHER_CONFIDENCE)):
+            if probe is None:
+                continue
+            found = probe.regex.match(text_lower)
+            for intent, group in probe.groups:
+                if found.group(group) is not None:
+                    return ParsedIntent(
+                        intent=intent,
+                        confidence=confidence,
+                        entities=cls._extract_entities(text, intent),
+                        original_text=text
+                    )
         
         return ParsedIntent(
             intent=Intent.UNKNOWN,
@@ -206,22 +206,76 @@ class IntentParser:
         entities = {}
         
         # Extract scheme name if mentioned
-        scheme_patterns = [
-            r'(pm[-\s]?kisan|पीएम[-\s]?किसान|प्रधानमंत्री[-\s]?किसान)',
-            r'(fasal bima|फसल बीमा)',
-            r'(kisan credit|किसान क्रेडिट)',
-            r'(soil health|मृदा स्वास्थ्य)',
-        ]
-        
-        for pattern in scheme_patterns:
-            match = re.search(pattern, text, re.IGNORECASE | re.UNICODE)
-            if match:
-                entities['scheme_mention'] = match.group(0)
+        found = _SCHEME_PROBE.regex.match(text)
+        for _, group in _SCHEME_PROBE.groups:
+            mention = found.group(group)
+            if mention is not None:
+                entities['scheme_mention'] = mention
                 break
         
         return entities
 
 
+# ============================================================
+# Compiled matchers
+# ============================================================
+#
+# The pattern tables above are compiled once at import. Each probe is a
+# single regex made of one optional lookahead per alternative:
+#
+#     (?=(?s:.*?)(?P<g0>p1|p2))?(?=(?s:.*?)(?P<g1>p3))?...
+#
+# so one match() call from the start of the text reports every alternative
+# that occurs anywhere in it (like a re.search per pattern), and the winner
+# is picked by table order. Edits to the tables at runtime are not seen.
+
+PATTERN_FLAGS = re.IGNORECASE | re.UNICODE
+
+
+@dataclass(frozen=True)
+class _Probe:
+    regex: 're.Pattern'
+    groups: Tuple[Tuple[Any, str], ...]  # (value, group name) in priority order
+
+
+def _probe(alternatives: List[Tuple[Any, List[str]]]) -> Optional[_Probe]:
+    """Compile (value, patterns) pairs into one probe; None if there are none."""
+    parts, groups = [], []
+    for index, (value, patterns) in enumerate(alternatives):
+        if not patterns:
+            continue
+        name = f'g{index}'
+        parts.append(f"(?=(?s:.*?)(?P<{name}>{'|'.join(f'(?:{p})' for p in patterns)}))?")
+        groups.append((value, name))
+    if not groups:
+        return None
+    return _Probe(re.compile(''.join(parts), PATTERN_FLAGS), tuple(groups))
+
+
+def _compile_matchers() -> Dict[Optional[str], Tuple[Optional[_Probe], Optional[_Probe]]]:
+    """(preferred-language probe, other-languages probe) per language."""
+    table = IntentParser.INTENT_PATTERNS
+    languages = {lang for patterns_by_lang in table.values() for lang in patterns_by_lang}
+    matchers = {}
+    for language in list(languages) + [None]:
+        own = _probe([(intent, by_lang.get(language, [])) for intent, by_lang in table.items()])
+        others = _probe([
+            (intent, [p for lang, patterns in by_lang.items() if lang != language for p in patterns])
+            for intent, by_lang in table.items()
+        ])
+        matchers[language] = (own, others)
+    return matchers
+
+
+_MATCHERS = _compile_matchers()
+_SCHEME_PROBE = _probe([(index, [p]) for index, p in enumerate(IntentParser.SCHEME_PATTERNS)])
+
+
+def _matcher(language: str) -> Tuple[Optional[_Probe], Optional[_Probe]]:
+    # Languages without patterns only get other-language matches
+    return _MATCHERS.get(language, _MATCHERS[None])
+
+
 class ResponseGenerator:
     """
     Generate localized responses for voice output.
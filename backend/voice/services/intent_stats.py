@@ -0,0 +1,96 @@
+"""
+Voice App - Intent Cascade Statistics
+Per-tier hit counts and latency of intent resolution.
+
+VoiceService.map_intent resolves an utterance in tiers (after
+VoiceService.follow_up):
+
+  session   a follow-up to the farmer's last turn (voice_session)
+  regex     the local IntentParser was confident enough (no LLM call)
+  cache     escalated, answered from the memoized LLM answers (intent_cache)
+  coalesced escalated, shared the in-flight LLM call of an identical request
+  llm       escalated to Groq, which answered
+  fallback  escalated, but Groq was unavailable or failed; the regex
+            result was used anyway
+
+Counters are kept per process (see IntentStats.stats) and summarized in the
+log every LOG_EVERY utterances.
+"""
+
+import logging
+import threading
+from collections import deque
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+TIERS = ('session', 'regex', 'cache', 'coalesced', 'llm', 'fallback')
+
+LOG_EVERY = 500
+
+# Latencies kept per tier for percentiles
+SAMPLE_SIZE = 1000
+
+
+class IntentStats:
+    """Hit counts and latency samples for each tier of the intent cascade."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hits = {tier: 0 for tier in TIERS}
+        self._seconds = {tier: 0.0 for tier in TIERS}
+        self._samples = {tier: deque(maxlen=SAMPLE_SIZE) for tier in TIERS}
+
+    def record(self, tier: str, seconds: float):
+        """Count one utterance resolved by `tier` in `seconds`."""
+        with self._lock:
+            self._hits[tier] += 1
+            self._seconds[tier] += seconds
+            self._samples[tier].append(seconds)
+            total = sum(self._hits.values())
+            if total % LOG_EVERY == 0:
+                logger.info(
+                    "Intent cascade: %d utterances, %s",
+                    total, ', '.join(
+                        f"{name} {100.0 * self._hits[name] / total:.0f}%"
+                        f" (mean {1000 * self._seconds[name] / max(self._hits[name], 1):.1f} ms)"
+                        for name in TIERS
+                    )
+                )
+
+    @staticmethod
+    def _percentile(samples, fraction: float) -> Optional[float]:
+        if not samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit count, share and latency (ms) of every tier in this process."""
+        with self._lock:
+            hits = dict(self._hits)
+            seconds = dict(self._seconds)
+            samples = {tier: list(values) for tier, values in self._samples.items()}
+        total = sum(hits.values())
+        result: Dict[str, Any] = {'utterances': total}
+        for tier in TIERS:
+            p50 = self._percentile(samples[tier], 0.5)
+            p95 = self._percentile(samples[tier], 0.95)
+            result[tier] = {
+                'hits': hits[tier],
+                'hit_rate': hits[tier] / total if total else 0.0,
+                'mean_ms': 1000 * seconds[tier] / hits[tier] if hits[tier] else None,
+                'p50_ms': 1000 * p50 if p50 is not None else None,
+                'p95_ms': 1000 * p95 if p95 is not None else None,
+            }
+        return result
+
+    def reset(self):
+        with self._lock:
+            for tier in TIERS:
+                self._hits[tier] = 0
+                self._seconds[tier] = 0.0
+                self._samples[tier].clear()
+
+
+intent_stats = IntentStats()
@@ -0,0 +1,382 @@
+"""
+Voice App - LLM Gateway
+Intent classification by an LLM, behind one long-lived client.
+
+The intent prompt used to be rebuilt per request as one long user message
+with the utterance in the middle, so no two requests shared a prefix. The
+gateway splits it:
+
+  system  INTENT_SYSTEM_PROMPT: instructions, the intents with examples and
+          the answer format, built once from INTENT_EXAMPLES; the same bytes
+          on every request, so the provider can cache the prefix
+  user    the utterance and its language as a small JSON object
+
+Backends (INTENT_LLM_BACKEND):
+
+  groq  GroqBackend: a process-wide Groq client and one AsyncGroq per event
+        loop, over the "groq" upstream of core.http_client
+  stub  StubBackend: answers in-process from the regex parser after a fixed
+        delay, for tests and benchmarks without network or API key
+
+Every request is accounted for: prompt, cached prompt and completion tokens
+and latency go to per-process totals (stats(), /api/voice/metrics/) and to
+the request trace (desc of the backend's stage).
+"""
+
+import asyncio
+import json
+import logging
+import threading
+import time
+import weakref
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from groq import AsyncGroq, Groq
+
+from core.http_client import async_http_client, http_client
+from .intent_parser import Intent, IntentParser, ParsedIntent
+from .tracing import describe, span
+
+logger = logging.getLogger(__name__)
+
+# Intent -> (when it applies, example utterances in Marathi, Hindi, English)
+INTENT_EXAMPLES = {
+    Intent.SHOW_ELIGIBLE_SCHEMES: ('wants to see the schemes they can apply for', [
+        'मला माझ्या योजना दाखवा', 'मेरी योजनाएं दिखाओ', 'show my schemes',
+    ]),
+    Intent.APPLY_SCHEME: ('wants to apply for a specific scheme or start an application', [
+        'या योजनेसाठी अर्ज करा', 'इस योजना के लिए आवेदन करो', 'apply for this scheme',
+    ]),
+    Intent.CHECK_STATUS: ('wants to check the status of submitted applications', [
+        'माझ्या अर्जाची स्थिती', 'आवेदन की स्थिति बताओ', 'check my application status',
+    ]),
+    Intent.VIEW_PROFILE: ('wants to see their own profile or personal details', [
+        'माझी माहिती दाखवा', 'मेरी प्रोफाइल दिखाओ', 'show my profile',
+    ]),
+    Intent.LIST_APPLICATIONS: ('wants to list all their applications', [
+        'माझे सर्व अर्ज', 'मेरे सारे आवेदन', 'list my applications',
+    ]),
+    Intent.VIEW_DOCUMENTS: ('wants to view or manage their uploaded documents', [
+        'माझी कागदपत्रे दाखवा', 'मेरे दस्तावेज दिखाओ', 'show my documents',
+    ]),
+    Intent.HELP: ('is confused or asks what they can do', [
+        'मदत करा', 'मदद करो', 'help',
+    ]),
+}
+
+
+def _system_prompt():
+    intents = '\n'.join(
+        f"- {intent.value}: the farmer {purpose}. E.g. " + ' | '.join(examples)
+        for intent, (purpose, examples) in INTENT_EXAMPLES.items()
+    )
+    answer = json.dumps({'intent': 'apply_scheme', 'confidence': 0.98, 'entities': {'scheme_mention': 'PM Kisan'}})
+    return (
+        "You map voice input from farmers using the AgriSarthi welfare app to an intent. "
+        "Input is Hindi, Marathi or English (or a mix), given as JSON with 'text' and 'language'.\n"
+        f"Intents:\n{intents}\n- unknown: none of the above.\n"
+        "Answer with one JSON object only: 'intent' (one of the intents), 'confidence' (0 to 1) and "
+        "'entities' ('scheme_mention' if a scheme is named, else {}). "
+        f"E.g. for \"PM Kisan के लिए अप्लाई करो\": {answer}"
+    )
+
+
+INTENT_SYSTEM_PROMPT = _system_prompt()
+
+
+def intent_messages(text: str, language: str) -> List[Dict[str, str]]:
+    """Chat messages asking the LLM to classify the farmer's input."""
+    return [
+        {'role': 'system', 'content': INTENT_SYSTEM_PROMPT},
+        {'role': 'user', 'content': json.dumps({'text': text, 'language': language}, ensure_ascii=False)},
+    ]
+
+
+def parse_intent_answer(content: str, text: str) -> ParsedIntent:
+    """Turn the LLM's JSON answer into a ParsedIntent."""
+    result = json.loads(content)
+
+    intent_str = result.get('intent', 'unknown')
+    try:
+        intent = Intent(intent_str)
+    except ValueError:
+        logger.warning(f"Intent mapping: Unknown intent '{intent_str}', defaulting to UNKNOWN")
+        intent = Intent.UNKNOWN
+
+    return ParsedIntent(
+        intent=intent,
+        confidence=result.get('confidence', 0.0),
+        entities=result.get('entities') or {},
+        original_text=text
+    )
+
+
+# ============================================================
+# Backends
+# ============================================================
+
+@dataclass
+class Completion:
+    """Answer of a backend with its token usage."""
+    content: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+
+
+class LLMBackend(ABC):
+    """Chat completion provider of the gateway (JSON answers)."""
+
+    name = 'llm'
+
+    def available(self) -> bool:
+        return True
+
+    @abstractmethod
+    def complete(self, messages, model, max_tokens, timeout) -> Completion:
+        """Answer to the chat messages (blocking); raises on failure."""
+
+    @abstractmethod
+    async def acomplete(self, messages, model, max_tokens, timeout) -> Completion:
+        """Async complete."""
+
+
+class GroqBackend(LLMBackend):
+    """Groq chat completions; the SDK's retries are left to core.http_client."""
+
+    name = 'groq'
+
+    def __init__(self):
+        self._clients = {}  # API key -> Groq
+        self._async_clients = weakref.WeakKeyDictionary()  # loop -> (API key, AsyncGroq)
+        self._lock = threading.Lock()
+        self._reported_missing_key = False
+
+    @staticmethod
+    def _key():
+        return (getattr(settings, 'GROQ_API_KEY', '') or '').strip() or None
+
+    def available(self) -> bool:
+        if self._key() is not None:
+            return True
+        if not self._reported_missing_key:
+            # Once per process; every escalated turn logs its regex fallback
+            self._reported_missing_key = True
+            logger.error("GROQ_API_KEY is not set in environment/settings")
+        return False
+
+    def _client(self) -> Groq:
+        key = self._key()
+        client = self._clients.get(key)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(key)
+                if client is None:
+                    client = self._clients[key] = Groq(api_key=key, http_client=http_client('groq'), max_retries=0)
+        return client
+
+    def _async_client(self) -> AsyncGroq:
+        key = self._key()
+        loop = asyncio.get_running_loop()
+        current = self._async_clients.get(loop)
+        if current is None or current[0] != key:
+            current = self._async_clients[loop] = (
+                key, AsyncGroq(api_key=key, http_client=async_http_client('groq'), max_retries=0)
+            )
+        return current[1]
+
+    @staticmethod
+    def _completion(chat_completion) -> Completion:
+        usage = chat_completion.usage
+        details = getattr(usage, 'prompt_tokens_details', None)
+        return Completion(
+            content=chat_completion.choices[0].message.content,
+            prompt_tokens=getattr(usage, 'prompt_tokens', 0) or 0,
+            completion_tokens=getattr(usage, 'completion_tokens', 0) or 0,
+            cached_tokens=getattr(details, 'cached_tokens', 0) or 0,
+        )
+
+    def complete(self, messages, model, max_tokens, timeout) -> Completion:
+        return self._completion(self._client().chat.completions.create(
+            messages=messages,
+            model=model,
+            response_format={"type": "json_object"},
+            max_tokens=max_tokens,
+            timeout=timeout,
+        ))
+
+    async def acomplete(self, messages, model, max_tokens, timeout) -> Completion:
+        return self._completion(await self._async_client().chat.completions.create(
+            messages=messages,
+            model=model,
+            response_format={"type": "json_object"},
+            max_tokens=max_tokens,
+            timeout=timeout,
+        ))
+
+
+class StubBackend(LLMBackend):
+    """
+    In-process stand-in: answers with the regex parser's intent after
+    `delay` seconds. Tokens are estimated at 4 characters each.
+    """
+
+    name = 'stub'
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls = 0
+
+    def _answer(self, messages) -> Completion:
+        self.calls += 1
+        request = json.loads(messages[-1]['content'])
+        parsed = IntentParser.parse(request['text'], request['language'])
+        content = json.dumps({'intent': parsed.intent.value, 'confidence': 0.9, 'entities': parsed.entities})
+        prompt = sum(len(message['content']) for message in messages)
+        return Completion(content, prompt_tokens=prompt // 4, completion_tokens=len(content) // 4)
+
+    def complete(self, messages, model, max_tokens, timeout) -> Completion:
+        time.sleep(self.delay)
+        return self._answer(messages)
+
+    async def acomplete(self, messages, model, max_tokens, timeout) -> Completion:
+        await asyncio.sleep(self.delay)
+        return self._answer(messages)
+
+
+BACKENDS = {
+    'groq': GroqBackend,
+    'stub': StubBackend,
+}
+
+
+# ============================================================
+# Gateway
+# ============================================================
+
+class LLMGateway:
+    """Intent classification through a backend, with token and latency accounting."""
+
+    def __init__(self, backend: LLMBackend, model: str, max_tokens: int = 128, timeout: float = 15):
+        self.backend = backend
+        self.model = model
+        self.max_tokens = max_tokens
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._totals = self._empty()
+
+    @staticmethod
+    def _empty():
+        return {
+            'requests': 0, 'errors': 0, 'prompt_tokens': 0, 'cached_tokens': 0,
+            'completion_tokens': 0, 'seconds': 0.0, 'max_seconds': 0.0,
+        }
+
+    def available(self) -> bool:
+        return self.backend.available()
+
+    def classify(self, text: str, language: str) -> ParsedIntent:
+        """Ask the backend (blocking); raises on failure."""
+        started = time.perf_counter()
+        try:
+            with span(self.backend.name):
+                completion = self.backend.complete(
+                    intent_messages(text, language), self.model, self.max_tokens, self.timeout
+                )
+        except Exception:
+            self._record(None, time.perf_counter() - started)
+            raise
+        return self._parsed(completion, text, time.perf_counter() - started)
+
+    async def aclassify(self, text: str, language: str) -> ParsedIntent:
+        """Async classify."""
+        started = time.perf_counter()
+        try:
+            with span(self.backend.name):
+                completion = await self.backend.acomplete(
+                    intent_messages(text, language), self.model, self.max_tokens, self.timeout
+                )
+        except Exception:
+            self._record(None, time.perf_counter() - started)
+            raise
+        return self._parsed(completion, text, time.perf_counter() - started)
+
+    def _parsed(self, completion, text, seconds):
+        self._record(completion, seconds)
+        describe(self.backend.name, f"{completion.prompt_tokens}+{completion.completion_tokens} tok")
+        parsed = parse_intent_answer(completion.content, text)
+        logger.info(
+            f"Intent mapping: '{text[:50]}' -> {parsed.intent.value} (confidence={parsed.confidence}, "
+            f"{completion.prompt_tokens}+{completion.completion_tokens} tokens, {1000 * seconds:.0f} ms)"
+        )
+        return parsed
+
+    def _record(self, completion: Optional[Completion], seconds: float):
+        with self._lock:
+            totals = self._totals
+            totals['requests'] += 1
+            totals['seconds'] += seconds
+            totals['max_seconds'] = max(totals['max_seconds'], seconds)
+            if completion is None:
+                totals['errors'] += 1
+                return
+            totals['prompt_tokens'] += completion.prompt_tokens
+            totals['cached_tokens'] += completion.cached_tokens
+            totals['completion_tokens'] += completion.completion_tokens
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            totals = dict(self._totals)
+        answered = totals['requests'] - totals['errors']
+        return {
+            'backend': self.backend.name,
+            'model': self.model,
+            'requests': totals['requests'],
+            'errors': totals['errors'],
+            'prompt_tokens': totals['prompt_tokens'],
+            'cached_tokens': totals['cached_tokens'],
+            'completion_tokens': totals['completion_tokens'],
+            'mean_prompt_tokens': round(totals['prompt_tokens'] / answered, 1) if answered else 0,
+            'mean_ms': round(1000 * totals['seconds'] / totals['requests'], 1) if totals['requests'] else 0,
+            'max_ms': round(1000 * totals['max_seconds'], 1),
+        }
+
+    def reset_stats(self):
+        with self._lock:
+            self._totals = self._empty()
+
+
+_llm_gateway: Optional[LLMGateway] = None
+_llm_gateway_lock = threading.Lock()
+
+
+def get_llm_gateway() -> LLMGateway:
+    """Process-wide gateway configured from settings (INTENT_LLM_*)."""
+    global _llm_gateway
+    if _llm_gateway is None:
+        with _llm_gateway_lock:
+            if _llm_gateway is None:
+                backend = getattr(settings, 'INTENT_LLM_BACKEND', 'groq')
+                if backend not in BACKENDS:
+                    logger.error(f"Intent mapping: Unknown INTENT_LLM_BACKEND '{backend}', using groq")
+                    backend = 'groq'
+                _llm_gateway = LLMGateway(
+                    BACKENDS[backend](),
+                    model=getattr(settings, 'INTENT_LLM_MODEL', 'llama-3.3-70b-versatile'),
+                    max_tokens=int(getattr(settings, 'INTENT_LLM_MAX_TOKENS', 128)),
+                    timeout=float(getattr(settings, 'INTENT_LLM_TIMEOUT_SECONDS', 15)),
+                )
+    return _llm_gateway
+
+
+def reset_llm_gateway(backend: Optional[LLMBackend] = None):
+    """Recreate the gateway from settings on next use, with `backend` if given."""
+    global _llm_gateway
+    with _llm_gateway_lock:
+        _llm_gateway = None
+    if backend is not None:
+        gateway = get_llm_gateway()
+        gateway.backend = backend
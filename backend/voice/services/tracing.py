@@ -0,0 +1,301 @@
+"""
+Voice App - Request Tracing
+Per-stage latency of the voice pipeline.
+
+Every voice request gets a VoiceTrace (trace_request). Its stages are timed
+with span(), from the views and from VoiceService alike; the trace is found
+through a context variable, so it follows the request into asyncio tasks and
+into sync_to_async / asyncio.to_thread threads. Outside a traced request
+span() does nothing.
+
+  auth        farmer lookup from the token
+  upload      reading the request body (multipart audio)
+  replay      looking up / waiting for the response to a retried clip
+              (desc: hit or shared, see voice_replay)
+  stt         speech to text, of which
+    preprocess  WAV trimming / resampling (audio_preprocess)
+    sarvam-stt  the Sarvam request
+  intent      intent mapping (desc: the cascade tier, see intent_stats), of which
+    groq        the LLM request (desc: prompt+completion tokens; "stub" with
+                the stub backend, see llm_gateway)
+  db          the intent handler (_handle_* database work)
+  tts         speech synthesis (time to first audio when streamed), of which
+    sarvam-tts  Sarvam requests (summed when several run concurrently)
+  transcode   conversion to the negotiated audio format
+  stream      sending a streamed response, after the headers
+  total       the whole request
+
+When the request finishes, the stages are sent in a Server-Timing header
+and added to per-process latency histograms keyed by stage, intent and
+language (latency_histograms, served by /api/voice/metrics/). Requests
+slower than VOICE_TRACE_SLOW_SECONDS are logged with their stages.
+"""
+
+import asyncio
+import contextvars
+import functools
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (ms) of the histogram buckets; one more bucket catches the rest
+BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+# Label of requests that ended before an intent was known
+NO_INTENT = 'none'
+
+_current: contextvars.ContextVar[Optional['VoiceTrace']] = contextvars.ContextVar('voice_trace', default=None)
+
+
+class VoiceTrace:
+    """Stage timings of one voice request."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.intent: Optional[str] = None
+        self.language: Optional[str] = None
+        self._stages: Dict[str, List[Any]] = {}  # name -> [seconds, count, desc]
+        self._lock = threading.Lock()
+        self._recorded = False
+
+    def add(self, name: str, seconds: float, desc: Optional[str] = None):
+        with self._lock:
+            stage = self._stages.setdefault(name, [0.0, 0, None])
+            stage[0] += seconds
+            stage[1] += 1
+            if desc is not None:
+                stage[2] = desc
+
+    def describe(self, name: str, desc: str):
+        """Attach a description to a stage (kept if timed later)."""
+        with self._lock:
+            self._stages.setdefault(name, [0.0, 0, None])[2] = desc
+
+    def tag(self, intent=None, language=None):
+        """Labels of the request for the histograms."""
+        if intent is not None:
+            self.intent = intent
+        if language is not None:
+            self.language = language
+
+    def stages(self) -> Dict[str, float]:
+        with self._lock:
+            return {name: stage[0] for name, stage in self._stages.items() if stage[1]}
+
+    def server_timing(self) -> str:
+        """Server-Timing header value of the stages so far plus the total."""
+        with self._lock:
+            stages = [(name, *stage) for name, stage in self._stages.items() if stage[1]]
+        metrics = []
+        for name, seconds, count, desc in stages:
+            if count > 1:
+                desc = f"{desc}, {count}x" if desc else f"{count}x"
+            metric = f"{name};dur={1000 * seconds:.1f}"
+            if desc:
+                metric += f';desc="{desc}"'
+            metrics.append(metric)
+        metrics.append(f"total;dur={1000 * (time.perf_counter() - self.started):.1f}")
+        return ', '.join(metrics)
+
+    def record(self):
+        """Add the stages and the total to the histograms (once)."""
+        with self._lock:
+            if self._recorded:
+                return
+            self._recorded = True
+        total = time.perf_counter() - self.started
+        intent, language = self.intent or NO_INTENT, self.language or ''
+        for name, seconds in self.stages().items():
+            latency_histograms.record(name, intent, language, seconds)
+        latency_histograms.record('total', intent, language, total)
+
+        slow = float(getattr(settings, 'VOICE_TRACE_SLOW_SECONDS', 5))
+        if slow > 0 and total >= slow:
+            logger.warning(f"Voice: Slow request ({1000 * total:.0f} ms, intent={intent}, lang={language}): {self.server_timing()}")
+
+    def finish(self, response):
+        """
+        Set the Server-Timing header and record the trace. A streaming
+        response is recorded once its body has been sent.
+        """
+        response['Server-Timing'] = self.server_timing()
+        if not getattr(response, 'streaming', False):
+            self.record()
+        elif response.is_async:
+            response.streaming_content = self._atimed(response.streaming_content)
+        else:
+            response.streaming_content = self._timed(response.streaming_content)
+        return response
+
+    def _timed(self, content):
+        started = time.perf_counter()
+        try:
+            yield from content
+        finally:
+            self.add('stream', time.perf_counter() - started)
+            self.record()
+
+    async def _atimed(self, content):
+        started = time.perf_counter()
+        try:
+            async for chunk in content:
+                yield chunk
+        finally:
+            self.add('stream', time.perf_counter() - started)
+            self.record()
+
+
+@contextmanager
+def span(name: str, desc: Optional[str] = None):
+    """Time a stage of the current request (no-op outside one)."""
+    trace = _current.get()
+    if trace is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add(name, time.perf_counter() - started, desc)
+
+
+async def timed(name: str, awaitable):
+    """Await under a span; for work started as a task (asyncio.ensure_future)."""
+    with span(name):
+        return await awaitable
+
+
+def add_span(name: str, seconds: float, desc: Optional[str] = None):
+    """Add a stage timed by the caller to the current request."""
+    trace = _current.get()
+    if trace is not None:
+        trace.add(name, seconds, desc)
+
+
+def describe(name: str, desc: str):
+    trace = _current.get()
+    if trace is not None:
+        trace.describe(name, desc)
+
+
+def tag(intent=None, language=None):
+    trace = _current.get()
+    if trace is not None:
+        trace.tag(intent, language)
+
+
+def trace_request(view):
+    """
+    Decorator tracing a (sync or async) view method: the response gets a
+    Server-Timing header and its stages go to the histograms.
+    """
+    if asyncio.iscoroutinefunction(view):
+        @functools.wraps(view)
+        async def traced(*args, **kwargs):
+            trace = VoiceTrace()
+            token = _current.set(trace)
+            try:
+                return trace.finish(await view(*args, **kwargs))
+            finally:
+                _current.reset(token)
+    else:
+        @functools.wraps(view)
+        def traced(*args, **kwargs):
+            trace = VoiceTrace()
+            token = _current.set(trace)
+            try:
+                return trace.finish(view(*args, **kwargs))
+            finally:
+                _current.reset(token)
+    return traced
+
+
+# ============================================================
+# Histograms
+# ============================================================
+
+class LatencyHistograms:
+    """Latency histograms per (stage, intent, language), per process."""
+
+    def __init__(self, bounds_ms=BUCKETS_MS):
+        self.bounds_ms = tuple(bounds_ms)
+        self._lock = threading.Lock()
+        self._series: Dict[tuple, Dict[str, Any]] = {}
+
+    def record(self, stage: str, intent: str, language: str, seconds: float):
+        ms = 1000 * seconds
+        bucket = next((i for i, bound in enumerate(self.bounds_ms) if ms <= bound), len(self.bounds_ms))
+        with self._lock:
+            series = self._series.get((stage, intent, language))
+            if series is None:
+                series = self._series[(stage, intent, language)] = {
+                    'counts': [0] * (len(self.bounds_ms) + 1), 'count': 0, 'sum_ms': 0.0, 'max_ms': 0.0,
+                }
+            series['counts'][bucket] += 1
+            series['count'] += 1
+            series['sum_ms'] += ms
+            series['max_ms'] = max(series['max_ms'], ms)
+
+    def _percentile(self, counts, count, max_ms, fraction):
+        """Estimate from the buckets (linear within a bucket, capped at the max)."""
+        rank = fraction * count
+        seen = 0
+        for i, bucket_count in enumerate(counts):
+            if bucket_count and seen + bucket_count >= rank:
+                low = self.bounds_ms[i - 1] if i else 0.0
+                high = self.bounds_ms[i] if i < len(self.bounds_ms) else max_ms
+                return min(max_ms, low + (high - low) * (rank - seen) / bucket_count)
+            seen += bucket_count
+        return max_ms
+
+    def _summary(self, series) -> Dict[str, Any]:
+        counts, count, max_ms = series['counts'], series['count'], series['max_ms']
+        cumulative, buckets = 0, {}
+        for bound, bucket_count in zip(list(self.bounds_ms) + ['+Inf'], counts):
+            cumulative += bucket_count
+            buckets[str(bound)] = cumulative
+        return {
+            'count': count,
+            'mean_ms': round(series['sum_ms'] / count, 1),
+            'p50_ms': round(self._percentile(counts, count, max_ms, 0.50), 1),
+            'p95_ms': round(self._percentile(counts, count, max_ms, 0.95), 1),
+            'p99_ms': round(self._percentile(counts, count, max_ms, 0.99), 1),
+            'max_ms': round(max_ms, 1),
+            'buckets_ms': buckets,  # cumulative counts per upper bound
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """Summaries per stage, and per stage, intent and language."""
+        with self._lock:
+            series = {key: {**value, 'counts': list(value['counts'])} for key, value in self._series.items()}
+
+        by_stage: Dict[str, Dict[str, Any]] = {}
+        for (stage, _, _), value in series.items():
+            merged = by_stage.setdefault(stage, {
+                'counts': [0] * (len(self.bounds_ms) + 1), 'count': 0, 'sum_ms': 0.0, 'max_ms': 0.0,
+            })
+            merged['counts'] = [a + b for a, b in zip(merged['counts'], value['counts'])]
+            merged['count'] += value['count']
+            merged['sum_ms'] += value['sum_ms']
+            merged['max_ms'] = max(merged['max_ms'], value['max_ms'])
+
+        return {
+            'by_stage': {stage: self._summary(value) for stage, value in sorted(by_stage.items())},
+            'by_intent': [
+                {'stage': stage, 'intent': intent, 'language': language, **self._summary(value)}
+                for (stage, intent, language), value in sorted(series.items())
+            ],
+        }
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+
+latency_histograms = LatencyHistograms()
@@ -0,0 +1,305 @@
+"""
+Voice App - TTS Audio Cache
+Content-addressed cache for synthesized speech.
+
+Most spoken responses come from ResponseGenerator templates and repeat
+constantly, so the audio is cached under a hash of everything that
+determines it (text, language code, speaker, model, sample rate, pace,
+codec):
+
+  L1  in-process LRU, bounded by TTS_CACHE_MEMORY_MB
+  L2  files under TTS_CACHE_DIR shared by all workers on the host, bounded
+      by TTS_CACHE_DISK_MB (least recently used files are removed first;
+      hits refresh the file's mtime)
+
+A hit costs no network round trip. Hit/miss counters are kept per process
+(see TTSCache.stats) and summarized in the log every LOG_EVERY lookups.
+
+The async voice pipeline must not touch the disk on the event loop: aget()
+reads the disk tier in a worker thread, and put(..., background=True)
+stores in memory at once and leaves the file write (and any eviction,
+which scans the whole directory) to a single writer thread.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Bump when the audio for an unchanged payload changes (e.g. post-processing)
+KEY_VERSION = 1
+
+KEY_FIELDS = (
+    'text', 'target_language_code', 'speaker', 'model',
+    'speech_sample_rate', 'pace', 'output_audio_codec',
+)
+
+LOG_EVERY = 500
+
+
+class TTSCache:
+    """Two-tier (memory + disk) LRU cache of TTS audio keyed by request payload."""
+
+    def __init__(self, directory: str, memory_bytes: int, disk_bytes: int):
+        self.directory = directory or None
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+
+        self._memory: 'OrderedDict[str, bytes]' = OrderedDict()
+        self._memory_used = 0
+        self._disk_used: Optional[int] = None  # estimate, measured on first write
+        self._lock = threading.Lock()
+        self._counters = {
+            'memory_hits': 0, 'disk_hits': 0, 'misses': 0,
+            'stores': 0, 'memory_evictions': 0, 'disk_evictions': 0,
+        }
+
+    @staticmethod
+    def key(payload: Dict[str, Any]) -> str:
+        """Content address of a Sarvam TTS payload."""
+        material = [KEY_VERSION] + [str(payload.get(name, '')) for name in KEY_FIELDS]
+        return hashlib.sha256(json.dumps(material, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+    # ------------------------------------------------------------
+    # Lookup / store
+    # ------------------------------------------------------------
+
+    def get(self, payload: Dict[str, Any]) -> Optional[bytes]:
+        """Cached audio for the payload, or None."""
+        key = self.key(payload)
+        audio = self._get_memory(key)
+        if audio is not None:
+            return audio
+        return self._get_disk(key)
+
+    async def aget(self, payload: Dict[str, Any]) -> Optional[bytes]:
+        """get() with the disk tier read in a worker thread."""
+        key = self.key(payload)
+        audio = self._get_memory(key)
+        if audio is not None:
+            return audio
+        if not self.directory:
+            return self._get_disk(key)  # counts the miss
+        return await asyncio.to_thread(self._get_disk, key)
+
+    def _get_memory(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            audio = self._memory.get(key)
+            if audio is not None:
+                self._memory.move_to_end(key)
+                self._count('memory_hits')
+            return audio
+
+    def _get_disk(self, key: str) -> Optional[bytes]:
+        audio = self._read_disk(key)
+        with self._lock:
+            if audio is None:
+                self._count('misses')
+                return None
+            self._remember(key, audio)
+            self._count('disk_hits')
+        return audio
+
+    def put(self, payload: Dict[str, Any], audio: bytes, background: bool = False):
+        """Store synthesized audio in both tiers (background: disk write by the writer thread)."""
+        if not audio:
+            return
+        key = self.key(payload)
+        with self._lock:
+            self._remember(key, audio)
+            self._counters['stores'] += 1
+        if background and self.directory:
+            _disk_writer().submit(self._write_disk, key, audio)
+        else:
+            self._write_disk(key, audio)
+
+    def _remember(self, key: str, audio: bytes):
+        """Add to the memory tier (caller holds the lock)."""
+        if len(audio) > self.memory_bytes:
+            return
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_used -= len(previous)
+        self._memory[key] = audio
+        self._memory_used += len(audio)
+        while self._memory_used > self.memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_used -= len(evicted)
+            self._counters['memory_evictions'] += 1
+
+    def _count(self, name: str):
+        """Increment a lookup counter and log a summary now and then (caller holds the lock)."""
+        self._counters[name] += 1
+        counters = self._counters
+        lookups = counters['memory_hits'] + counters['disk_hits'] + counters['misses']
+        if lookups % LOG_EVERY == 0:
+            hits = lookups - counters['misses']
+            logger.info(
+                "TTS cache: %d/%d hits (%d memory, %d disk), %.0f%% hit rate, %.1f MB in memory",
+                hits, lookups, counters['memory_hits'], counters['disk_hits'],
+                100.0 * hits / lookups, self._memory_used / 1e6
+            )
+
+    # ------------------------------------------------------------
+    # Disk tier
+    # ------------------------------------------------------------
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f'{key}.wav')
+
+    def _read_disk(self, key: str) -> Optional[bytes]:
+        if not self.directory:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                audio = f.read()
+            os.utime(path)  # mark as recently used
+            return audio
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.warning("TTS cache: could not read %s: %s", path, e)
+            return None
+
+    def _write_disk(self, key: str, audio: bytes):
+        if not self.directory or len(audio) > self.disk_bytes:
+            return
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write then rename so other workers never read a partial file
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(audio)
+                os.replace(tmp_path, path)
+            except OSError:
+                os.unlink(tmp_path)
+                raise
+        except OSError as e:
+            logger.warning("TTS cache: could not write %s: %s", path, e)
+            return
+
+        with self._lock:
+            if self._disk_used is None:
+                self._disk_used = self._disk_usage()
+            else:
+                self._disk_used += len(audio)
+            over = self._disk_used > self.disk_bytes
+        if over:
+            self._evict_disk()
+
+    def _cached_files(self):
+        """(mtime, size, path) of every cached file."""
+        files = []
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if not name.endswith('.wav'):
+                    continue  # in-flight writes of other workers
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+        return files
+
+    def _disk_usage(self) -> int:
+        return sum(size for _, size, _ in self._cached_files())
+
+    def _evict_disk(self):
+        """Remove least recently used files until the tier is at 90% of its bound."""
+        files = sorted(self._cached_files())
+        used = sum(size for _, size, _ in files)
+        target = self.disk_bytes * 0.9
+        evicted = 0
+        for _, size, path in files:
+            if used <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue  # already removed by another worker
+            used -= size
+            evicted += 1
+        with self._lock:
+            self._disk_used = used
+            self._counters['disk_evictions'] += evicted
+        logger.info("TTS cache: evicted %d files, %.1f MB on disk", evicted, used / 1e6)
+
+    # ------------------------------------------------------------
+    # Metrics / maintenance
+    # ------------------------------------------------------------
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters of this process plus the size of both tiers."""
+        with self._lock:
+            stats = dict(self._counters)
+            stats['memory_entries'] = len(self._memory)
+            stats['memory_bytes'] = self._memory_used
+            stats['disk_bytes'] = self._disk_used
+        lookups = stats['memory_hits'] + stats['disk_hits'] + stats['misses']
+        stats['lookups'] = lookups
+        stats['hit_rate'] = (lookups - stats['misses']) / lookups if lookups else 0.0
+        return stats
+
+    def clear(self):
+        """Drop both tiers (counters are kept)."""
+        with self._lock:
+            self._memory.clear()
+            self._memory_used = 0
+        if self.directory:
+            for _, _, path in self._cached_files():
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+        with self._lock:
+            self._disk_used = 0
+
+
+_tts_cache: Optional[TTSCache] = None
+_tts_cache_lock = threading.Lock()
+_writer: Optional[ThreadPoolExecutor] = None
+
+
+def _disk_writer() -> ThreadPoolExecutor:
+    """One thread for background disk writes, so evictions never run concurrently."""
+    global _writer
+    if _writer is None:
+        with _tts_cache_lock:
+            if _writer is None:
+                _writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='tts-cache')
+    return _writer
+
+
+def get_tts_cache() -> TTSCache:
+    """Process-wide TTS cache configured from settings."""
+    global _tts_cache
+    if _tts_cache is None:
+        with _tts_cache_lock:
+            if _tts_cache is None:
+                _tts_cache = TTSCache(
+                    directory=getattr(settings, 'TTS_CACHE_DIR', ''),
+                    memory_bytes=int(getattr(settings, 'TTS_CACHE_MEMORY_MB', 32) * 1024 * 1024),
+                    disk_bytes=int(getattr(settings, 'TTS_CACHE_DISK_MB', 512) * 1024 * 1024),
+                )
+    return _tts_cache
+
+
+def reset_tts_cache():
+    """Recreate the cache from settings on next use (drops the memory tier)."""
+    global _tts_cache
+    with _tts_cache_lock:
+        _tts_cache = None
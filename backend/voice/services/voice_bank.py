@@ -0,0 +1,235 @@
+"""
+Voice App - Pre-rendered Audio Bank
+WAV audio for the fixed ResponseGenerator texts, rendered once at deploy
+time by `manage.py build_voice_bank`.
+
+  static     responses without placeholders (help, unknown, no_schemes,
+             already_applied, ...) are served from the bank as they are
+  fragments  the fixed text around the placeholders of templated responses
+             ("आपके पास {count} दस्तावेज अपलोड हैं।") is banked as well, so a
+             rendered response can be composed from banked fragments plus
+             freshly synthesized variable parts (counts, scheme names)
+
+Bank entries are keyed like the TTS cache (hash of the full TTS payload), so
+changing the speaker, model or sample rate makes the bank miss instead of
+serving stale voices. Layout of VOICE_BANK_DIR:
+
+    manifest.json      one entry per rendered text
+    <key>.wav
+"""
+
+import asyncio
+import json
+import logging
+import os
+import re
+import threading
+from string import Formatter
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from django.conf import settings
+
+from .intent_parser import ResponseGenerator
+from .tts_cache import TTSCache
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = 'manifest.json'
+MANIFEST_VERSION = 1
+
+# A composition plan: banked audio or text that still needs synthesis
+Segment = Union[bytes, str]
+
+
+# ============================================================
+# Templates
+# ============================================================
+
+def iter_templates() -> Iterator[Tuple[str, str, str, str]]:
+    """(intent, language, response_type, template) for every ResponseGenerator text."""
+    for intent, responses in ResponseGenerator.RESPONSES.items():
+        if isinstance(responses, str):
+            continue
+        for language, by_type in responses.items():
+            if isinstance(by_type, str):
+                yield intent.value, language, 'success', by_type
+            else:
+                for response_type, template in by_type.items():
+                    yield intent.value, language, response_type, template
+
+
+def split_template(template: str) -> Tuple[List[str], List[str]]:
+    """Literal fragments and field names; literals has one more item than fields."""
+    literals, fields = [], []
+    pending = ''
+    for literal, field_name, _, _ in Formatter().parse(template):
+        pending += literal
+        if field_name is not None:
+            literals.append(pending)
+            fields.append(field_name)
+            pending = ''
+    literals.append(pending)
+    return literals, fields
+
+
+def speakable(text: str) -> bool:
+    """Whether the text has anything to pronounce (not just spaces/punctuation)."""
+    return any(ch.isalnum() for ch in text)
+
+
+def bank_texts(language: Optional[str] = None) -> Iterator[Tuple[str, str, Dict[str, str]]]:
+    """(language, text, info) of every text the bank should hold."""
+    seen = set()
+    for intent, lang, response_type, template in iter_templates():
+        if language and lang != language:
+            continue
+        literals, fields = split_template(template)
+        if fields:
+            kind, texts = 'fragment', [literal.strip() for literal in literals]
+        else:
+            kind, texts = 'static', [template]
+        for text in texts:
+            if speakable(text) and (lang, text) not in seen:
+                seen.add((lang, text))
+                yield lang, text, {'intent': intent, 'response_type': response_type, 'kind': kind}
+
+
+# ============================================================
+# Bank
+# ============================================================
+
+class VoiceBank:
+    """Read side of the bank: exact lookups and template composition."""
+
+    def __init__(self, directory: Optional[str]):
+        self.directory = directory
+        self._files: Dict[str, str] = {}
+        self._audio: Dict[str, bytes] = {}
+        self._patterns: Dict[str, List[Tuple[re.Pattern, List[str]]]] = {}
+        self._load()
+
+    def _load(self):
+        if self.directory:
+            path = os.path.join(self.directory, MANIFEST_NAME)
+            try:
+                with open(path, encoding='utf-8') as f:
+                    manifest = json.load(f)
+                if manifest.get('version') == MANIFEST_VERSION:
+                    self._files = {entry['key']: entry['file'] for entry in manifest.get('entries', [])}
+                else:
+                    logger.warning("Voice bank: ignoring manifest version %s", manifest.get('version'))
+            except FileNotFoundError:
+                logger.info("Voice bank: no manifest at %s (run manage.py build_voice_bank)", path)
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning("Voice bank: could not load %s: %s", path, e)
+
+        for _, language, _, template in iter_templates():
+            literals, fields = split_template(template)
+            if not fields:
+                continue
+            pattern = ''.join(
+                re.escape(literal) + ('(.+?)' if index < len(fields) else '')
+                for index, literal in enumerate(literals)
+            )
+            self._patterns.setdefault(language, []).append(
+                (re.compile(f'^{pattern}$', re.DOTALL), literals)
+            )
+        if self._files:
+            logger.info("Voice bank: %d pre-rendered texts", len(self._files))
+
+    def __len__(self):
+        return len(self._files)
+
+    def get(self, payload) -> Optional[bytes]:
+        """Banked audio for a TTS payload, or None."""
+        key = TTSCache.key(payload)
+        audio = self._audio.get(key)
+        if audio is None and key in self._files:
+            try:
+                with open(os.path.join(self.directory, self._files[key]), 'rb') as f:
+                    audio = self._audio[key] = f.read()
+            except OSError as e:
+                logger.warning("Voice bank: could not read %s: %s", self._files[key], e)
+        return audio
+
+    async def aget(self, payload) -> Optional[bytes]:
+        """get() with a first read from disk in a worker thread."""
+        key = TTSCache.key(payload)
+        audio = self._audio.get(key)
+        if audio is None and key in self._files:
+            audio = await asyncio.to_thread(self.get, payload)
+        return audio
+
+    def plan(self, text: str, language: str, payload_for) -> Optional[List[Segment]]:
+        """
+        Split a rendered templated response into banked fragment audio and
+        the variable text between them, or None if the text matches no
+        template or a fragment is not banked.
+
+        payload_for(text, language) builds the TTS payload of a fragment.
+        """
+        parts = self._parts(text, language, payload_for)
+        if parts is None:
+            return None
+        segments: List[Segment] = []
+        for part in parts:
+            audio = self.get(part) if isinstance(part, dict) else part
+            if audio is None:
+                return None
+            segments.append(audio)
+        return segments
+
+    async def aplan(self, text: str, language: str, payload_for) -> Optional[List[Segment]]:
+        """plan() reading fragments not loaded yet in a worker thread."""
+        parts = self._parts(text, language, payload_for)
+        if parts is None:
+            return None
+        segments: List[Segment] = []
+        for part in parts:
+            audio = await self.aget(part) if isinstance(part, dict) else part
+            if audio is None:
+                return None
+            segments.append(audio)
+        return segments
+
+    def _parts(self, text, language, payload_for) -> Optional[List[Any]]:
+        """Fragment payloads and variable text of the matching template, in order."""
+        for pattern, literals in self._patterns.get(language, ()):
+            match = pattern.match(text)
+            if not match:
+                continue
+            parts = []
+            for index, literal in enumerate(literals):
+                fragment = literal.strip()
+                if speakable(fragment):
+                    payload = payload_for(fragment, language)
+                    if TTSCache.key(payload) not in self._files:
+                        return None
+                    parts.append(payload)
+                if index < len(match.groups()):
+                    value = match.group(index + 1).strip()
+                    if speakable(value):
+                        parts.append(value)
+            return parts
+        return None
+
+
+_voice_bank: Optional[VoiceBank] = None
+_voice_bank_lock = threading.Lock()
+
+
+def get_voice_bank() -> VoiceBank:
+    """Process-wide bank loaded from VOICE_BANK_DIR."""
+    global _voice_bank
+    if _voice_bank is None:
+        with _voice_bank_lock:
+            if _voice_bank is None:
+                _voice_bank = VoiceBank(getattr(settings, 'VOICE_BANK_DIR', ''))
+    return _voice_bank
+
+
+def reset_voice_bank():
+    """Reload the bank on next use (after build_voice_bank)."""
+    global _voice_bank
+    with _voice_bank_lock:
+        _voice_bank = None
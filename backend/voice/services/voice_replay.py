@@ -0,0 +1,306 @@
+"""
+Voice App - Voice Replay
+Answers retried voice requests from the response already computed.
+
+On a flaky connection the app sends the same clip to /api/voice/process/
+again when a response does not arrive, and each retry paid for STT, the
+LLM and TTS once more (and ran the intent handler, e.g. "yes, apply",
+again). Requests are keyed by a hash of the farmer and the audio bytes
+(replay_key); the complete result, i.e. the voice metadata and the WAV
+before transcoding, is kept for VOICE_REPLAY_TTL_SECONDS:
+
+  hit     a retry within the window is answered from the cache; the audio
+          is transcoded to the format the retry negotiated
+  shared  a duplicate arriving while the first request is still being
+          computed waits for it (up to VOICE_REPLAY_WAIT_SECONDS) instead
+          of starting a second pipeline
+  lead    otherwise the request computes the response and publishes it
+          through its ReplayLead: finish() when done, or stream() for a
+          streamed response (published once the stream has been sent);
+          on errors abandon() lets waiting duplicates compute their own
+
+Only successful results are kept. A result is only replayed for the
+language preference it was computed with. Requests sending text instead
+of audio are not replayed (the intent and TTS caches cover them). Entries
+live in the worker's memory, bounded by VOICE_REPLAY_CACHE_MB.
+"""
+
+import asyncio
+import concurrent.futures
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+from django.conf import settings
+
+from .tracing import describe
+from .voice_service import seal_wav_stream
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class VoiceReplay:
+    """Result of a voice request: its metadata and WAV audio (None: JSON response)."""
+    language: str
+    metadata: Dict[str, Any]
+    audio: Optional[bytes]
+
+    @property
+    def size(self) -> int:
+        return len(self.audio or b'') + len(json.dumps(self.metadata, ensure_ascii=True))
+
+
+def replay_key(farmer_id, upload) -> str:
+    """Hash of the farmer and the uploaded audio bytes (left rewound)."""
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(str(farmer_id).encode())
+    digest.update(b'\0')
+    for chunk in upload.chunks():
+        digest.update(chunk)
+    upload.seek(0)
+    return digest.hexdigest()
+
+
+class ReplayLead:
+    """The request computing the response for a replay key (see module docstring)."""
+
+    def __init__(self, replays: 'VoiceReplayCache', key: str, language: Optional[str] = None):
+        self.replays = replays
+        self.key = key
+        self.language = language
+        self._done = False
+        self._streaming = False
+
+    def finish(self, metadata: Dict[str, Any], audio: Optional[bytes] = None):
+        """Publish the result (audio: the WAV before transcoding)."""
+        if not self._done:
+            self._done = True
+            self.replays.finish(self.key, VoiceReplay(self.language or '', metadata, audio))
+
+    def abandon(self):
+        """No result to publish; no-op once finished or handed to a stream."""
+        if not self._done and not self._streaming:
+            self._done = True
+            self.replays.abandon(self.key)
+
+    def stream(self, chunks, metadata: Dict[str, Any]):
+        """
+        Pass a WAV stream through, publishing it once completely sent (not
+        if it ended early, see voice_service.WavStream).
+        """
+        self._streaming = True
+        return self._capture(chunks, metadata)
+
+    def astream(self, chunks, metadata: Dict[str, Any]):
+        """stream() for an async iterator."""
+        self._streaming = True
+        return self._acapture(chunks, metadata)
+
+    def _sent(self, chunks, metadata, data):
+        self._streaming = False
+        if getattr(chunks, 'truncated', False):
+            data = None
+        audio = seal_wav_stream(data) if data is not None else None
+        if audio is not None:
+            self.finish(metadata, audio)
+        else:
+            self.abandon()
+
+    def _capture(self, chunks, metadata):
+        sent = []
+        try:
+            for chunk in chunks:
+                sent.append(chunk)
+                yield chunk
+        except BaseException:
+            sent = None
+            raise
+        finally:
+            self._sent(chunks, metadata, b''.join(sent) if sent is not None else None)
+
+    async def _acapture(self, chunks, metadata):
+        sent = []
+        try:
+            async for chunk in chunks:
+                sent.append(chunk)
+                yield chunk
+        except BaseException:
+            sent = None
+            raise
+        finally:
+            self._sent(chunks, metadata, b''.join(sent) if sent is not None else None)
+
+
+class VoiceReplayCache:
+    """TTL + LRU cache of VoiceReplay by key, bounded in bytes, plus the requests in flight."""
+
+    def __init__(self, max_bytes: int, ttl: float, wait: float):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.wait = wait
+        self._entries: 'OrderedDict[str, Tuple[float, VoiceReplay]]' = OrderedDict()
+        self._flights: Dict[str, Tuple[float, concurrent.futures.Future]] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.shared = 0
+        self.leads = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0 and self.ttl > 0
+
+    def begin(self, key: str) -> Tuple[Optional[VoiceReplay], Optional[concurrent.futures.Future]]:
+        """
+        (cached replay, None), (None, Future of the identical request in
+        flight), or (None, None): the caller leads and must finish() or
+        abandon() the key. A flight older than the wait time is taken over.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    return entry[1], None
+                self._drop(key)
+
+            flight = self._flights.get(key)
+            if flight is not None and flight[0] + self.wait > now:
+                return None, flight[1]
+            self._flights[key] = (now, concurrent.futures.Future())
+            self.leads += 1
+            return None, None
+
+    def finish(self, key: str, replay: VoiceReplay):
+        """Keep a result and hand it to the requests waiting for it."""
+        size = replay.size
+        with self._lock:
+            flight = self._flights.pop(key, None)
+            if replay.metadata.get('success') and size <= self.max_bytes:
+                self._drop(key)
+                self._entries[key] = (time.monotonic() + self.ttl, replay)
+                self._bytes += size
+                while self._bytes > self.max_bytes:
+                    self._drop(next(iter(self._entries)))
+        if flight is not None and not flight[1].done():
+            flight[1].set_result(replay)
+
+    def abandon(self, key: str):
+        """Let the requests waiting for key compute their own response."""
+        with self._lock:
+            flight = self._flights.pop(key, None)
+        if flight is not None and not flight[1].done():
+            flight[1].set_result(None)
+
+    def _drop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[1].size
+
+    # ------------------------------------------------------------
+    # Per request
+    # ------------------------------------------------------------
+
+    def claim(self, key: str, language: str) -> Tuple[Optional[VoiceReplay], bool, Optional[ReplayLead]]:
+        """
+        (replay, shared, lead) for a request: the response to replay (shared:
+        waited for a duplicate in flight), else the lead to publish the
+        computed result with. Neither when the cache is off, the wait timed
+        out, the duplicate failed, or the replay is for another language.
+        """
+        if not self.enabled:
+            return None, False, None
+        replay, flight = self.begin(key)
+        if flight is not None:
+            try:
+                replay = flight.result(timeout=self.wait)
+            except concurrent.futures.TimeoutError:
+                replay = None
+        return self._claimed(key, language, replay, flight)
+
+    async def aclaim(self, key: str, language: Optional[str] = None):
+        """
+        claim() without blocking the event loop. With language None (not
+        known yet) the caller checks VoiceReplay.language, calls served()
+        for a replay it answers with and sets ReplayLead.language itself.
+        """
+        if not self.enabled:
+            return None, False, None
+        replay, flight = self.begin(key)
+        if flight is not None:
+            try:
+                replay = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(flight)), self.wait)
+            except asyncio.TimeoutError:
+                replay = None
+        return self._claimed(key, language, replay, flight)
+
+    def _claimed(self, key, language, replay, flight):
+        shared = flight is not None
+        if replay is None:
+            if shared:
+                logger.info("Voice: Duplicate request in flight gave no result — processing again")
+                return None, False, None
+            return None, False, ReplayLead(self, key, language)
+        if language is None:
+            return replay, shared, None
+        if replay.language != language:
+            return None, False, None
+        self.served(shared)
+        return replay, shared, None
+
+    def served(self, shared: bool):
+        """Count a replay answered with (after the language check)."""
+        with self._lock:
+            if shared:
+                self.shared += 1
+            else:
+                self.hits += 1
+        describe('replay', 'shared' if shared else 'hit')
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'in_flight': len(self._flights),
+                'hits': self.hits,
+                'shared': self.shared,
+                'leads': self.leads,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+
+_voice_replays: Optional[VoiceReplayCache] = None
+_voice_replays_lock = threading.Lock()
+
+
+def get_voice_replays() -> VoiceReplayCache:
+    """Process-wide replay cache configured from settings."""
+    global _voice_replays
+    if _voice_replays is None:
+        with _voice_replays_lock:
+            if _voice_replays is None:
+                _voice_replays = VoiceReplayCache(
+                    max_bytes=int(float(getattr(settings, 'VOICE_REPLAY_CACHE_MB', 32)) * 1024 * 1024),
+                    ttl=float(getattr(settings, 'VOICE_REPLAY_TTL_SECONDS', 120)),
+                    wait=float(getattr(settings, 'VOICE_REPLAY_WAIT_SECONDS', 60)),
+                )
+    return _voice_replays
+
+
+def reset_voice_replays():
+    """Recreate the cache from settings on next use."""
+    global _voice_replays
+    with _voice_replays_lock:
+        _voice_replays = None
@@ -2,19 +2,50 @@
 Voice Service - Sarvam.ai STT/TTS + Groq Intent Mapping
 
 Handles all voice-related AI operations:
-1. Speech to Text (Sarvam.ai saaras:v3)
-2. Intent Mapping (Groq LLM)
+1. Speech to Text (Sarvam.ai saaras:v3; WAV clips are trimmed and
+   resampled to 16 kHz mono first, see audio_preprocess)
+2. Intent Mapping (regex parser, escalating to the Groq LLM when unsure)
 3. Text to Speech (Sarvam.ai bulbul:v3)
+
+Speech can also be streamed (stream_speech / astream_speech): sentences are
+synthesized concurrently and sent in order as one WAV of unknown length.
+
+Every operation has a blocking version (httpx.Client / Groq, used by the
+WSGI views) and an async one (httpx.AsyncClient / AsyncGroq, prefixed with
+"a", used by the ASGI voice pipeline). Both go through the pooled "sarvam"
+and "groq" upstreams of core.http_client (retries, circuit breaker,
+concurrency cap). The LLM is reached through the gateway (llm_gateway),
+which owns the Groq clients, the intent prompt and token accounting. Both
+versions share the request building and response parsing, and both
+serve TTS from the pre-rendered voice bank (voice_bank) and the shared TTS
+cache (tts_cache) before calling Sarvam. Preprocessing and the
+Sarvam / Groq calls are timed for the request trace (tracing).
 """
 
+import io
 import os
-import json
+import re
+import wave
 import base64
+import asyncio
+import contextvars
+import time
+import struct
 import logging
-import requests
-from groq import Groq
+import threading
+import httpx
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FlightTimeout
 from django.conf import settings
-from .intent_parser import Intent, IntentParser, ParsedIntent
+from core.http_client import UpstreamUnavailable, async_http_client, http_client
+from .intent_cache import IntentCache, async_intent_flights, get_intent_cache, intent_flights, rebind
+from .intent_parser import IntentParser
+from .intent_stats import intent_stats
+from .llm_gateway import get_llm_gateway
+from .audio_preprocess import preprocess_stats, preprocess_wav
+from .tracing import add_span, describe, span
+from .tts_cache import get_tts_cache
+from .voice_bank import get_voice_bank
+from .voice_session import resolve_follow_up
 
 
 logger = logging.getLogger(__name__)
@@ -36,6 +67,241 @@ LANGUAGE_TO_SARVAM = {
 
 SARVAM_TO_LANGUAGE = {v: k for k, v in LANGUAGE_TO_SARVAM.items()}
 
+# Pick voice based on language for more natural output
+TTS_SPEAKERS = {
+    'hindi': 'shubh',
+    'marathi': 'shubh',
+    'english': 'amelia',
+}
+
+# Sentence ends: Latin punctuation and the Devanagari danda
+SENTENCE_END = re.compile(r'(?<=[.!?।॥])\s+')
+
+# Sarvam requests: a dead host should not take the whole read timeout to notice
+SARVAM_TIMEOUT = httpx.Timeout(30, connect=5)
+
+
+def detect_audio_mime(head):
+    """MIME type of audio from its first bytes, or None if not recognized."""
+    if head[:4] == b'RIFF' and head[8:12] == b'WAVE':
+        return 'audio/wav'
+    if head[4:8] == b'ftyp':
+        return 'audio/x-m4a'  # MP4 container (m4a/aac from phone recorders)
+    if head[:4] == b'OggS':
+        return 'audio/ogg'
+    if head[:4] == b'fLaC':
+        return 'audio/flac'
+    if head[:4] == b'\x1a\x45\xdf\xa3':
+        return 'audio/webm'
+    if head[:5] == b'#!AMR':
+        return 'audio/amr'
+    if head[:3] == b'ID3':
+        return 'audio/mpeg'
+    if len(head) >= 2 and head[0] == 0xFF and head[1] & 0xE0 == 0xE0:
+        # MPEG frame sync: layer bits 00 mean raw AAC (ADTS), others MP3
+        return 'audio/aac' if head[1] & 0x06 == 0 else 'audio/mpeg'
+    return None
+
+
+def split_sentences(text):
+    """Split speech text into sentences for separate synthesis."""
+    return [part.strip() for part in SENTENCE_END.split(text or '') if part.strip()]
+
+
+def join_wav(chunks):
+    """
+    Concatenate WAV files with identical audio parameters into one.
+    Returns None if the chunks cannot be joined.
+    """
+    if len(chunks) == 1:
+        return chunks[0]
+    params = None
+    frames = []
+    try:
+        for chunk in chunks:
+            with wave.open(io.BytesIO(chunk), 'rb') as reader:
+                current = reader.getparams()[:3]  # channels, sample width, rate
+                if params is None:
+                    params = current
+                elif current != params:
+                    return None
+                frames.append(reader.readframes(reader.getnframes()))
+    except (wave.Error, EOFError) as e:
+        logger.warning(f"TTS: Could not join sentence audio: {e}")
+        return None
+
+    output = io.BytesIO()
+    with wave.open(output, 'wb') as writer:
+        writer.setnchannels(params[0])
+        writer.setsampwidth(params[1])
+        writer.setframerate(params[2])
+        writer.writeframes(b''.join(frames))
+    return output.getvalue()
+
+
+# RIFF/data sizes of a WAV streamed before its length is known; players
+# read such a stream until it ends
+WAV_STREAM_SIZE = 0xFFFFFFFF
+
+
+def wav_stream_header(channels, sample_width, rate):
+    """44-byte PCM WAV header for a stream of unknown length."""
+    byte_rate = rate * channels * sample_width
+    return b''.join([
+        b'RIFF', struct.pack('<I', WAV_STREAM_SIZE), b'WAVE',
+        b'fmt ', struct.pack('<IHHIIHH', 16, 1, channels, rate, byte_rate, channels * sample_width, sample_width * 8),
+        b'data', struct.pack('<I', WAV_STREAM_SIZE),
+    ])
+
+
+def seal_wav_stream(data):
+    """
+    The WAV file of a completely sent stream (wav_stream_header plus
+    frames) with its real sizes, or None if it is not one.
+    """
+    if len(data) < 44 or data[:4] != b'RIFF' or data[36:40] != b'data':
+        return None
+    return b''.join([
+        data[:4], struct.pack('<I', len(data) - 8), data[8:40], struct.pack('<I', len(data) - 44), data[44:],
+    ])
+
+
+class WavStream:
+    """
+    Turns a sequence of WAV files with identical audio parameters into one
+    streamed WAV: the header goes out with the first chunk, later chunks
+    contribute only their frames. An unusable chunk (missing, not WAV,
+    other parameters) ends the stream: the farmer would not notice a
+    sentence missing from the middle, but does notice an answer that stops.
+    If it is the first one, the stream never starts and the caller can
+    still answer without audio.
+    """
+
+    def __init__(self):
+        self.params = None
+        self.chunks = []
+        self.ended = False
+
+    @property
+    def started(self):
+        return self.params is not None
+
+    @property
+    def truncated(self):
+        """Whether the stream ended early after audio was sent."""
+        return self.started and self.ended
+
+    def feed(self, chunk):
+        """Bytes to send for the next chunk (b'' once the stream has ended)."""
+        if self.ended:
+            return b''
+        if not chunk:
+            return self._end("no audio")
+        try:
+            with wave.open(io.BytesIO(chunk), 'rb') as reader:
+                params = reader.getparams()[:3]  # channels, sample width, rate
+                frames = reader.readframes(reader.getnframes())
+        except (wave.Error, EOFError) as e:
+            return self._end(f"unreadable audio ({e})")
+
+        if self.params is None:
+            self.params = params
+            self.chunks.append(chunk)
+            return wav_stream_header(*params) + frames
+        if params != self.params:
+            return self._end(f"audio parameters {params} (stream has {self.params})")
+        self.chunks.append(chunk)
+        return frames
+
+    def _end(self, reason):
+        self.ended = True
+        if self.started:
+            logger.warning(f"TTS: Ending stream after {len(self.chunks)} units: {reason}")
+            speech_stream_stats.record(truncated=True)
+        return b''
+
+
+class SpeechStream:
+    """
+    Body of a streamed WAV response (iterator of bytes). Under ASGI, Django
+    reads a sync iterator in full before sending anything, so serve
+    asynchronous() there.
+    """
+
+    def __init__(self, body, stream: WavStream, abody=None):
+        self._body = body
+        self._abody = abody
+        self.stream = stream
+
+    def __iter__(self):
+        return self._body
+
+    def asynchronous(self) -> 'AsyncSpeechStream':
+        """The same stream as an async iterator (use one side only)."""
+        return AsyncSpeechStream(self._abody, self.stream)
+
+    @property
+    def truncated(self):
+        return self.stream.truncated
+
+
+class AsyncSpeechStream:
+    """SpeechStream for an async iterator."""
+
+    def __init__(self, body, stream: WavStream):
+        self._body = body
+        self.stream = stream
+
+    def __aiter__(self):
+        return self._body
+
+    @property
+    def truncated(self):
+        return self.stream.truncated
+
+
+class SpeechStreamStats:
+    """Streamed TTS responses and those that ended early, per process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {'streams': 0, 'truncated': 0}
+
+    def record(self, truncated: bool = False):
+        with self._lock:
+            self._counters['truncated' if truncated else 'streams'] += 1
+
+    def stats(self):
+        with self._lock:
+            return dict(self._counters)
+
+
+speech_stream_stats = SpeechStreamStats()
+
+
+_tts_pool = None
+_tts_pool_lock = threading.Lock()
+
+
+def _tts_executor():
+    """Process-wide thread pool for concurrent blocking TTS requests."""
+    global _tts_pool
+    if _tts_pool is None:
+        with _tts_pool_lock:
+            if _tts_pool is None:
+                _tts_pool = ThreadPoolExecutor(
+                    max_workers=int(getattr(settings, 'TTS_STREAM_WORKERS', 8)),
+                    thread_name_prefix='tts',
+                )
+    return _tts_pool
+
+
+def _cancel_pending(pending):
+    """Cancel the synthesis of stream units not needed any more."""
+    for item in pending:
+        if not isinstance(item, bytes):
+            item.cancel()
+
 
 class VoiceService:
     """
@@ -56,22 +322,115 @@ class VoiceService:
             return None
         return key.strip()
 
+    # ------------------------------------------------------------
+    # Speech to Text
+    # ------------------------------------------------------------
+
     @staticmethod
-    def _get_groq_key():
-        """Get and validate Groq API key."""
-        key = getattr(settings, 'GROQ_API_KEY', '') or ''
-        if not key.strip():
-            logger.error("GROQ_API_KEY is not set in environment/settings")
-            return None
-        return key.strip()
+    def _stt_mime_type(filename, head=b''):
+        """
+        Determine MIME type explicitly to avoid "Invalid file type: None" error.
+        The audio's magic bytes win; the file extension is the fallback.
+        """
+        detected = detect_audio_mime(head)
+        if detected:
+            return detected
+        if filename.endswith('.wav'):
+            return 'audio/wav'
+        elif filename.endswith('.mp3'):
+            return 'audio/mpeg'
+        # Default to x-m4a for m4a/aac files (Sarvam supports this)
+        return 'audio/x-m4a'
 
     @staticmethod
-    def speech_to_text(audio_file_path):
+    def _stt_upload(audio, filename=None):
+        """
+        (name, content, MIME type, size) for the multipart upload of audio
+        given as bytes, a file-like object (e.g. a Django UploadedFile, sent
+        as is) or a path. None if a path does not exist.
+        """
+        if isinstance(audio, (bytes, bytearray, memoryview)):
+            content = bytes(audio)
+            head, size = content[:16], len(content)
+        elif hasattr(audio, 'read'):
+            content = audio
+            content.seek(0)
+            head = content.read(16)
+            size = getattr(content, 'size', None)
+            if size is None:
+                size = content.seek(0, os.SEEK_END)
+            content.seek(0)
+        else:
+            if not os.path.exists(audio):
+                logger.error(f"STT failed: Audio file not found: {audio}")
+                return None
+            with open(audio, 'rb') as f:
+                content = f.read()
+            head, size = content[:16], len(content)
+            filename = filename or audio
+
+        name = os.path.basename(filename or getattr(audio, 'name', None) or 'audio')
+        mime_type = VoiceService._stt_mime_type(name, head)
+        if mime_type == 'audio/wav' and getattr(settings, 'STT_PREPROCESS', True):
+            content, size = VoiceService._preprocess(content, size)
+        return name, content, mime_type, size
+
+    @staticmethod
+    def _preprocess(content, size):
+        """(content, size) of a WAV clip after trimming and resampling for STT."""
+        if hasattr(content, 'read'):
+            content = content.read()
+        with span('preprocess'):
+            result = preprocess_wav(content, int(getattr(settings, 'STT_SAMPLE_RATE', 16000)))
+        preprocess_stats.record(len(content), result)
+        if result is None:
+            return content, size
+        logger.info(
+            f"STT: Preprocessed WAV {result.original_rate} Hz x{result.original_channels} "
+            f"{result.original_seconds:.1f}s -> {result.rate} Hz mono {result.seconds:.1f}s, "
+            f"{result.original_bytes} -> {len(result.audio)} bytes (saved {result.bytes_saved})"
+        )
+        return result.audio, len(result.audio)
+
+    @staticmethod
+    def _stt_form_data():
+        return {
+            "model": "saaras:v3",
+            "language_code": "unknown",  # Auto-detect language
+            "mode": "transcribe",
+        }
+
+    @staticmethod
+    def _parse_stt_response(status_code, body_text, load_json):
+        """Turn a Sarvam STT response into (text, language) or (None, None)."""
+        if status_code != 200:
+            logger.error(f"STT Error: HTTP {status_code} - {body_text()[:500]}")
+            return None, None
+
+        result = load_json()
+        text = result.get("transcript", "").strip()
+        lang_code = result.get("language_code")  # e.g., "hi-IN", "mr-IN"
+
+        # Map Sarvam BCP-47 code to internal language name
+        language = SARVAM_TO_LANGUAGE.get(lang_code, "hindi")
+
+        logger.info(f"STT: lang={lang_code} -> {language}, text='{text[:100]}'")
+
+        if not text:
+            logger.warning("STT: Empty transcript returned")
+            return None, None
+
+        return text, language
+
+    @staticmethod
+    def speech_to_text(audio, filename=None):
         """
         Convert speech to text using Sarvam.ai STT (saaras:v3).
         
         Args:
-            audio_file_path: Path to the audio file
+            audio: Audio as bytes, a file-like object (an uploaded file is
+                sent without being copied to disk) or a file path
+            filename: Original file name (defaults to the object's name)
             
         Returns:
             tuple: (transcribed_text, detected_language) or (None, None) on error
@@ -81,169 +440,322 @@ class VoiceService:
             logger.error("STT failed: Missing SARVAM_API_KEY")
             return None, None
 
-        # Validate file exists
-        if not os.path.exists(audio_file_path):
-            logger.error(f"STT failed: Audio file not found: {audio_file_path}")
-            return None, None
-
-        file_size = os.path.getsize(audio_file_path)
-        if file_size < 100:
-            logger.warning(f"STT: Audio file very small ({file_size} bytes), may fail")
-
         try:
+            upload = VoiceService._stt_upload(audio, filename)
+            if upload is None:
+                return None, None
+            name, content, mime_type, file_size = upload
+            if file_size < 100:
+                logger.warning(f"STT: Audio file very small ({file_size} bytes), may fail")
+
             headers = {
                 "api-subscription-key": api_key,
             }
 
-            with open(audio_file_path, "rb") as audio_file:
-                # Determine MIME type explicitly to avoid "Invalid file type: None" error
-                if audio_file_path.endswith('.wav'):
-                    mime_type = 'audio/wav'
-                elif audio_file_path.endswith('.mp3'):
-                    mime_type = 'audio/mpeg'
-                else:
-                    # Default to x-m4a for m4a/aac files (Sarvam supports this)
-                    mime_type = 'audio/x-m4a'
-
-                files = {
-                    "file": (os.path.basename(audio_file_path), audio_file, mime_type),
-                }
-                data = {
-                    "model": "saaras:v3",
-                    "language_code": "unknown",  # Auto-detect language
-                    "mode": "transcribe",
-                }
-
-                logger.info(f"STT: Sending {file_size} bytes to Sarvam.ai...")
-                response = requests.post(
+            logger.info(f"STT: Sending {file_size} bytes ({mime_type}) to Sarvam.ai...")
+            with span('sarvam-stt'):
+                response = http_client('sarvam').post(
                     VoiceService.SARVAM_STT_URL,
                     headers=headers,
-                    files=files,
-                    data=data,
-                    timeout=30,
+                    files={"file": (name, content, mime_type)},
+                    data=VoiceService._stt_form_data(),
+                    timeout=SARVAM_TIMEOUT,
                 )
 
+            return VoiceService._parse_stt_response(
+                response.status_code, lambda: response.text, response.json
+            )
 
-            if response.status_code != 200:
-                logger.error(f"STT Error: HTTP {response.status_code} - {response.text[:500]}")
-                return None, None
-
-            result = response.json()
-            text = result.get("transcript", "").strip()
-            lang_code = result.get("language_code")  # e.g., "hi-IN", "mr-IN"
+        except httpx.TimeoutException:
+            logger.error("STT Error: Request timed out (30s)")
+            return None, None
+        except UpstreamUnavailable as e:
+            logger.warning(f"STT: Sarvam unavailable - {e}")
+            return None, None
+        except httpx.TransportError as e:
+            logger.error(f"STT Error: Connection failed - {e}")
+            return None, None
+        except Exception as e:
+            logger.error(f"STT Error: {type(e).__name__}: {e}")
+            return None, None
 
-            # Map Sarvam BCP-47 code to internal language name
-            language = SARVAM_TO_LANGUAGE.get(lang_code, "hindi")
+    @staticmethod
+    async def aspeech_to_text(audio, filename=None):
+        """
+        Async speech_to_text (same inputs).
 
-            logger.info(f"STT: lang={lang_code} -> {language}, text='{text[:100]}'")
+        Returns:
+            tuple: (transcribed_text, detected_language) or (None, None) on error
+        """
+        api_key = VoiceService._get_sarvam_key()
+        if not api_key:
+            logger.error("STT failed: Missing SARVAM_API_KEY")
+            return None, None
 
-            if not text:
-                logger.warning("STT: Empty transcript returned")
+        try:
+            # Off the event loop: may read a spilled upload and resample it
+            upload = await asyncio.to_thread(VoiceService._stt_upload, audio, filename)
+            if upload is None:
                 return None, None
+            name, content, mime_type, file_size = upload
+            if file_size < 100:
+                logger.warning(f"STT: Audio file very small ({file_size} bytes), may fail")
 
-            return text, language
+            http = async_http_client('sarvam')
+            logger.info(f"STT: Sending {file_size} bytes ({mime_type}) to Sarvam.ai...")
+            with span('sarvam-stt'):
+                response = await http.post(
+                    VoiceService.SARVAM_STT_URL,
+                    headers={"api-subscription-key": api_key},
+                    files={"file": (name, content, mime_type)},
+                    data=VoiceService._stt_form_data(),
+                    timeout=SARVAM_TIMEOUT,
+                )
+            return VoiceService._parse_stt_response(
+                response.status_code, lambda: response.text, response.json
+            )
 
-        except requests.exceptions.Timeout:
+        except httpx.TimeoutException:
             logger.error("STT Error: Request timed out (30s)")
             return None, None
-        except requests.exceptions.ConnectionError as e:
+        except UpstreamUnavailable as e:
+            logger.warning(f"STT: Sarvam unavailable - {e}")
+            return None, None
+        except httpx.TransportError as e:
             logger.error(f"STT Error: Connection failed - {e}")
             return None, None
         except Exception as e:
             logger.error(f"STT Error: {type(e).__name__}: {e}")
             return None, None
 
+    # ------------------------------------------------------------
+    # Intent Mapping
+    # ------------------------------------------------------------
+
     @staticmethod
-    def map_intent(text, language):
-        """Map text to system intent using Groq LLM"""
-        groq_key = VoiceService._get_groq_key()
-        if not groq_key:
-            logger.warning("Intent mapping: GROQ_API_KEY missing, falling back to regex parser")
-            return IntentParser.parse(text, language)
+    def _escalates(guess):
+        """
+        Whether the regex result must be confirmed by the LLM: it is below
+        INTENT_REGEX_MIN_CONFIDENCE, or it carries entities (a scheme
+        mention) that the LLM extracts more reliably.
+        """
+        threshold = getattr(settings, 'INTENT_REGEX_MIN_CONFIDENCE', 0.9)
+        return guess.confidence < threshold or bool(guess.entities)
 
+    @staticmethod
+    def _classify(gateway, text, language, key):
+        """Ask the LLM (blocking); cache and return the answer, or None on failure."""
         try:
-            client = Groq(api_key=groq_key)
+            parsed = gateway.classify(text, language)
+        except Exception as e:
+            logger.error(f"Intent mapping error: {type(e).__name__}: {e}")
+            return None
+        get_intent_cache().put(key, parsed)
+        return parsed
 
-            # Categorize the input into one of our predefined intents
-            intents_list = [i.value for i in Intent if i != Intent.UNKNOWN]
+    @staticmethod
+    async def _aclassify(gateway, text, language, key):
+        """Async _classify."""
+        try:
+            parsed = await gateway.aclassify(text, language)
+        except Exception as e:
+            logger.error(f"Intent mapping error: {type(e).__name__}: {e}")
+            return None
+        get_intent_cache().put(key, parsed)
+        return parsed
 
-            prompt = f"""
-            You are an AI assistant for a Farmer Welfare App called AgriSarthi.
-            Your task is to map a farmer's voice input to a specific system intent.
-            The farmer may speak in Hindi, Marathi, or English (or a mix).
-            
-            User Input: "{text}"
-            User Language: {language}
-            
-            Available Intents:
-            - show_eligible_schemes: When user wants to see schemes they can apply for.
-              Examples: "मला माझ्या योजना दाखवा" (Marathi), "मेरी योजनाएं दिखाओ" (Hindi), "show my schemes"
-            - apply_scheme: When user wants to apply for a specific scheme or start application.
-              Examples: "या योजनेसाठी अर्ज करा" (Marathi), "इस योजना के लिए आवेदन करो" (Hindi), "apply for this scheme"
-            - check_status: When user wants to check the status of their submitted applications.
-              Examples: "माझ्या अर्जाची स्थिती" (Marathi), "आवेदन की स्थिति बताओ" (Hindi), "check my application status"
-            - view_profile: When user wants to see their own profile or personal details.
-              Examples: "माझी माहिती दाखवा" (Marathi), "मेरी प्रोफाइल दिखाओ" (Hindi), "show my profile"
-            - list_applications: When user wants to see a list of all their applications.
-              Examples: "माझे सर्व अर्ज" (Marathi), "मेरे सारे आवेदन" (Hindi), "list my applications"
-            - view_documents: When user wants to view or manage their uploaded documents.
-              Examples: "माझी कागदपत्रे दाखवा" (Marathi), "मेरे दस्तावेज दिखाओ" (Hindi), "show my documents"
-            - help: When user is confused or asks what they can do.
-              Examples: "मदत करा" (Marathi), "मदद करो" (Hindi), "help"
-            
-            Rules:
-            1. Respond ONLY with a JSON object containing 'intent' and 'confidence'.
-            2. 'intent' must be one of {intents_list} or 'unknown'.
-            3. 'confidence' should be between 0 and 1.
-            4. If a specific scheme is mentioned, include it in 'entities' as 'scheme_mention'.
-            
-            Example:
-            Input: "मला माझ्या योजना दाखवा" (Marathi)
-            Output: {{"intent": "show_eligible_schemes", "confidence": 0.95, "entities": {{}}}}
-            
-            Input: "PM Kisan के लिए अप्लाई करो" (Hindi)
-            Output: {{"intent": "apply_scheme", "confidence": 0.98, "entities": {{"scheme_mention": "PM Kisan"}}}}
-            """
-
-            chat_completion = client.chat.completions.create(
-                messages=[
-                    {"role": "system", "content": "You are a specialized intent mapping agent for an Indian farmer welfare app. You understand Hindi, Marathi, and English."},
-                    {"role": "user", "content": prompt}
-                ],
-                model="llama-3.3-70b-versatile",
-                response_format={"type": "json_object"},
-                timeout=15,
-            )
+    @staticmethod
+    def _record_tier(tier, started):
+        """Count the cascade tier that answered (intent_stats, request trace)."""
+        intent_stats.record(tier, time.perf_counter() - started)
+        describe('intent', tier)
 
-            result = json.loads(chat_completion.choices[0].message.content)
-            
-            intent_str = result.get('intent', 'unknown')
-            # Safely parse the intent enum
-            try:
-                intent = Intent(intent_str)
-            except ValueError:
-                logger.warning(f"Intent mapping: Unknown intent '{intent_str}', defaulting to UNKNOWN")
-                intent = Intent.UNKNOWN
-
-            parsed = ParsedIntent(
-                intent=intent,
-                confidence=result.get('confidence', 0.0),
-                entities=result.get('entities', {}),
-                original_text=text
+    @staticmethod
+    def _settle(text, guess, parsed, shared, started):
+        """Record the tier that answered and fall back to the regex guess."""
+        if parsed is None:
+            logger.info("Intent mapping: Falling back to regex parser")
+            VoiceService._record_tier('fallback', started)
+            return guess
+        VoiceService._record_tier('coalesced' if shared else 'llm', started)
+        return rebind(parsed, text) if shared else parsed
+
+    @staticmethod
+    def follow_up(text, session):
+        """
+        The intent of a follow-up to the farmer's last turn ("the second
+        one", "yes, apply"), resolved from their voice session, or None.
+        """
+        started = time.perf_counter()
+        parsed = resolve_follow_up(session, text)
+        if parsed is not None:
+            VoiceService._record_tier('session', started)
+            add_span('intent', time.perf_counter() - started, 'session')
+            logger.info(f"Intent mapping: '{text[:50]}' -> {parsed.intent.value} (follow-up {parsed.entities['follow_up']})")
+        return parsed
+
+    @staticmethod
+    def map_intent(text, language, guess=None):
+        """
+        Map text to system intent: the regex parser first, then answers
+        memoized by normalized transcript, the Groq LLM last. Concurrent
+        identical escalations share one LLM call.
+
+        guess: IntentParser.parse(text, language) if the caller already has it
+        """
+        started = time.perf_counter()
+        guess = guess or IntentParser.parse(text, language)
+        if not VoiceService._escalates(guess):
+            VoiceService._record_tier('regex', started)
+            logger.info(f"Intent mapping: '{text[:50]}' -> {guess.intent.value} (regex, confidence={guess.confidence})")
+            return guess
+
+        key = IntentCache.key(text, language)
+        cached = get_intent_cache().get(key, text)
+        if cached is not None:
+            VoiceService._record_tier('cache', started)
+            logger.info(f"Intent mapping: '{text[:50]}' -> {cached.intent.value} (cached, confidence={cached.confidence})")
+            return cached
+
+        gateway = get_llm_gateway()
+        if not gateway.available():
+            logger.warning("Intent mapping: LLM unavailable, falling back to regex parser")
+            VoiceService._record_tier('fallback', started)
+            return guess
+
+        try:
+            parsed, shared = intent_flights.do(
+                key, lambda: VoiceService._classify(gateway, text, language, key), timeout=30
             )
-            logger.info(f"Intent mapping: '{text[:50]}' -> {parsed.intent.value} (confidence={parsed.confidence})")
-            return parsed
+        except FlightTimeout:
+            # Only a follower waits with a timeout; the leader may still be retrying
+            logger.warning("Intent mapping: Shared LLM call still running, falling back to regex parser")
+            return VoiceService._settle(text, guess, None, True, started)
+        return VoiceService._settle(text, guess, parsed, shared, started)
 
-        except Exception as e:
-            logger.error(f"Intent mapping error: {type(e).__name__}: {e}")
-            # Fallback to regex parser
-            logger.info("Intent mapping: Falling back to regex parser")
-            return IntentParser.parse(text, language)
+    @staticmethod
+    async def amap_intent(text, language, guess=None):
+        """Async map_intent (same cascade, memoization and regex fallback)."""
+        started = time.perf_counter()
+        guess = guess or IntentParser.parse(text, language)
+        if not VoiceService._escalates(guess):
+            VoiceService._record_tier('regex', started)
+            logger.info(f"Intent mapping: '{text[:50]}' -> {guess.intent.value} (regex, confidence={guess.confidence})")
+            return guess
+
+        key = IntentCache.key(text, language)
+        cached = get_intent_cache().get(key, text)
+        if cached is not None:
+            VoiceService._record_tier('cache', started)
+            logger.info(f"Intent mapping: '{text[:50]}' -> {cached.intent.value} (cached, confidence={cached.confidence})")
+            return cached
+
+        gateway = get_llm_gateway()
+        if not gateway.available():
+            logger.warning("Intent mapping: LLM unavailable, falling back to regex parser")
+            VoiceService._record_tier('fallback', started)
+            return guess
+
+        parsed, shared = await async_intent_flights.do(
+            key, lambda: VoiceService._aclassify(gateway, text, language, key)
+        )
+        return VoiceService._settle(text, guess, parsed, shared, started)
+
+    # ------------------------------------------------------------
+    # Text to Speech
+    # ------------------------------------------------------------
+
+    @staticmethod
+    def _tts_payload(text, language):
+        """Sarvam TTS request body for the text in an internal language."""
+        # Map internal language to Sarvam BCP-47 code
+        target_lang = LANGUAGE_TO_SARVAM.get(language, 'hi-IN')
+
+        return {
+            # Truncate to bulbul:v3 max limit
+            "text": text[:2500],
+            "target_language_code": target_lang,
+            "model": "bulbul:v3",
+            "speaker": TTS_SPEAKERS.get(language, 'shubh'),
+            "pace": 1.0,
+            "speech_sample_rate": "22050",
+            "output_audio_codec": "wav",
+        }
+
+    @staticmethod
+    def _parse_tts_response(status_code, body_text, load_json, target_lang):
+        """Decode the audio of a Sarvam TTS response, or None."""
+        if status_code != 200:
+            logger.error(f"TTS Error: HTTP {status_code} - {body_text()[:500]}")
+            return None
+
+        result = load_json()
+        audios = result.get("audios", [])
+
+        if not audios:
+            logger.error("TTS Error: No audio in response")
+            return None
+
+        # Decode the first base64 audio string to raw bytes
+        audio_bytes = base64.b64decode(audios[0])
+        logger.info(f"TTS: Generated {len(audio_bytes)} bytes for lang={target_lang}")
+        return audio_bytes
+
+    @staticmethod
+    def _stored_speech(payload):
+        """Audio for the payload from the voice bank or the TTS cache, or None."""
+        audio_bytes = get_voice_bank().get(payload)
+        source = 'Voice bank'
+        if audio_bytes is None:
+            audio_bytes = get_tts_cache().get(payload)
+            source = 'Cache'
+        if audio_bytes is not None:
+            logger.info(f"TTS: {source} hit ({len(audio_bytes)} bytes) lang={payload['target_language_code']}")
+        return audio_bytes
+
+    @staticmethod
+    async def _astored_speech(payload):
+        """_stored_speech with disk reads off the event loop."""
+        audio_bytes = await get_voice_bank().aget(payload)
+        source = 'Voice bank'
+        if audio_bytes is None:
+            audio_bytes = await get_tts_cache().aget(payload)
+            source = 'Cache'
+        if audio_bytes is not None:
+            logger.info(f"TTS: {source} hit ({len(audio_bytes)} bytes) lang={payload['target_language_code']}")
+        return audio_bytes
+
+    @staticmethod
+    def _composition_plan(text, language):
+        """Banked fragments + variable text of a templated response, or None."""
+        if not getattr(settings, 'VOICE_BANK_COMPOSE', True):
+            return None
+        return get_voice_bank().plan(text, language, VoiceService._tts_payload) or None
+
+    @staticmethod
+    async def _acomposition_plan(text, language):
+        """_composition_plan with bank reads off the event loop."""
+        if not getattr(settings, 'VOICE_BANK_COMPOSE', True):
+            return None
+        return await get_voice_bank().aplan(text, language, VoiceService._tts_payload) or None
+
+    @staticmethod
+    def _store_composition(payload, parts, background=False):
+        """Join composed audio and cache it under the whole text."""
+        joined = join_wav(parts) if all(parts) else None
+        if joined:
+            logger.info(f"TTS: Composed {len(parts)} segments lang={payload['target_language_code']}")
+            get_tts_cache().put(payload, joined, background=background)
+        return joined
 
     @staticmethod
     def text_to_speech(text, language):
         """
         Convert text to speech using Sarvam.ai TTS (bulbul:v3).
+
+        Pre-rendered (voice bank) and cached audio is returned without a
+        request; a templated response with at most one variable part is
+        composed from banked fragments and one synthesized piece.
         
         Args:
             text: Text to convert to speech
@@ -252,75 +764,305 @@ class VoiceService:
         Returns:
             bytes: Raw audio bytes (WAV format) or None on error
         """
+        if not text or not text.strip():
+            logger.warning("TTS: Empty text provided, skipping")
+            return None
+
+        payload = VoiceService._tts_payload(text, language)
+        stored = VoiceService._stored_speech(payload)
+        if stored is not None:
+            return stored
+
+        plan = VoiceService._composition_plan(text, language)
+        # Several variable parts would cost several sequential requests
+        if plan and sum(isinstance(segment, str) for segment in plan) <= 1:
+            composed = VoiceService._store_composition(payload, [
+                segment if isinstance(segment, bytes) else VoiceService.text_to_speech(segment, language)
+                for segment in plan
+            ])
+            if composed:
+                return composed
+
+        return VoiceService._request_speech(payload)
+
+    @staticmethod
+    def _request_speech(payload):
+        """Synthesize a payload with Sarvam and cache the audio."""
         api_key = VoiceService._get_sarvam_key()
         if not api_key:
             logger.error("TTS failed: Missing SARVAM_API_KEY")
             return None
 
-        if not text or not text.strip():
-            logger.warning("TTS: Empty text provided, skipping")
-            return None
-
         try:
-            # Map internal language to Sarvam BCP-47 code
-            target_lang = LANGUAGE_TO_SARVAM.get(language, 'hi-IN')
-
-            # Pick voice based on language for more natural output
-            speaker_map = {
-                'hindi': 'shubh',
-                'marathi': 'shubh',
-                'english': 'amelia',
-            }
-            speaker = speaker_map.get(language, 'shubh')
-
             headers = {
                 "api-subscription-key": api_key,
                 "Content-Type": "application/json",
             }
+            target_lang = payload['target_language_code']
 
-            # Truncate to bulbul:v3 max limit
-            truncated_text = text[:2500]
-
-            payload = {
-                "text": truncated_text,
-                "target_language_code": target_lang,
-                "model": "bulbul:v3",
-                "speaker": speaker,
-                "pace": 1.0,
-                "speech_sample_rate": "22050",
-                "output_audio_codec": "wav",
-            }
-
-            logger.info(f"TTS: Generating audio for '{truncated_text[:60]}...' lang={target_lang}")
-            response = requests.post(
-                VoiceService.SARVAM_TTS_URL,
-                headers=headers,
-                json=payload,
-                timeout=30,
+            logger.info(f"TTS: Generating audio for '{payload['text'][:60]}...' lang={target_lang}")
+            with span('sarvam-tts'):
+                response = http_client('sarvam').post(
+                    VoiceService.SARVAM_TTS_URL,
+                    headers=headers,
+                    json=payload,
+                    timeout=SARVAM_TIMEOUT,
+                )
+            audio_bytes = VoiceService._parse_tts_response(
+                response.status_code, lambda: response.text, response.json, target_lang
             )
+            if audio_bytes:
+                get_tts_cache().put(payload, audio_bytes)
+            return audio_bytes
 
-            if response.status_code != 200:
-                logger.error(f"TTS Error: HTTP {response.status_code} - {response.text[:500]}")
-                return None
+        except httpx.TimeoutException:
+            logger.error("TTS Error: Request timed out (30s)")
+            return None
+        except UpstreamUnavailable as e:
+            logger.warning(f"TTS: Sarvam unavailable - {e}")
+            return None
+        except httpx.TransportError as e:
+            logger.error(f"TTS Error: Connection failed - {e}")
+            return None
+        except Exception as e:
+            logger.error(f"TTS Error: {type(e).__name__}: {e}")
+            return None
 
-            result = response.json()
-            audios = result.get("audios", [])
+    @staticmethod
+    async def atext_to_speech(text, language):
+        """Async text_to_speech for one piece of text."""
+        if not text or not text.strip():
+            logger.warning("TTS: Empty text provided, skipping")
+            return None
 
-            if not audios:
-                logger.error("TTS Error: No audio in response")
-                return None
+        payload = VoiceService._tts_payload(text, language)
+        stored = await VoiceService._astored_speech(payload)
+        if stored is not None:
+            return stored
 
-            # Decode the first base64 audio string to raw bytes
-            audio_bytes = base64.b64decode(audios[0])
-            logger.info(f"TTS: Generated {len(audio_bytes)} bytes for lang={target_lang}")
+        composed = await VoiceService._acompose(text, language, payload)
+        if composed:
+            return composed
+
+        return await VoiceService._arequest_speech(payload)
+
+    @staticmethod
+    async def _acompose(text, language, payload):
+        """Compose a templated response, synthesizing its variable parts concurrently."""
+        plan = await VoiceService._acomposition_plan(text, language)
+        if not plan:
+            return None
+        variable = [segment for segment in plan if isinstance(segment, str)]
+        synthesized = iter(await asyncio.gather(*(
+            VoiceService.atext_to_speech(segment, language) for segment in variable
+        )))
+        return VoiceService._store_composition(payload, [
+            segment if isinstance(segment, bytes) else next(synthesized) for segment in plan
+        ], background=True)
+
+    @staticmethod
+    async def _arequest_speech(payload):
+        """Async _request_speech."""
+        api_key = VoiceService._get_sarvam_key()
+        if not api_key:
+            logger.error("TTS failed: Missing SARVAM_API_KEY")
+            return None
+
+        try:
+            http = async_http_client('sarvam')
+            target_lang = payload['target_language_code']
+
+            logger.info(f"TTS: Generating audio for '{payload['text'][:60]}...' lang={target_lang}")
+            with span('sarvam-tts'):
+                response = await http.post(
+                    VoiceService.SARVAM_TTS_URL,
+                    headers={"api-subscription-key": api_key},
+                    json=payload,
+                    timeout=SARVAM_TIMEOUT,
+                )
+            audio_bytes = VoiceService._parse_tts_response(
+                response.status_code, lambda: response.text, response.json, target_lang
+            )
+            if audio_bytes:
+                get_tts_cache().put(payload, audio_bytes, background=True)
             return audio_bytes
 
-        except requests.exceptions.Timeout:
+        except httpx.TimeoutException:
             logger.error("TTS Error: Request timed out (30s)")
             return None
-        except requests.exceptions.ConnectionError as e:
+        except UpstreamUnavailable as e:
+            logger.warning(f"TTS: Sarvam unavailable - {e}")
+            return None
+        except httpx.TransportError as e:
             logger.error(f"TTS Error: Connection failed - {e}")
             return None
         except Exception as e:
             logger.error(f"TTS Error: {type(e).__name__}: {e}")
             return None
+
+    @staticmethod
+    async def asynthesize(text, language):
+        """
+        Async TTS that synthesizes each sentence concurrently and joins the
+        audio, so a long response costs about as much as its longest sentence.
+        Falls back to a single request if the sentence audio cannot be joined.
+        """
+        sentences = split_sentences(text)
+        if len(sentences) <= 1 or len(text) > 2500:
+            return await VoiceService.atext_to_speech(text, language)
+
+        # Whole responses repeat (templates), so try them before sentences
+        payload = VoiceService._tts_payload(text, language)
+        stored = await VoiceService._astored_speech(payload)
+        if stored is not None:
+            return stored
+
+        composed = await VoiceService._acompose(text, language, payload)
+        if composed:
+            return composed
+
+        chunks = await asyncio.gather(*(
+            VoiceService.atext_to_speech(sentence, language) for sentence in sentences
+        ))
+        if all(chunks):
+            joined = join_wav(list(chunks))
+            if joined:
+                get_tts_cache().put(payload, joined, background=True)
+                return joined
+        return await VoiceService._arequest_speech(payload)
+
+    # ------------------------------------------------------------
+    # Streaming Text to Speech
+    # ------------------------------------------------------------
+
+    @staticmethod
+    def _stream_units(text, language):
+        """
+        (whole-text payload, units) where each unit is ready audio or text
+        still to synthesize, in playback order: the stored whole response,
+        else its banked template fragments and variable parts, else its
+        sentences.
+        """
+        payload = VoiceService._tts_payload(text, language)
+        stored = VoiceService._stored_speech(payload)
+        if stored is not None:
+            return payload, [stored]
+        plan = VoiceService._composition_plan(text, language)
+        if plan:
+            return payload, plan
+        return payload, split_sentences(text) or [text]
+
+    @staticmethod
+    async def _astream_units(text, language):
+        """_stream_units with disk reads off the event loop."""
+        payload = VoiceService._tts_payload(text, language)
+        stored = await VoiceService._astored_speech(payload)
+        if stored is not None:
+            return payload, [stored]
+        plan = await VoiceService._acomposition_plan(text, language)
+        if plan:
+            return payload, plan
+        return payload, split_sentences(text) or [text]
+
+    @staticmethod
+    def _finish_stream(payload, stream, units, background=False):
+        """Cache the whole response once every unit of it was streamed."""
+        if units > 1 and not stream.ended:
+            joined = join_wav(stream.chunks)
+            if joined:
+                get_tts_cache().put(payload, joined, background=background)
+
+    @staticmethod
+    def stream_speech(text, language):
+        """
+        Streaming text_to_speech: all units are synthesized concurrently and
+        their audio is yielded in order as one WAV of unknown length, so the
+        first audio is ready after about one sentence.
+
+        Returns a SpeechStream (iterator of bytes), or None if the first unit
+        gave no audio (nothing has been sent yet then). A later unit without
+        audio ends the stream there (see WavStream).
+        """
+        if not text or not text.strip():
+            logger.warning("TTS: Empty text provided, skipping")
+            return None
+
+        payload, units = VoiceService._stream_units(text, language)
+        pool = _tts_executor()
+        pending = [
+            # In the caller's context, so the request trace sees the Sarvam calls
+            unit if isinstance(unit, bytes) else pool.submit(
+                contextvars.copy_context().run, VoiceService.text_to_speech, unit, language
+            )
+            for unit in units
+        ]
+
+        stream = WavStream()
+        first = stream.feed(pending[0] if isinstance(pending[0], bytes) else pending[0].result())
+        if not stream.started:
+            _cancel_pending(pending)
+            return None
+        logger.info(f"TTS: Streaming {len(units)} units lang={payload['target_language_code']}")
+        speech_stream_stats.record()
+
+        # Also cancels on client disconnect (GeneratorExit / CancelledError)
+        def body():
+            try:
+                yield first
+                for item in pending[1:]:
+                    frames = stream.feed(item if isinstance(item, bytes) else item.result())
+                    if stream.ended:
+                        break
+                    yield frames
+                VoiceService._finish_stream(payload, stream, len(units))
+            finally:
+                _cancel_pending(pending)
+
+        async def abody():
+            try:
+                yield first
+                for item in pending[1:]:
+                    frames = stream.feed(item if isinstance(item, bytes) else await asyncio.wrap_future(item))
+                    if stream.ended:
+                        break
+                    yield frames
+                VoiceService._finish_stream(payload, stream, len(units), background=True)
+            finally:
+                _cancel_pending(pending)
+
+        return SpeechStream(body(), stream, abody())
+
+    @staticmethod
+    async def astream_speech(text, language):
+        """Async stream_speech; returns an AsyncSpeechStream, or None."""
+        if not text or not text.strip():
+            logger.warning("TTS: Empty text provided, skipping")
+            return None
+
+        payload, units = await VoiceService._astream_units(text, language)
+        pending = [
+            unit if isinstance(unit, bytes) else asyncio.ensure_future(VoiceService.atext_to_speech(unit, language))
+            for unit in units
+        ]
+
+        stream = WavStream()
+        first = stream.feed(pending[0] if isinstance(pending[0], bytes) else await pending[0])
+        if not stream.started:
+            _cancel_pending(pending)
+            return None
+        logger.info(f"TTS: Streaming {len(units)} units lang={payload['target_language_code']}")
+        speech_stream_stats.record()
+
+        async def body():
+            try:
+                yield first
+                for item in pending[1:]:
+                    frames = stream.feed(item if isinstance(item, bytes) else await item)
+                    if stream.ended:
+                        break
+                    yield frames
+                VoiceService._finish_stream(payload, stream, len(units), background=True)
+            finally:
+                _cancel_pending(pending)
+
+        return AsyncSpeechStream(body(), stream)
@@ -0,0 +1,223 @@
+"""
+Voice App - Voice Sessions
+Short-lived per-farmer memory of the conversation, for follow-up turns.
+
+Each voice turn used to start from scratch: "apply for PM Kisan" right
+after "show my schemes" evaluated eligibility again. A VoiceSession
+keeps, per farmer and process:
+
+  eligible   EligibilityEngine.get_eligible_schemes() of the farmer (for
+             the scheme catalogue version it was computed with)
+  previews   AutoFillService.get_form_preview() results, per scheme (for
+             answers only: creating an application fetches the documents
+             again, see views.create_voice_application)
+  choices    schemes the last answer listed ("the second one")
+  offer      scheme the last answer asked to confirm ("yes, apply")
+  last_intent
+
+choices and offer only answer the turn right after the one that set them.
+A session is dropped after VOICE_SESSION_TTL_SECONDS without a turn, when
+the farmer's profile changed (updated_at) or a Document record is saved or
+deleted (voice.signals); the least recently used ones go beyond
+VOICE_SESSION_MAX_ENTRIES. The app uploads files straight to the Supabase
+bucket without touching Document, so a preview can still list documents
+as missing that were uploaded since. Sessions live in the worker's memory: a
+follow-up served by another worker is mapped like any other utterance.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+
+from .intent_cache import normalize_transcript
+from .intent_parser import Intent, ParsedIntent
+
+# Follow-ups are short; longer utterances go through intent mapping
+MAX_FOLLOW_UP_WORDS = 7
+
+# Position in the listed schemes (-1: the last one)
+ORDINALS = {
+    'first': 0, '1st': 0, 'second': 1, '2nd': 1, 'third': 2, '3rd': 2,
+    'fourth': 3, '4th': 3, 'fifth': 4, '5th': 4, 'last': -1,
+    'two': 1, 'three': 2, 'four': 3, 'five': 4,
+    'पहला': 0, 'पहली': 0, 'पहले': 0, 'दूसरा': 1, 'दूसरी': 1, 'दूसरे': 1,
+    'तीसरा': 2, 'तीसरी': 2, 'तीसरे': 2, 'चौथा': 3, 'चौथी': 3, 'चौथे': 3,
+    'पांचवा': 4, 'पांचवी': 4, 'पाँचवा': 4, 'पाँचवी': 4, 'आखिरी': -1, 'अंतिम': -1,
+    'पहिला': 0, 'पहिली': 0, 'पहिले': 0, 'दुसरा': 1, 'दुसरी': 1, 'दुसरे': 1,
+    'तिसरा': 2, 'तिसरी': 2, 'तिसरे': 2, 'पाचवा': 4, 'पाचवी': 4, 'पाचवे': 4,
+    'शेवटचा': -1, 'शेवटची': -1, 'शेवटचे': -1,
+}
+
+# Words that may accompany an ordinal ("the second one", "दूसरी वाली योजना").
+# Anything else ("show my last application") is an ordinary command.
+CHOOSE_WORDS = {
+    'the', 'one', 'scheme', 'option', 'number', 'apply', 'for', 'please', 'i', 'want', 'choose', 'select', 'take',
+    'वाला', 'वाली', 'वाले', 'योजना', 'नंबर', 'विकल्प', 'को', 'के', 'लिए', 'आवेदन', 'अप्लाई', 'करो', 'कर', 'दो', 'चाहिए',
+    'पर्याय', 'क्रमांक', 'साठी', 'अर्ज', 'करा', 'हवी', 'हवा', 'पाहिजे',
+}
+
+# A bare number ("2") picks a scheme only when it is the whole utterance
+DIGITS = {str(number): number - 1 for number in range(1, 10)}
+
+AFFIRMATIONS = {
+    'yes', 'yeah', 'yep', 'ok', 'okay', 'sure', 'confirm', 'haan', 'han',
+    'हाँ', 'हां', 'हा', 'जरूर', 'ज़रूर', 'बिल्कुल', 'ठीक',
+    'हो', 'होय', 'चालेल',
+}
+
+# Words that may accompany an affirmation ("yes, apply", "हाँ, आवेदन कर दो")
+CONFIRM_WORDS = {
+    'apply', 'please', 'go', 'ahead', 'do', 'it', 'submit', 'for', 'me', 'this', 'that', 'the', 'scheme',
+    'ji', 'karo', 'kar', 'जी', 'है', 'करो', 'कर', 'दो', 'दीजिए', 'करें', 'आवेदन', 'अप्लाई', 'योजना', 'के', 'लिए',
+    'आहे', 'करा', 'अर्ज', 'साठी',
+}
+
+NEGATIONS = {'no', 'not', 'nahi', 'cancel', 'dont', 'नहीं', 'नही', 'मत', 'नको', 'नाही'}
+
+
+@dataclass
+class VoiceSession:
+    """What the farmer and the assistant said last (see module docstring)."""
+    farmer_id: str
+    farmer_updated_at: Any
+    expires: float
+    eligible: Optional[List[Dict[str, Any]]] = None
+    eligible_version: Optional[str] = None
+    previews: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    choices: Optional[List[Dict[str, Any]]] = None
+    offer: Optional[str] = None
+    last_intent: Optional[str] = None
+
+    def eligible_for(self, version: str) -> Optional[List[Dict[str, Any]]]:
+        """Cached eligible schemes if computed for this catalogue version."""
+        return self.eligible if self.eligible_version == version else None
+
+    def scheme(self, scheme_id) -> Optional[Dict[str, Any]]:
+        """Eligible scheme entry by ID from the cached list, or None."""
+        for entry in self.eligible or ():
+            if entry['scheme_id'] == str(scheme_id):
+                return entry
+        return None
+
+    def remember(self, parsed: ParsedIntent, result: Dict[str, Any]):
+        """Record the answered turn; `follow_up` in the handler result sets choices / offer."""
+        follow_up = result.get('follow_up') or {}
+        self.choices = follow_up.get('choices')
+        self.offer = follow_up.get('offer')
+        self.last_intent = parsed.intent.value
+
+
+class VoiceSessionStore:
+    """TTL + LRU bounded map of farmer ID -> VoiceSession."""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._sessions: 'OrderedDict[str, VoiceSession]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def session(self, farmer) -> Optional[VoiceSession]:
+        """
+        The farmer's live session (its TTL restarted), a new one if there is
+        none or the profile changed since; None when sessions are disabled.
+        """
+        if self.max_entries <= 0 or self.ttl <= 0:
+            return None
+        key = str(farmer.id)
+        now = time.monotonic()
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None or session.expires <= now or session.farmer_updated_at != farmer.updated_at:
+                session = self._sessions[key] = VoiceSession(key, farmer.updated_at, now + self.ttl)
+            else:
+                session.expires = now + self.ttl
+            self._sessions.move_to_end(key)
+            while len(self._sessions) > self.max_entries:
+                self._sessions.popitem(last=False)
+        return session
+
+    def discard(self, farmer_id):
+        with self._lock:
+            self._sessions.pop(str(farmer_id), None)
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def clear(self):
+        with self._lock:
+            self._sessions.clear()
+
+
+# ============================================================
+# Follow-ups
+# ============================================================
+
+def _ordinal(tokens) -> Optional[int]:
+    """Position picked by an utterance of only ordinals and CHOOSE_WORDS, or None."""
+    if len(tokens) == 1 and tokens[0] in DIGITS:
+        return DIGITS[tokens[0]]
+    if not all(token in ORDINALS or token in CHOOSE_WORDS for token in tokens):
+        return None
+    positions = {ORDINALS[token] for token in tokens if token in ORDINALS}
+    return positions.pop() if len(positions) == 1 else None
+
+
+def resolve_follow_up(session: Optional[VoiceSession], text: str) -> Optional[ParsedIntent]:
+    """
+    APPLY_SCHEME for a follow-up to the session's last answer, or None:
+    an affirmation of the offered scheme (entities: scheme_id, follow_up
+    'confirm') or an ordinal, with only CHOOSE_WORDS around it, picking one
+    of the listed schemes (follow_up 'choose').
+    """
+    if session is None or (session.offer is None and not session.choices):
+        return None
+    tokens = normalize_transcript(text).split()
+    if not tokens or len(tokens) > MAX_FOLLOW_UP_WORDS or NEGATIONS.intersection(tokens):
+        return None
+
+    if session.offer is not None and AFFIRMATIONS.intersection(tokens) \
+            and all(token in AFFIRMATIONS or token in CONFIRM_WORDS for token in tokens):
+        return ParsedIntent(
+            intent=Intent.APPLY_SCHEME,
+            confidence=1.0,
+            entities={'scheme_id': session.offer, 'follow_up': 'confirm'},
+            original_text=text,
+        )
+
+    index = _ordinal(tokens)
+    if session.choices and index is not None and -len(session.choices) <= index < len(session.choices):
+        return ParsedIntent(
+            intent=Intent.APPLY_SCHEME,
+            confidence=1.0,
+            entities={'scheme_id': session.choices[index]['scheme_id'], 'follow_up': 'choose'},
+            original_text=text,
+        )
+    return None
+
+
+_voice_sessions: Optional[VoiceSessionStore] = None
+_voice_sessions_lock = threading.Lock()
+
+
+def get_voice_sessions() -> VoiceSessionStore:
+    """Process-wide session store configured from settings."""
+    global _voice_sessions
+    if _voice_sessions is None:
+        with _voice_sessions_lock:
+            if _voice_sessions is None:
+                _voice_sessions = VoiceSessionStore(
+                    max_entries=int(getattr(settings, 'VOICE_SESSION_MAX_ENTRIES', 10000)),
+                    ttl=float(getattr(settings, 'VOICE_SESSION_TTL_SECONDS', 300)),
+                )
+    return _voice_sessions
+
+
+def reset_voice_sessions():
+    """Recreate the store from settings on next use."""
+    global _voice_sessions
+    with _voice_sessions_lock:
+        _voice_sessions = None
@@ -0,0 +1,20 @@
+"""
+Voice App - Signals
+Drops a farmer's voice session when a Document record is saved or deleted,
+so eligibility and form previews kept there are computed afresh (this
+worker only; other workers' sessions expire after VOICE_SESSION_TTL_SECONDS).
+Uploads the app sends straight to the Supabase bucket do not pass through
+here; applications created by voice fetch the documents themselves.
+"""
+
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from documents.models import Document
+from .services.voice_session import get_voice_sessions
+
+
+@receiver(post_save, sender=Document)
+@receiver(post_delete, sender=Document)
+def document_changed(sender, instance, **kwargs):
+    get_voice_sessions().discard(instance.farmer_id)
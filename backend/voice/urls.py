@@ -3,10 +3,13 @@ Voice App - URL Configuration
 """
 
 from django.urls import path
-from .views import VoiceProcessView, VoiceConfirmView, VoiceTTSView
+from .views import VoiceProcessView, VoiceConfirmView, VoiceTTSView, VoiceMetricsView
+from .async_views import AsyncVoiceProcessView
 
 urlpatterns = [
     path('process/', VoiceProcessView.as_view(), name='voice-process'),
+    path('process/async/', AsyncVoiceProcessView.as_view(), name='voice-process-async'),
     path('confirm/', VoiceConfirmView.as_view(), name='voice-confirm'),
     path('tts/', VoiceTTSView.as_view(), name='voice-tts'),
+    path('metrics/', VoiceMetricsView.as_view(), name='voice-metrics'),
 ]
@@ -3,30 +3,136 @@ Voice App - Views
 Voice command processing endpoints
 """
 
+import hmac
 import logging
-from django.http import HttpResponse
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.decorators import method_decorator
 from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import BasePermission, IsAuthenticated
 
 import base64
-import tempfile
-import os
 
 from .services.intent_parser import IntentParser, ResponseGenerator, Intent
-from .services.voice_service import VoiceService
+from .services.audio_formats import DEFAULT_FORMAT, negotiate_format, transcode
+from .services.audio_preprocess import preprocess_stats
+from .services.intent_stats import intent_stats
+from .services.tracing import latency_histograms, span, tag, trace_request
+from .services.tts_cache import get_tts_cache
+from .services.voice_replay import get_voice_replays, replay_key
+from .services.llm_gateway import get_llm_gateway
+from .services.voice_service import AsyncSpeechStream, VoiceService, speech_stream_stats
+from .services.voice_session import get_voice_sessions
 from schemes.services.eligibility_engine import EligibilityEngine
+from schemes.services.scheme_catalogue import get_scheme_catalogue
 from applications.services.autofill_service import AutoFillService
 from applications.models import Application
 from schemes.models import Scheme
 from documents.models import Document
 from core.authentication import get_farmer_from_token
+from core.http_client import upstream_stats
 
 
 logger = logging.getLogger(__name__)
 
 
+def wants_stream(request, data):
+    """Whether the client asked for streamed audio (`stream` field or query param)."""
+    value = data.get('stream', request.GET.get('stream', ''))
+    return str(value).strip().lower() in ('1', 'true', 'yes')
+
+
+def _set_format_headers(response, audio_format):
+    """Name the audio format picked by negotiate_format (audio_formats)."""
+    response['X-Voice-Audio-Format'] = audio_format
+    patch_vary_headers(response, ['Accept'])
+
+
+def _set_voice_headers(response, metadata):
+    """Expose the voice metadata in X-Voice-* headers."""
+    import json as json_lib
+    from urllib.parse import quote
+    
+    response['X-Voice-Metadata'] = json_lib.dumps(metadata, ensure_ascii=True)
+    response['X-Voice-Intent'] = metadata['intent']
+    response['X-Voice-Confidence'] = str(metadata['confidence'])
+    response['X-Voice-Response'] = quote(metadata['response'], safe='')
+    response['X-Voice-Action'] = metadata.get('action') or ''
+    response['X-Voice-Speech-Text'] = quote(metadata['speech_text'], safe='')
+    
+    # Allow frontend to read custom headers (CORS)
+    response['Access-Control-Expose-Headers'] = (
+        'X-Voice-Metadata, X-Voice-Intent, X-Voice-Confidence, '
+        'X-Voice-Response, X-Voice-Action, X-Voice-Speech-Text, X-Voice-Audio-Format, '
+        'X-Voice-Replay, Server-Timing'
+    )
+    return response
+
+
+def build_audio_response(audio_content, metadata, audio_format=DEFAULT_FORMAT):
+    """
+    Raw WAV response with the voice metadata exposed in X-Voice-* headers.
+    Shared by the WSGI and ASGI voice pipelines.
+    """
+    response = HttpResponse(audio_content, content_type='audio/wav')
+    response['Content-Disposition'] = 'inline; filename="response.wav"'
+    response['Content-Length'] = len(audio_content)
+    _set_format_headers(response, audio_format)
+    return _set_voice_headers(response, metadata)
+
+
+def served_speech_stream(request, audio_stream):
+    """
+    A VoiceService.stream_speech result as a sync view should serve it:
+    under ASGI Django reads a sync iterator in full before sending any of
+    it, so the async side of the stream is served there.
+    """
+    if isinstance(getattr(request, '_request', request), ASGIRequest):
+        return audio_stream.asynchronous()
+    return audio_stream
+
+
+def build_audio_stream_response(audio_stream, metadata):
+    """
+    Chunked WAV response (VoiceService.stream_speech / astream_speech) with
+    the same X-Voice-* headers; the metadata is known before the audio.
+    """
+    response = StreamingHttpResponse(audio_stream, content_type='audio/wav')
+    response['Content-Disposition'] = 'inline; filename="response.wav"'
+    return _set_voice_headers(response, metadata)
+
+
+def create_voice_application(farmer, scheme_id):
+    """
+    AutoFillService.create_application for a scheme offered by voice, with
+    the scheme taken from the farmer's voice session when its eligible list
+    is current. The form is always generated afresh: the app uploads
+    documents straight to Supabase, so a cached preview may predate them.
+    Returns (scheme, application, created); scheme is None if the scheme
+    does not exist.
+    """
+    session = get_voice_sessions().session(farmer)
+    current = session is not None and session.eligible_for(get_scheme_catalogue().version) is not None
+    entry = session.scheme(scheme_id) if current else None
+    if entry is not None:
+        scheme = entry['scheme']
+    else:
+        record = get_scheme_catalogue().get(scheme_id)
+        if record is None:
+            return None, None, False
+        scheme = record.scheme
+    
+    application, created = AutoFillService.create_application(farmer, scheme)
+    if created and session is not None:
+        session.offer = None
+    return scheme, application, created
+
+
+@method_decorator(trace_request, name='dispatch')
 class VoiceProcessView(APIView):
     """
     POST /api/voice/process/
@@ -37,13 +143,24 @@ class VoiceProcessView(APIView):
     Accepts:
         - audio: Audio file (m4a/wav/mp3) for STT processing
         - text: Direct text input for intent parsing
+        - stream: "true" to receive the audio as a chunked WAV stream
+        - audio_format: compact audio encoding (see services/audio_formats;
+          also negotiable via the Accept header)
     
     Returns:
         - intent, confidence, response text, audio (base64 WAV), action, data
+        - Server-Timing header with the time spent per stage (services/tracing)
+        - X-Voice-Replay header ("hit" / "shared") when a retried audio clip
+          is answered with the response already computed (services/voice_replay)
     """
     permission_classes = [IsAuthenticated]
     
+    def perform_authentication(self, request):
+        with span('auth'):
+            super().perform_authentication(request)
+    
     def post(self, request):
+        replay_lead = None
         try:
             farmer = get_farmer_from_token(request)
             if not farmer:
@@ -55,8 +172,9 @@ class VoiceProcessView(APIView):
             language = farmer.language or 'hindi'
             
             # Get voice input (either audio or text)
-            audio_file = request.FILES.get('audio')
-            text = request.data.get('text', '').strip()
+            with span('upload'):
+                audio_file = request.FILES.get('audio')
+                text = request.data.get('text', '').strip()
             
             if audio_file:
                 # Validate audio file
@@ -75,34 +193,21 @@ class VoiceProcessView(APIView):
                         'message': 'Audio file too large (max 10MB).'
                     }, status=status.HTTP_400_BAD_REQUEST)
                 
-                # Save to temp file for processing
-                # Determine suffix from content type or default to .m4a
-                content_type = audio_file.content_type or ''
-                if 'wav' in content_type:
-                    suffix = '.wav'
-                elif 'mp3' in content_type or 'mpeg' in content_type:
-                    suffix = '.mp3'
-                else:
-                    suffix = '.m4a'
-                
-                with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-                    for chunk in audio_file.chunks():
-                        tmp.write(chunk)
-                    tmp_path = tmp.name
+                # A retry of a clip already answered (or being answered)
+                with span('replay'):
+                    replay, shared, replay_lead = get_voice_replays().claim(
+                        replay_key(farmer.id, audio_file), language
+                    )
+                if replay is not None:
+                    return self._replay(request, replay, shared)
                 
-                try:
-                    # Speech to Text
-                    text, detected_lang = VoiceService.speech_to_text(tmp_path)
-                    if detected_lang:
-                        language = detected_lang
-                    logger.info(f"Voice: STT result — lang={language}, text='{text[:100] if text else 'None'}'")
-                finally:
-                    # Always clean up temp file
-                    try:
-                        if os.path.exists(tmp_path):
-                            os.unlink(tmp_path)
-                    except OSError:
-                        pass
+                # Speech to Text, straight from the upload (in memory, or
+                # Django's own temp file above FILE_UPLOAD_MAX_MEMORY_SIZE)
+                with span('stt'):
+                    text, detected_lang = VoiceService.speech_to_text(audio_file, audio_file.name)
+                if detected_lang:
+                    language = detected_lang
+                logger.info(f"Voice: STT result — lang={language}, text='{text[:100] if text else 'None'}'")
                 
                 if not text:
                     return Response({
@@ -118,12 +223,22 @@ class VoiceProcessView(APIView):
             else:
                 logger.info(f"Voice: Text input from farmer {farmer.id}: '{text[:100]}'")
 
-            # Parse intent using AI (Groq) with regex fallback
-            parsed = VoiceService.map_intent(text, language)
+            tag(language=language)
+            
+            # A follow-up to the last turn ("the second one", "yes, apply"),
+            # else parse intent using AI (Groq) with regex fallback
+            session = get_voice_sessions().session(farmer)
+            parsed = VoiceService.follow_up(text, session)
+            if parsed is None:
+                with span('intent'):
+                    parsed = VoiceService.map_intent(text, language)
+            tag(intent=parsed.intent.value)
             logger.info(f"Voice: Intent={parsed.intent.value}, confidence={parsed.confidence}")
             
             # Handle intent
             result = self._handle_intent(parsed, farmer, language)
+            if session is not None:
+                session.remember(parsed, result)
             
             speech_text = result.get('speech_text', '')
             
@@ -139,11 +254,34 @@ class VoiceProcessView(APIView):
                 'data': result.get('data')
             }
             
+            # Stream the audio sentence by sentence if the client asked for it
+            if speech_text and wants_stream(request, request.data):
+                try:
+                    with span('tts'):
+                        audio_stream = VoiceService.stream_speech(speech_text, language)
+                    if audio_stream is not None:
+                        audio_stream = served_speech_stream(request, audio_stream)
+                        if replay_lead is not None:
+                            capture = (
+                                replay_lead.astream if isinstance(audio_stream, AsyncSpeechStream)
+                                else replay_lead.stream
+                            )
+                            audio_stream = capture(audio_stream, metadata)
+                        return build_audio_stream_response(audio_stream, metadata)
+                    logger.warning("Voice: TTS returned no audio — falling back to JSON")
+                except Exception as tts_error:
+                    logger.error(f"Voice: TTS failed: {tts_error}")
+                return Response({
+                    'success': True,
+                    'data': metadata
+                })
+            
             # Generate TTS audio from speech_text
             audio_content = None
             if speech_text:
                 try:
-                    audio_content = VoiceService.text_to_speech(speech_text, language)
+                    with span('tts'):
+                        audio_content = VoiceService.text_to_speech(speech_text, language)
                     if audio_content:
                         logger.info(f"Voice: TTS generated {len(audio_content)} bytes")
                     else:
@@ -152,31 +290,17 @@ class VoiceProcessView(APIView):
                     logger.error(f"Voice: TTS failed: {tts_error}")
             
             if audio_content:
-                # Return raw WAV audio with JSON metadata in headers
-                import json as json_lib
-                from urllib.parse import quote
-                
-                response = HttpResponse(audio_content, content_type='audio/wav')
-                response['Content-Disposition'] = 'inline; filename="response.wav"'
-                response['Content-Length'] = len(audio_content)
-                
-                # Expose metadata via custom headers
-                response['X-Voice-Metadata'] = json_lib.dumps(metadata, ensure_ascii=True)
-                response['X-Voice-Intent'] = parsed.intent.value
-                response['X-Voice-Confidence'] = str(parsed.confidence)
-                response['X-Voice-Response'] = quote(result['response'], safe='')
-                response['X-Voice-Action'] = result.get('action') or ''
-                response['X-Voice-Speech-Text'] = quote(speech_text, safe='')
-                
-                # Allow frontend to read custom headers (CORS)
-                response['Access-Control-Expose-Headers'] = (
-                    'X-Voice-Metadata, X-Voice-Intent, X-Voice-Confidence, '
-                    'X-Voice-Response, X-Voice-Action, X-Voice-Speech-Text'
-                )
-                
-                return response
+                if replay_lead is not None:
+                    replay_lead.finish(metadata, audio_content)
+                # Return raw WAV audio (in the negotiated format) with JSON metadata in headers
+                with span('transcode'):
+                    audio_content, audio_format = transcode(audio_content, negotiate_format(request, request.data))
+                return build_audio_response(audio_content, metadata, audio_format)
             else:
-                # Fallback: return JSON if TTS failed
+                # Fallback: return JSON if TTS failed (not replayed: TTS may
+                # work on the retry), or if there was nothing to say
+                if replay_lead is not None and not speech_text:
+                    replay_lead.finish(metadata)
                 return Response({
                     'success': True,
                     'data': metadata
@@ -188,39 +312,84 @@ class VoiceProcessView(APIView):
                 'success': False,
                 'message': 'An internal error occurred while processing your voice command. Please try again.'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        finally:
+            if replay_lead is not None:
+                replay_lead.abandon()
+    
+    def _replay(self, request, replay, shared):
+        """Answer with the result of an identical earlier request (services/voice_replay)."""
+        tag(intent=replay.metadata['intent'])
+        logger.info(f"Voice: Replaying {replay.metadata['intent']} response ({'shared' if shared else 'cached'})")
+        if replay.audio is None:
+            response = Response({
+                'success': True,
+                'data': replay.metadata
+            })
+        else:
+            with span('transcode'):
+                audio_content, audio_format = transcode(replay.audio, negotiate_format(request, request.data))
+            response = build_audio_response(audio_content, replay.metadata, audio_format)
+        response['X-Voice-Replay'] = 'shared' if shared else 'hit'
+        return response
     
     def _handle_intent(self, parsed, farmer, language):
         """Handle the parsed intent and return response"""
         intent = parsed.intent
         
-        try:
-            if intent == Intent.SHOW_ELIGIBLE_SCHEMES:
-                return self._handle_show_schemes(farmer, language)
+        with span('db'):
+            try:
+                if intent == Intent.SHOW_ELIGIBLE_SCHEMES:
+                    return self._handle_show_schemes(farmer, language)
             
-            elif intent == Intent.APPLY_SCHEME:
-                scheme_mention = parsed.entities.get('scheme_mention')
-                return self._handle_apply_scheme(farmer, language, scheme_mention)
+                elif intent == Intent.APPLY_SCHEME:
+                    if parsed.entities.get('follow_up') == 'confirm':
+                        return self._handle_confirm_offer(farmer, language, parsed.entities['scheme_id'])
+                    scheme_mention = parsed.entities.get('scheme_mention')
+                    return self._handle_apply_scheme(
+                        farmer, language, scheme_mention, parsed.entities.get('scheme_id')
+                    )
             
-            elif intent == Intent.CHECK_STATUS:
-                return self._handle_check_status(farmer, language)
+                elif intent == Intent.CHECK_STATUS:
+                    return self._handle_check_status(farmer, language)
             
-            elif intent == Intent.VIEW_PROFILE:
-                return self._handle_view_profile(farmer, language)
+                elif intent == Intent.VIEW_PROFILE:
+                    return self._handle_view_profile(farmer, language)
             
-            elif intent == Intent.LIST_APPLICATIONS:
-                return self._handle_list_applications(farmer, language)
+                elif intent == Intent.LIST_APPLICATIONS:
+                    return self._handle_list_applications(farmer, language)
             
-            elif intent == Intent.VIEW_DOCUMENTS:
-                return self._handle_view_documents(farmer, language)
+                elif intent == Intent.VIEW_DOCUMENTS:
+                    return self._handle_view_documents(farmer, language)
             
-            elif intent == Intent.HELP:
-                return self._handle_help(language)
+                elif intent == Intent.HELP:
+                    return self._handle_help(language)
             
-            else:
+                else:
+                    return self._handle_unknown(language)
+            except Exception as e:
+                logger.error(f"Voice: Error handling intent {intent.value}: {e}", exc_info=True)
                 return self._handle_unknown(language)
-        except Exception as e:
-            logger.error(f"Voice: Error handling intent {intent.value}: {e}", exc_info=True)
-            return self._handle_unknown(language)
+    
+    def _eligible_schemes(self, farmer):
+        """EligibilityEngine.get_eligible_schemes, kept in the farmer's voice session"""
+        session = get_voice_sessions().session(farmer)
+        version = get_scheme_catalogue().version
+        eligible = session.eligible_for(version) if session else None
+        if eligible is None:
+            eligible = EligibilityEngine.get_eligible_schemes(farmer)
+            if session is not None:
+                session.eligible, session.eligible_version = eligible, version
+        return eligible
+    
+    def _form_preview(self, farmer, scheme):
+        """AutoFillService.get_form_preview, kept in the farmer's voice session"""
+        session = get_voice_sessions().session(farmer)
+        preview = session.previews.get(str(scheme.id)) if session else None
+        if preview is None:
+            preview = AutoFillService.get_form_preview(farmer, scheme)
+            if session is not None:
+                session.previews[str(scheme.id)] = preview
+        return preview
     
     def _handle_show_schemes(self, farmer, language):
         """Handle SHOW_ELIGIBLE_SCHEMES intent"""
@@ -234,7 +403,7 @@ class VoiceProcessView(APIView):
                 'action': 'complete_profile'
             }
         
-        eligible = EligibilityEngine.get_eligible_schemes(farmer)
+        eligible = self._eligible_schemes(farmer)
         
         if not eligible:
             response = ResponseGenerator.get_response(
@@ -283,33 +452,26 @@ class VoiceProcessView(APIView):
             'data': {
                 'schemes': serializable_schemes,
                 'count': len(eligible)
-            }
+            },
+            # "the second one" picks from this list next turn
+            'follow_up': {'choices': eligible}
         }
     
-    def _handle_apply_scheme(self, farmer, language, scheme_mention=None):
-        """Handle APPLY_SCHEME intent"""
+    def _handle_apply_scheme(self, farmer, language, scheme_mention=None, scheme_id=None):
+        """Handle APPLY_SCHEME intent (scheme_id: picked from the last listed schemes)"""
         logger.info(f"Voice Apply: farmer={farmer.id}, name={farmer.name}, "
                      f"profile_complete={farmer.is_profile_complete}, "
-                     f"scheme_mention={scheme_mention}")
+                     f"scheme_mention={scheme_mention}, scheme_id={scheme_id}")
         
         try:
-            eligible = EligibilityEngine.get_eligible_schemes(farmer)
+            eligible = self._eligible_schemes(farmer)
             logger.info(f"Voice Apply: eligible count = {len(eligible)}")
         except Exception as e:
             logger.error(f"Voice Apply: EligibilityEngine error: {type(e).__name__}: {e}", exc_info=True)
             eligible = []
         
         if not eligible:
-            logger.warning(f"Voice Apply: No eligible schemes for farmer {farmer.id}. "
-                          f"Checking raw query...")
-            # Debug: check what the raw query returns
-            try:
-                from schemes.services.eligibility_engine import get_eligible_schemes_for_farmer
-                raw_eligible = get_eligible_schemes_for_farmer(farmer)
-                logger.info(f"Voice Apply: Raw eligible schemes = {[s.name for s in raw_eligible]}")
-            except Exception as dbg_err:
-                logger.error(f"Voice Apply: Debug query error: {dbg_err}")
-            
+            logger.warning(f"Voice Apply: No eligible schemes for farmer {farmer.id}")
             response = ResponseGenerator.get_response(
                 Intent.APPLY_SCHEME, language, 'not_eligible'
             )
@@ -322,7 +484,11 @@ class VoiceProcessView(APIView):
         # Try to match scheme_mention if provided
         target_scheme_data = None
         
-        if scheme_mention:
+        if scheme_id:
+            # Picked from the schemes listed in the last turn
+            target_scheme_data = next((s for s in eligible if s['scheme_id'] == scheme_id), None)
+        
+        if target_scheme_data is None and scheme_mention:
             for s in eligible:
                 if scheme_mention.lower() in s.get('name', '').lower() or \
                    scheme_mention.lower() in s.get('name_localized', '').lower():
@@ -340,7 +506,7 @@ class VoiceProcessView(APIView):
                     'speech_text': response,
                     'action': None
                 }
-        else:
+        elif target_scheme_data is None:
             # No scheme mentioned
             # List first 3 eligible schemes and ask user to pick one
             scheme_names = [s['name_localized'] for s in eligible[:3]]
@@ -353,7 +519,9 @@ class VoiceProcessView(APIView):
             return {
                 'response': response,
                 'speech_text': response,
-                'action': None
+                'action': None,
+                # Only the schemes read out can be picked ("the last one")
+                'follow_up': {'choices': eligible[:3]}
             }
         
         # Proceed with the found scheme
@@ -377,7 +545,7 @@ class VoiceProcessView(APIView):
             }
         
         # Get preview data for confirmation
-        preview = AutoFillService.get_form_preview(farmer, scheme)
+        preview = self._form_preview(farmer, scheme)
         
         if language == 'marathi':
             response = f"तुम्हाला {scheme_data['name_localized']} साठी अर्ज करायचा आहे का?"
@@ -395,6 +563,42 @@ class VoiceProcessView(APIView):
                 'scheme_name': scheme_data['name_localized'],
                 'benefit_amount': scheme_data['benefit_amount'],
                 'preview': preview
+            },
+            # "yes, apply" confirms it next turn
+            'follow_up': {'offer': str(scheme.id)}
+        }
+    
+    def _handle_confirm_offer(self, farmer, language, scheme_id):
+        """Handle "yes, apply" right after a confirm_apply answer (voice session)"""
+        scheme, application, created = create_voice_application(farmer, scheme_id)
+        
+        if application is None:
+            response = ResponseGenerator.get_response(
+                Intent.APPLY_SCHEME, language, 'not_eligible'
+            )
+            return {
+                'response': response,
+                'speech_text': response,
+                'action': None
+            }
+        
+        if created:
+            logger.info(f"Voice: Application created by voice for farmer {farmer.id}, scheme {scheme.name}")
+            response = ResponseGenerator.get_response(
+                Intent.APPLY_SCHEME, language, 'success',
+                scheme_name=scheme.get_localized_name(language)
+            )
+        else:
+            response = ResponseGenerator.get_response(
+                Intent.APPLY_SCHEME, language, 'already_applied'
+            )
+        return {
+            'response': response,
+            'speech_text': response,
+            'action': 'show_application',
+            'data': {
+                'application_id': str(application.id),
+                'status': application.status
             }
         }
     
@@ -536,8 +740,10 @@ class VoiceConfirmView(APIView):
             
             if action == 'confirm_apply' and confirmed and scheme_id:
                 try:
-                    scheme = Scheme.objects.get(id=scheme_id)
-                    application, created = AutoFillService.create_application(farmer, scheme)
+                    # Scheme and form from the voice session when still cached
+                    scheme, application, created = create_voice_application(farmer, scheme_id)
+                    if scheme is None:
+                        raise Scheme.DoesNotExist
                     
                     if created:
                         language = farmer.language or 'hindi'
@@ -587,6 +793,10 @@ class VoiceTTSView(APIView):
     Accepts:
         - text: Text to convert to speech
         - language: Language (hindi, marathi, english). Defaults to farmer's language.
+        - stream: "true" to receive the audio as a chunked WAV stream, sentence
+          by sentence, instead of one file
+        - audio_format: compact audio encoding (see services/audio_formats;
+          also negotiable via the Accept header)
     
     Returns:
         - Raw WAV audio file (Content-Type: audio/wav)
@@ -613,6 +823,20 @@ class VoiceTTSView(APIView):
             
             logger.info(f"TTS request: lang={language}, text='{text[:60]}...'")
             
+            if wants_stream(request, request.data):
+                audio_stream = VoiceService.stream_speech(text, language)
+                if audio_stream is None:
+                    return Response({
+                        'success': False,
+                        'message': 'Failed to generate audio. Please try again.'
+                    }, status=status.HTTP_502_BAD_GATEWAY)
+                
+                response = StreamingHttpResponse(
+                    served_speech_stream(request, audio_stream), content_type='audio/wav'
+                )
+                response['Content-Disposition'] = 'inline; filename="speech.wav"'
+                return response
+            
             audio_content = VoiceService.text_to_speech(text, language)
             
             if not audio_content:
@@ -621,11 +845,14 @@ class VoiceTTSView(APIView):
                     'message': 'Failed to generate audio. Please try again.'
                 }, status=status.HTTP_502_BAD_GATEWAY)
             
-            logger.info(f"TTS: Returning {len(audio_content)} bytes of WAV audio")
+            audio_content, audio_format = transcode(audio_content, negotiate_format(request, request.data))
+            logger.info(f"TTS: Returning {len(audio_content)} bytes of WAV audio ({audio_format})")
             
             response = HttpResponse(audio_content, content_type='audio/wav')
             response['Content-Disposition'] = 'inline; filename="speech.wav"'
             response['Content-Length'] = len(audio_content)
+            _set_format_headers(response, audio_format)
+            response['Access-Control-Expose-Headers'] = 'X-Voice-Audio-Format'
             return response
         
         except Exception as e:
@@ -634,3 +861,52 @@ class VoiceTTSView(APIView):
                 'success': False,
                 'message': 'An error occurred during speech synthesis.'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class HasMetricsToken(BasePermission):
+    """
+    X-Metrics-Token header matching VOICE_METRICS_TOKEN; without a token
+    configured the metrics are only served with DEBUG on.
+    """
+
+    def has_permission(self, request, view):
+        token = getattr(settings, 'VOICE_METRICS_TOKEN', '')
+        if not token:
+            return settings.DEBUG
+        return hmac.compare_digest(request.headers.get('X-Metrics-Token', ''), token)
+
+
+class VoiceMetricsView(APIView):
+    """
+    GET /api/voice/metrics/
+    
+    Voice pipeline metrics of this worker process (each worker keeps its own):
+        - latency: histograms per stage, and per stage, intent and language
+          (services/tracing; p50/p95/p99 estimated from the buckets)
+        - intent_cascade: hits and latency per intent tier
+        - tts_cache, stt_preprocess, replay: cache and preprocessing counters
+        - tts_stream: streamed responses, and those ended early by a
+          sentence without audio
+        - upstreams: circuit state, retries and rejections per external
+          provider (core/http_client)
+        - llm: intent LLM requests, tokens and latency (services/llm_gateway)
+    
+    Requires the X-Metrics-Token header (VOICE_METRICS_TOKEN).
+    """
+    authentication_classes = []
+    permission_classes = [HasMetricsToken]
+    
+    def get(self, request):
+        return Response({
+            'success': True,
+            'data': {
+                'latency': latency_histograms.stats(),
+                'intent_cascade': intent_stats.stats(),
+                'tts_cache': get_tts_cache().stats(),
+                'stt_preprocess': preprocess_stats.stats(),
+                'tts_stream': speech_stream_stats.stats(),
+                'replay': get_voice_replays().stats(),
+                'upstreams': upstream_stats(),
+                'llm': get_llm_gateway().stats(),
+            }
+        })